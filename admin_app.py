@@ -2,7 +2,8 @@
 import pandas as pd
 import streamlit as st
 from datetime import datetime, date, timedelta
-from supabase import create_client, Client
+
+from storage import StorageBackend, open_storage
 
 # -------------------------------------------------
 # PAGE CONFIG
@@ -94,17 +95,15 @@ st.markdown(
 )
 
 # -------------------------------------------------
-# SUPABASE CLIENT
+# STORAGE (Supabase, or local SQLite – same secrets as app.py)
 # -------------------------------------------------
 
 @st.cache_resource
-def get_supabase() -> Client:
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
+def get_storage() -> StorageBackend:
+    return open_storage(st.secrets)
 
 
-supabase = get_supabase()
+storage = get_storage()
 
 ADMIN_EMAIL = st.secrets["ADMIN_EMAIL"]
 ADMIN_PASSWORD = st.secrets["ADMIN_PASSWORD"]
@@ -117,8 +116,7 @@ ADMIN_PASSWORD = st.secrets["ADMIN_PASSWORD"]
 def load_table(name: str, select: str = "*") -> pd.DataFrame:
     """Generic helper to load a table as DataFrame."""
     try:
-        res = supabase.table(name).select(select).execute()
-        return pd.DataFrame(res.data or [])
+        return pd.DataFrame(storage.select(name, select))
     except Exception as e:
         st.error(f"Error loading table {name}: {e}")
         return pd.DataFrame()
@@ -355,13 +353,13 @@ with tab_users:
             col_btn1, col_btn2 = st.columns(2)
             with col_btn1:
                 if st.button("Clear User History"):
-                    supabase.table("history").delete().eq("user_id", user_id).execute()
+                    storage.delete("history", {"user_id": user_id})
                     st.success("History cleared")
                     st.rerun()
 
             with col_btn2:
                 if st.button("Delete User Completely"):
-                    supabase.table("users").delete().eq("id", user_id).execute()
+                    storage.delete("users", {"id": user_id})
                     st.success("User deleted")
                     st.rerun()
 
@@ -373,7 +371,13 @@ with tab_colonies:
     st.subheader("🏙 Colony Master (Add / Edit / Delete)")
     st.caption("Manage colonies & update land / construction rates.")
 
-    df = load_table("colonies")
+    all_colonies = load_table("colonies")
+    # Deletes are tombstones (deleted = true) so running apps see them
+    # through the updated_at watermark; see sql/colonies_versioning.sql
+    if "deleted" in all_colonies.columns:
+        df = all_colonies[~all_colonies["deleted"].fillna(False).astype(bool)]
+    else:
+        df = all_colonies
 
     # ------------------------
     # SEARCH
@@ -406,16 +410,18 @@ with tab_colonies:
         if not new_colony:
             st.error("Enter colony name.")
         else:
-            supabase.table("colonies").insert(
-                {
-                    "colony_name": new_colony,
-                    "category": new_category,
-                    "res_land_rate": None,
-                    "res_const_rate": None,
-                    "com_land_rate": None,
-                    "com_const_rate": None,
-                }
-            ).execute()
+            row = {
+                "colony_name": new_colony,
+                "category": new_category,
+                "res_land_rate": None,
+                "res_const_rate": None,
+                "com_land_rate": None,
+                "com_const_rate": None,
+            }
+            tombstones = all_colonies.drop(df.index)
+            # Re-adding a deleted colony revives its tombstone
+            revive = new_colony in tombstones.get("colony_name", pd.Series()).tolist()
+            storage.add_colony(row, revive=revive)
             st.success("Colony added successfully.")
             st.rerun()
 
@@ -457,14 +463,16 @@ with tab_colonies:
             )
 
         if st.button("Update Rates"):
-            supabase.table("colonies").update(
+            storage.update(
+                "colonies",
                 {
                     "res_land_rate": new_rl,
                     "res_const_rate": new_rc,
                     "com_land_rate": new_cl,
                     "com_const_rate": new_cc,
-                }
-            ).eq("colony_name", selected).execute()
+                },
+                {"colony_name": selected},
+            )
 
             st.success("Rates updated successfully.")
             st.rerun()
@@ -480,7 +488,7 @@ with tab_colonies:
 
     if st.button("Delete Colony"):
         if del_sel != "Select":
-            supabase.table("colonies").delete().eq("colony_name", del_sel).execute()
+            storage.delete_colony(del_sel)
             st.warning(f"{del_sel} deleted successfully!")
             st.rerun()
 
@@ -5,14 +5,48 @@
 
 import math
 import hashlib
+import uuid
 from datetime import datetime, timedelta, date
 from urllib.parse import quote
 
 import pandas as pd
 import streamlit as st
-from supabase import create_client, Client
 
 from email_otp import send_otp_email
+from calc_engine import (
+    stampdutyrates,
+    circlerates_res,
+    construction_rates_res,
+    circlerates_com,
+    construction_rates_com,
+    AREA_CATEGORY_RATES,
+    UNIFORM_RATES_MORE_THAN_4,
+    convert_sq_yards_to_sq_meters,
+    age_multiplier,
+    get_stampduty_rate,
+    duty_schedule_for,
+    determine_area_category,
+    dda_minimum_value,
+    EffectiveRates,
+    set_colony_rates,
+    _calc,
+)
+from quote_cache import QUOTES
+from staged_calc import StagedCalculator
+from results import QuoteResult
+from colonies import build_colony_map, category_for, read_colonies_csv
+from colony_cache import ColonyCache, catch_up, open_colony_cache
+from colony_search import TrigramIndex
+from colony_snapshot import build_snapshot
+from event_logger import EventDedupe, EventLogger
+from storage import StorageBackend, open_storage
+from supabase_guard import (
+    BackendUnavailable,
+    CallTimeout,
+    SupabaseGuard,
+    WriteQueue,
+    retry_safe,
+)
 
 # -------------------------------------------------
 # BASIC CONFIG
@@ -20,63 +54,6 @@ from email_otp import send_otp_email
 
 APP_URL = "https://delhi-property-price-calculator.streamlit.app"  # update if needed
 
-stampdutyrates = {"male": 0.06, "female": 0.04, "joint": 0.05}
-
-# Residential circle & construction rates
-circlerates_res = {
-    "A": 774000,
-    "B": 245520,
-    "C": 159840,
-    "D": 127680,
-    "E": 70080,
-    "F": 56640,
-    "G": 46200,
-    "H": 23280,
-}
-construction_rates_res = {
-    "A": 21960,
-    "B": 17400,
-    "C": 13920,
-    "D": 11160,
-    "E": 9360,
-    "F": 8220,
-    "G": 6960,
-    "H": 3480,
-}
-
-# Commercial circle & construction rates
-circlerates_com = {k: v * 3 for k, v in circlerates_res.items()}
-construction_rates_com = {
-    "A": 25200,
-    "B": 19920,
-    "C": 15960,
-    "D": 12840,
-    "E": 10800,
-    "F": 9480,
-    "G": 8040,
-    "H": 3960,
-}
-
-# DDA / CGHS built-up rates (per sq. mtr.)
-AREA_CATEGORY_RATES = {
-    "residential": {
-        "upto_30": 50400,
-        "30_50": 54480,
-        "50_100": 66240,
-        "above_100": 76200,
-    },
-    "commercial": {
-        "upto_30": 57840,
-        "30_50": 62520,
-        "50_100": 75960,
-        "above_100": 87360,
-    },
-}
-UNIFORM_RATES_MORE_THAN_4 = {
-    "residential": 87840,
-    "commercial": 100800,
-}
-
 # -------------------------------------------------
 # PAGE CONFIG & CSS LOADER
 # -------------------------------------------------
@@ -99,16 +76,73 @@ def load_css(path: str = "styles.css"):
 load_css()
 
 # -------------------------------------------------
-# SUPABASE CLIENT
+# STORAGE (Supabase, or local SQLite)
+# -------------------------------------------------
+
+@st.cache_resource
+def get_storage() -> StorageBackend:
+    # STORAGE_BACKEND = "sqlite" (and SQLITE_PATH) in secrets runs the
+    # app on a local database; the default is Supabase. Nothing connects
+    # until the first query, so the module loads (e.g. for benchmarks)
+    # without network.
+    return open_storage(st.secrets)
+
+# -------------------------------------------------
+# SUPABASE GUARD (timeouts, circuit breaker, offline writes)
 # -------------------------------------------------
 
+# Full colony list on a cold start with no snapshot; the rest use the default
+COLONY_LOAD_TIMEOUT = 15.0
+WATERMARK_TIMEOUT = 2.0
+REPLAY_INTERVAL = 10.0  # seconds between background replays of queued writes
+
 @st.cache_resource
-def get_supabase_client() -> Client:
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
+def get_supabase_guard() -> SupabaseGuard:
+    # One breaker per process: when Supabase is down every session
+    # fails fast instead of each waiting out its own timeouts
+    return SupabaseGuard()
+
+@st.cache_resource
+def get_write_queue() -> WriteQueue:
+    # Queued writes are re-sent from a background thread, never during a
+    # rerun, and only when the breaker lets a call through (a half-open
+    # breaker's trial call may be a replayed write)
+    queue = WriteQueue()
+    guard, storage = get_supabase_guard(), get_storage()
+    queue.start_replay(
+        lambda entry: guard.call(lambda: storage.write(entry), name="replay"),
+        ready=lambda: guard.accepting,
+        interval=REPLAY_INTERVAL,
+    )
+    return queue
 
-supabase = get_supabase_client()
+get_write_queue()
+
+def db_call(fn, name: str, timeout=None):
+    """Run fn() (a storage request) under the shared timeout / breaker."""
+    return get_supabase_guard().call(fn, timeout=timeout, name=name)
+
+def apply_write(entry: dict):
+    return get_storage().write(entry)
+
+def db_write(table: str, op: str, values, match=None) -> bool:
+    """
+    Insert/update that may wait: True if written now, False if Supabase
+    was unavailable and it was queued in pending_writes.jsonl instead.
+    Only failures that cannot duplicate the write on replay are queued
+    (supabase_guard.retry_safe): an insert that timed out may already
+    be stored, so that is raised (CallTimeout) like any other error.
+    """
+    entry = {"table": table, "op": op, "values": values, "match": match or {}}
+    try:
+        db_call(lambda: apply_write(entry), name=f"{op} {table}")
+        return True
+    except Exception as e:
+        if not retry_safe(op, e):
+            raise
+        print("DB WRITE QUEUED:", e)
+        get_write_queue().push(table, op, values, match)
+        return False
 
 # -------------------------------------------------
 # SESSION STATE
@@ -139,20 +173,47 @@ ensure_session_state()
 # EVENT LOGGER
 # -------------------------------------------------
 
-def log_event(event_type: str, details: str = ""):
-    """Insert analytics event into Supabase 'events' table."""
-    try:
-        supabase.table("events").insert(
-            {
-                "email": st.session_state.user_email or "guest",
-                "event_type": str(event_type or "unknown"),
-                "details": str(details or ""),
-                "created_at": datetime.utcnow().isoformat(),
-            }
-        ).execute()
-    except Exception as e:
-        # Avoid breaking UI due to logging issue
-        print("EVENT LOG ERROR:", e)
+# Fired on every rerun; first to go when the event queue backs up
+LOW_PRIORITY_EVENTS = {"result_viewed"}
+
+def insert_events(rows: list):
+    # One bulk insert per batch, on the logger's worker thread; queued
+    # locally while Supabase is unavailable
+    db_write("events", "insert", rows)
+
+@st.cache_resource
+def get_event_logger() -> EventLogger:
+    # One background writer per process, shared by all sessions
+    return EventLogger(insert_events)
+
+def get_event_dedupe() -> EventDedupe:
+    # One per session: remembers which events this visit already logged
+    if "event_dedupe" not in st.session_state:
+        st.session_state.event_dedupe = EventDedupe(uuid.uuid4().hex)
+    return st.session_state.event_dedupe
+
+def log_event(event_type: str, details: str = "", key=None):
+    """
+    Queue an analytics event for the Supabase 'events' table (never blocks).
+    Repeats of the same (event_type, key) within its EVENT_POLICIES window
+    are skipped; key defaults to details.
+    """
+    dedupe = get_event_dedupe()
+    if not dedupe.admit(event_type, details if key is None else key):
+        return
+    sample = dedupe.policy(event_type).sample
+    if sample < 1:
+        # So counts can be scaled back up
+        details = f"{details} [sampled {sample:g}]"
+    get_event_logger().log(
+        {
+            "email": st.session_state.user_email or "guest",
+            "event_type": str(event_type or "unknown"),
+            "details": str(details or ""),
+            "created_at": datetime.utcnow().isoformat(),
+        },
+        low_priority=event_type in LOW_PRIORITY_EVENTS,
+    )
 
 # First visit log
 log_event("visit", "User opened calculator")
@@ -161,22 +222,92 @@ log_event("visit", "User opened calculator")
 # COLONY LOADER
 # -------------------------------------------------
 
-@st.cache_data
+def fetch_colony_rows(since=None):
+    """Colonies rows, or only those changed at/after `since` (incl. tombstones)."""
+    return db_call(
+        lambda: get_storage().colony_rows(since),
+        name="load colonies",
+        timeout=COLONY_LOAD_TIMEOUT,
+    )
+
+def fetch_colony_watermark():
+    """Newest colonies.updated_at: the cheap "anything changed?" probe."""
+    return db_call(
+        lambda: get_storage().colony_watermark(),
+        name="colony watermark",
+        timeout=WATERMARK_TIMEOUT,
+    )
+
+@st.cache_resource
+def get_colony_cache() -> ColonyCache:
+    # One per process, shared by all sessions. Seeded from the mmap
+    # snapshot (python colony_snapshot.py) when there is one. A snapshot
+    # built with --supabase carries the table's watermark, so catching
+    # up only pulls rows changed since; one built from colonies.csv has
+    # none, so its rows serve until a full reload replaces them (and
+    # keep serving if that fails).
+    return open_colony_cache(fetch_colony_rows, fetch_colony_watermark)
+
+def save_colony_snapshot(cache: ColonyCache):
+    # Next cold start seeds from this list, watermark included
+    try:
+        build_snapshot(cache.records(), watermark=cache.watermark)
+    except OSError as e:
+        print("SNAPSHOT WRITE ERROR:", e)
+
 def load_colonies_from_db():
+    # At most one tiny watermark query per ColonyCache.check_interval;
+    # admin edits show up on the next check instead of at restart. With
+    # rows already cached (snapshot or earlier run) the page renders
+    # from them and the check runs in the background.
+    cache = get_colony_cache()
     try:
-        res = supabase.table("colonies").select("*").order("colony_name").execute()
-        data = res.data or []
-        df = pd.DataFrame(data)
-        if df.empty:
-            return [], {}, df
-        names = df["colony_name"].tolist()
-        category_map = dict(zip(df["colony_name"], df["category"]))
-        return names, category_map, df
+        catch_up(
+            cache,
+            on_change=save_colony_snapshot,
+            on_error=lambda e: print("COLONY REFRESH ERROR:", e),
+        )
     except Exception as e:
-        st.error(f"Error loading colonies: {e}")
-        return [], {}, pd.DataFrame()
-
-COLONY_NAMES, COLONY_MAP, COLONY_FULL_DF = load_colonies_from_db()
+        # Nothing cached yet: fall back to the bundled colonies.csv
+        # (watermark None, so the first good refresh reloads fully)
+        cache.seed(read_colonies_csv(), None)
+        st.warning(f"Colony list is offline ({e}); using the bundled copy.")
+        print("COLONY REFRESH ERROR:", e)
+    return cache
+
+COLONY_CACHE = load_colonies_from_db()
+# Sorted by name as the old ordered query was; deltas append to the cache
+COLONY_NAMES, COLONY_MAP = build_colony_map(sorted(COLONY_CACHE.rows()))
+
+@st.cache_resource(max_entries=2)
+def get_colony_rates(version: int) -> EffectiveRates:
+    # Per-colony rate overrides, precomputed once per colony list version
+    return EffectiveRates(get_colony_cache().records())
+
+set_colony_rates(get_colony_rates(COLONY_CACHE.version))
+
+@st.cache_resource(max_entries=2)
+def get_colony_index(version: int, _colony_items: tuple) -> TrigramIndex:
+    # Rebuilt only when the colony cache version changes
+    return TrigramIndex(_colony_items)
+
+COLONY_INDEX = get_colony_index(COLONY_CACHE.version, tuple(COLONY_MAP.items()))
+
+def colony_picker(prefix: str) -> str:
+    """Fuzzy search box narrowing the colony selectbox (typos are OK)."""
+    query = st.text_input(
+        "Search colony (e.g. Lajpat Ngr)", key=f"{prefix}_colony_query"
+    )
+    options = COLONY_NAMES
+    if query.strip():
+        options = [name for name, _, _ in COLONY_INDEX.search(query, k=20)]
+        if not options:
+            st.caption("No close match found.")
+    return st.selectbox(
+        "Colony (type to search)",
+        ["(Not using colony)"] + options,
+        key=f"{prefix}_colony",
+    )
 
 # -------------------------------------------------
 # DB HELPERS
@@ -186,24 +317,10 @@ def hash_password(pw: str) -> str:
     return hashlib.sha256(pw.encode()).hexdigest()
 
 def get_user_by_email(email: str):
-    resp = (
-        supabase.table("users")
-        .select("id, email, username, password_hash, is_verified")
-        .eq("email", email.lower())
-        .execute()
-    )
-    rows = resp.data or []
-    return rows[0] if rows else None
+    return db_call(lambda: get_storage().get_user(email=email), name="user lookup")
 
 def get_user_by_username(username: str):
-    resp = (
-        supabase.table("users")
-        .select("id, email, username, password_hash, is_verified")
-        .eq("username", username.lower())
-        .execute()
-    )
-    rows = resp.data or []
-    return rows[0] if rows else None
+    return db_call(lambda: get_storage().get_user(username=username), name="user lookup")
 
 def get_user_by_email_or_username(identifier: str):
     ident = (identifier or "").strip().lower()
@@ -214,9 +331,8 @@ def get_user_by_email_or_username(identifier: str):
     return get_user_by_username(ident)
 
 def create_user(email: str, username: str, password_hash: str):
-    resp = (
-        supabase.table("users")
-        .insert(
+    return db_call(
+        lambda: get_storage().create_user(
             {
                 "email": email.lower(),
                 "username": username.lower(),
@@ -224,213 +340,105 @@ def create_user(email: str, username: str, password_hash: str):
                 "is_verified": True,
                 "created_at": datetime.utcnow().isoformat(),
             }
-        )
-        .execute()
+        ),
+        name="create user",
     )
-    rows = resp.data or []
-    return rows[0] if rows else None
 
 def update_last_login(uid):
+    # Bookkeeping only; never let it fail a sign-in
     try:
-        supabase.table("users").update(
-            {"last_login": datetime.utcnow().isoformat()}
-        ).eq("id", uid).execute()
-    except Exception:
-        pass
+        db_write("users", "update", {"last_login": datetime.utcnow().isoformat()}, {"id": uid})
+    except Exception as e:
+        print("LAST LOGIN UPDATE FAILED:", e)
 
 def create_otp_record(email, otp, purpose="signup"):
-    supabase.table("otps").insert(
-        {
-            "email": email.lower(),
-            "otp_code": otp,
-            "purpose": purpose,
-            "used": False,
-            "expires_at": (datetime.utcnow() + timedelta(minutes=10)).isoformat(),
-        }
-    ).execute()
+    db_call(
+        lambda: get_storage().insert(
+            "otps",
+            {
+                "email": email.lower(),
+                "otp_code": otp,
+                "purpose": purpose,
+                "used": False,
+                "expires_at": (datetime.utcnow() + timedelta(minutes=10)).isoformat(),
+            },
+        ),
+        name="create OTP",
+    )
 
 def verify_otp_record(email, otp_code, purpose):
     now = datetime.utcnow().isoformat()
-    resp = (
-        supabase.table("otps")
-        .select("id, used, expires_at")
-        .eq("email", email.lower())
-        .eq("otp_code", otp_code)
-        .eq("purpose", purpose)
-        .order("id", desc=True)
-        .limit(1)
-        .execute()
+    row = db_call(
+        lambda: get_storage().latest_otp(email, otp_code, purpose),
+        name="verify OTP",
     )
-    row = resp.data[0] if resp.data else None
     if not row:
         return False
     if row["used"] or row["expires_at"] < now:
         return False
 
-    supabase.table("otps").update({"used": True}).eq("id", row["id"]).execute()
+    db_call(
+        lambda: get_storage().update("otps", {"used": True}, {"id": row["id"]}),
+        name="use OTP",
+    )
     return True
 
-def save_history_to_db(res: dict):
+def save_history_to_db(res: QuoteResult):
     if st.session_state.user_id is None:
         return st.error("Please sign in to save this calculation to your history.")
 
-    supabase.table("history").insert(
-        {
-            "user_id": st.session_state.user_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "colony_name": res["colony_name"],
-            "property_type": res["property_type"],
-            "category": res["category"],
-            "consideration": res["final_consideration"],
-            "stamp_duty": res["stamp_duty"],
-            "e_fees": res["e_fees"],
-            "tds": res["tds"],
-            "total_govt_duty": res["total_payable"],
-        }
-    ).execute()
+    row = {
+        "user_id": st.session_state.user_id,
+        "created_at": datetime.utcnow().isoformat(),
+        **res.history_row(),
+    }
+    try:
+        written = db_write("history", "insert", row)
+    except CallTimeout:
+        return st.warning(
+            "The database did not confirm the save in time. "
+            "Check your history before saving again."
+        )
+    except Exception as e:
+        return st.error(f"Could not save this calculation to your history ({e}).")
+    if not written:
+        st.info("Saved on this server; it will reach your history once the database is back.")
 
     log_event("history_saved", f"{res['property_type']} - {res['colony_name']}")
 
-# -------------------------------------------------
-# CALC HELPERS
-# -------------------------------------------------
-
-def convert_sq_yards_to_sq_meters(y):
-    return round(y * 0.8361, 2)
-
-def age_multiplier(year):
-    if year < 1960:
-        return 0.5
-    if year <= 1969:
-        return 0.6
-    if year <= 1979:
-        return 0.7
-    if year <= 1989:
-        return 0.8
-    if year <= 2000:
-        return 0.9
-    return 1.0
-
-def get_stampduty_rate(owner, val):
-    base = stampdutyrates.get(owner, 0)
-    return base + 0.01 if val > 2_500_000 else base
-
-def determine_area_category(plinth_area_sqm: float) -> str:
-    if plinth_area_sqm <= 30:
-        return "upto_30"
-    elif plinth_area_sqm <= 50:
-        return "30_50"
-    elif plinth_area_sqm <= 100:
-        return "50_100"
-    return "above_100"
-
-def dda_minimum_value(plinth_area_sqm, building_more_than_4_storeys, usage):
-    usage = usage.lower()
-    if usage not in AREA_CATEGORY_RATES:
-        raise ValueError("Usage must be 'residential' or 'commercial'.")
-
-    if building_more_than_4_storeys:
-        rate = UNIFORM_RATES_MORE_THAN_4[usage]
-    else:
-        cat = determine_area_category(plinth_area_sqm)
-        rate = AREA_CATEGORY_RATES[usage][cat]
-
-    value = plinth_area_sqm * rate
-    return rate, value
-
 # -------------------------------------------------
 # MAIN CALCULATION
 # -------------------------------------------------
 
+def get_staged_calculator(tab: str) -> StagedCalculator:
+    # One per tab and session, so a widget change only re-runs the
+    # stages that depend on it
+    key = f"staged_calc_{tab}"
+    if key not in st.session_state:
+        st.session_state[key] = StagedCalculator()
+    return st.session_state[key]
+
 def run_calculation(**kwargs):
     log_event("calculation_run", f"{kwargs.get('property_type')} calculation started")
-    return _calc(**kwargs)
-
-def _calc(
-    property_type,
-    land_area_yards,
-    category,
-    owner,
-    include_const,
-    parking,
-    total_storey,
-    user_storey,
-    constructed_area,
-    year_built,
-    custom_cons,
-    colony_name=None,
-):
-    if property_type == "Residential":
-        circle = circlerates_res
-        con = construction_rates_res
-    else:
-        circle = circlerates_com
-        con = construction_rates_com
-
-    land_m = convert_sq_yards_to_sq_meters(land_area_yards)
-    land_total = circle[category] * land_m
-    land_user = land_total * (user_storey / total_storey)
-
-    construction_value = 0.0
-    parking_cost = 0.0
-
-    if include_const == "yes":
-        area_m = convert_sq_yards_to_sq_meters(constructed_area)
-        base_const = con[category] * area_m
-        construction_value = base_const * age_multiplier(year_built) * user_storey
-
-        if parking == "yes":
-            parking_cost = land_m * con[category] * user_storey / total_storey
-
-    auto_cons = land_user + construction_value + parking_cost
-
-    if custom_cons > 0:
-        final = custom_cons
-    else:
-        final = auto_cons
-
-    stamp_rate = get_stampduty_rate(owner, final)
-    stamp = final * stamp_rate
-
-    mutation = 1136 if (property_type == "Residential" and final > 5_000_000) else 1124
-    e = final * 0.01 + mutation
-    tds = final * 0.01 if final > 5_000_000 else 0
-    total = stamp + e + tds
-
-    return {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "property_type": property_type,
-        "colony_name": colony_name,
-        "land_area_yards": land_area_yards,
-        "land_area_m": land_m,
-        "category": category,
-        "owner": owner,
-        "include_const": include_const,
-        "parking": parking,
-        "total_storey": total_storey,
-        "user_storey": user_storey,
-        "constructed_area": constructed_area,
-        "year_built": year_built,
-        "auto_consideration": auto_cons,
-        "custom_consideration": custom_cons,
-        "final_consideration": final,
-        "stamp_rate": stamp_rate,
-        "stamp_duty": stamp,
-        "mutation": mutation,
-        "e_fees": e,
-        "tds": tds,
-        "total_payable": total,
-        "land_value_user": land_user,
-        "construction_value": construction_value,
-        "parking_cost": parking_cost,
-    }
+    # Served from the process-wide quote cache; a miss runs the tab's
+    # staged calculator
+    staged = get_staged_calculator(kwargs.get("property_type"))
+    # Kept in session_state as a compact slotted record, not a dict
+    return QuoteResult.from_dict(QUOTES.calculate(compute=staged.calculate, **kwargs))
 
 # -------------------------------------------------
 # SUMMARY BLOCK
 # -------------------------------------------------
 
 def render_summary_block(res, save_key):
-    log_event("result_viewed", f"{res['property_type']} - {res['colony_name']}")
+    # Once per result and tab, however often a rerun redraws it; two
+    # calculations in the same second still count separately.
+    # QuoteResult is a frozen dataclass, so it hashes by value.
+    log_event(
+        "result_viewed",
+        f"{res['property_type']} - {res['colony_name']}",
+        key=f"{save_key}|{hash(res)}",
+    )
     st.markdown('<div class="box">', unsafe_allow_html=True)
     st.write("## 📊 Calculation Summary")
 
@@ -482,6 +490,12 @@ def render_sidebar_status():
             if st.button("Login / Sign up", key="open_auth_from_sidebar"):
                 st.session_state.show_auth_modal = True
 
+        if get_supabase_guard().degraded:
+            st.warning(
+                "Offline mode: the database is not responding. Calculations "
+                "use the cached colony list; saves are kept and sent later."
+            )
+
 # -------------------------------------------------
 # AUTH POPUP (Login + Signup + Reset)
 # -------------------------------------------------
@@ -613,11 +627,15 @@ def render_auth_modal():
                         otp2,
                         "reset",
                     ):
-                        supabase.table("users").update(
-                            {"password_hash": hash_password(newpw)}
-                        ).eq(
-                            "email", st.session_state.pending_signup_email
-                        ).execute()
+                        reset_email = st.session_state.pending_signup_email
+                        db_call(
+                            lambda: get_storage().update(
+                                "users",
+                                {"password_hash": hash_password(newpw)},
+                                {"email": reset_email},
+                            ),
+                            name="reset password",
+                        )
                         log_event(
                             "password_reset",
                             st.session_state.pending_signup_email,
@@ -775,7 +793,11 @@ st.write("---")
 
 # Render sidebar + modal
 render_sidebar_status()
-render_auth_modal()
+try:
+    render_auth_modal()
+except BackendUnavailable as e:
+    # Accounts need the database; the calculators don't
+    st.warning(f"Sign-in is unavailable right now ({e}). The calculators still work as guest.")
 
 # -------------------------------------------------
 # MAIN TABS
@@ -814,14 +836,10 @@ with tab_res:
 
     col1, col2 = st.columns(2)
     with col1:
-        r_colony = st.selectbox(
-            "Colony (type to search)",
-            ["(Not using colony)"] + COLONY_NAMES,
-            key="r_colony",
-        )
+        r_colony = colony_picker("r")
 
         if r_colony != "(Not using colony)":
-            r_category = COLONY_MAP.get(r_colony, "G")
+            r_category = category_for(COLONY_MAP, r_colony)
             st.info(f"Detected Category from master list: **{r_category}**")
         else:
             r_category = st.selectbox(
@@ -905,14 +923,10 @@ with tab_com:
 
     col1, col2 = st.columns(2)
     with col1:
-        c_colony = st.selectbox(
-            "Colony (type to search)",
-            ["(Not using colony)"] + COLONY_NAMES,
-            key="c_colony",
-        )
+        c_colony = colony_picker("c")
 
         if c_colony != "(Not using colony)":
-            c_category = COLONY_MAP.get(c_colony, "G")
+            c_category = category_for(COLONY_MAP, c_colony)
             st.info(f"Detected Category from master list: **{c_category}**")
         else:
             c_category = st.selectbox(
@@ -1028,14 +1042,13 @@ with tab_dda:
             plinth_area_sqm, more_than_4_flag, usage_key
         )
 
-        duty_rate_govt = get_stampduty_rate(dda_owner, govt_value)
-        stamp_govt = govt_value * duty_rate_govt
-        mutation_govt = (
-            1136 if (usage_key == "residential" and govt_value > 5_000_000) else 1124
-        )
-        e_fees_govt = govt_value * 0.01 + mutation_govt
-        tds_govt = govt_value * 0.01 if govt_value > 5_000_000 else 0.0
-        total_govt = stamp_govt + e_fees_govt + tds_govt
+        dda_duty = duty_schedule_for(dda_owner, dda_usage_pretty)
+        duty_govt = dda_duty.breakdown(govt_value)
+        stamp_govt = duty_govt["stamp_duty"]
+        mutation_govt = duty_govt["mutation"]
+        e_fees_govt = duty_govt["e_fees"]
+        tds_govt = duty_govt["tds"]
+        total_govt = duty_govt["total"]
 
         log_event("dda_calc", f"Usage={usage_key}, GovtValue={govt_value}")
 
@@ -1067,14 +1080,11 @@ with tab_dda:
             st.write("### Govt Duty on Custom Value")
             custom_cons = dda_custom_cons
 
-            duty_rate_c = get_stampduty_rate(dda_owner, custom_cons)
-            stamp_c = custom_cons * duty_rate_c
-            mutation_c = (
-                1136 if (usage_key == "residential" and custom_cons > 5_000_000) else 1124
-            )
-            e_fees_c = custom_cons * 0.01 + mutation_c
-            tds_c = custom_cons * 0.01 if custom_cons > 5_000_000 else 0.0
-            total_c = stamp_c + e_fees_c + tds_c
+            duty_c = dda_duty.breakdown(custom_cons)
+            stamp_c = duty_c["stamp_duty"]
+            mutation_c = duty_c["mutation"]
+            e_fees_c = duty_c["e_fees"]
+            total_c = duty_c["total"]
 
             st.write(f"Consideration Value: ₹{custom_cons:,.2f}")
             st.write(f"Stamp: ₹{math.ceil(stamp_c):,}")
@@ -1097,36 +1107,38 @@ with tab_history:
     if st.session_state.user_id is None:
         st.error("Please sign in.")
     else:
-        resp = (
-            supabase.table("history")
-            .select(
-                "created_at, colony_name, property_type, category, "
-                "consideration, stamp_duty, e_fees, tds, total_govt_duty"
+        # Read here: session_state is not available on the call's thread
+        user_id = st.session_state.user_id
+        try:
+            rows = db_call(
+                lambda: get_storage().user_history(
+                    user_id,
+                    "created_at, colony_name, property_type, category, "
+                    "consideration, stamp_duty, e_fees, tds, total_govt_duty",
+                ),
+                name="load history",
             )
-            .eq("user_id", st.session_state.user_id)
-            .order("created_at", desc=True)
-            .execute()
-        )
-
-        rows = resp.data or []
-        if not rows:
-            st.info("No history saved.")
+        except BackendUnavailable as e:
+            st.warning(f"History is unavailable right now ({e}).")
         else:
-            df = pd.DataFrame(rows)
-            df = df.rename(
-                columns={
-                    "created_at": "Time",
-                    "colony_name": "Colony",
-                    "property_type": "Type",
-                    "category": "Category",
-                    "consideration": "Consideration (₹)",
-                    "stamp_duty": "Stamp Duty (₹)",
-                    "e_fees": "E-Fees (₹)",
-                    "tds": "TDS (₹)",
-                    "total_govt_duty": "Total Govt Duty (₹)",
-                }
-            )
-            st.dataframe(df, use_container_width=True)
+            if not rows:
+                st.info("No history saved.")
+            else:
+                df = pd.DataFrame(rows)
+                df = df.rename(
+                    columns={
+                        "created_at": "Time",
+                        "colony_name": "Colony",
+                        "property_type": "Type",
+                        "category": "Category",
+                        "consideration": "Consideration (₹)",
+                        "stamp_duty": "Stamp Duty (₹)",
+                        "e_fees": "E-Fees (₹)",
+                        "tds": "TDS (₹)",
+                        "total_govt_duty": "Total Govt Duty (₹)",
+                    }
+                )
+                st.dataframe(df, use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
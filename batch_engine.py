@@ -0,0 +1,408 @@
+# ================================================
+# batch_engine.py – Vectorized portfolio valuation
+# Column-array (NumPy) version of calc_engine._calc
+# ================================================
+
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from calc_engine import (
+    colony_rates,
+    stampdutyrates,
+    circlerates_res,
+    construction_rates_res,
+    circlerates_com,
+    construction_rates_com,
+    AREA_CATEGORY_RATES,
+    UNIFORM_RATES_MORE_THAN_4,
+)
+from duty_schedule import (
+    compile_schedule,
+    EXTRA_DUTY_THRESHOLD,
+    TDS_THRESHOLD,
+    E_FEE_RATE,
+    MUTATION_FEE,
+    MUTATION_FEE_ABOVE_50L,
+)
+
+# -------------------------------------------------
+# LOOKUP ARRAYS (indexed by category / owner code)
+# -------------------------------------------------
+
+CATEGORY_KEYS = tuple(circlerates_res.keys())
+OWNER_KEYS = tuple(stampdutyrates.keys())
+USAGE_KEYS = tuple(AREA_CATEGORY_RATES.keys())
+AREA_BAND_KEYS = ("upto_30", "30_50", "50_100", "above_100")
+
+# Unknown owners get a 0 base rate, same as stampdutyrates.get(owner, 0)
+OWNER_BASE_RATES = np.array([stampdutyrates[k] for k in OWNER_KEYS] + [0.0])
+
+# DutySchedule segments stacked per owner code: [owner, segment]
+STAMP_RATE_TABLE = np.array(
+    [compile_schedule(b).stamp_rates for b in OWNER_BASE_RATES.tolist()]
+)
+TDS_RATE_TABLE = np.array(compile_schedule(0.0).tds_rates)
+
+# Year bounds used by age_multiplier(): < 1960, <= 1969, ..., <= 2000
+AGE_MULTIPLIERS = np.array([0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
+
+
+def build_rate_arrays(circle, con):
+    """(circle, construction) rate dicts -> arrays in CATEGORY_KEYS order."""
+    return (
+        np.array([circle[k] for k in CATEGORY_KEYS], dtype=np.float64),
+        np.array([con[k] for k in CATEGORY_KEYS], dtype=np.float64),
+    )
+
+
+def rate_arrays(property_type):
+    """Return (circle, construction) rate arrays for a property type."""
+    if property_type == "Residential":
+        return build_rate_arrays(circlerates_res, construction_rates_res)
+    return build_rate_arrays(circlerates_com, construction_rates_com)
+
+
+@lru_cache(maxsize=4)
+def _override_table(rates):
+    return np.array(rates.table, dtype=np.float64).reshape(len(rates), 4)
+
+
+def colony_codes(colony_name, rows):
+    """Colony names -> row in EffectiveRates.table, -1 if not overridden."""
+    arr = np.asarray(colony_name)
+    if arr.ndim == 0:
+        return np.intp(rows.get(arr.item(), -1))
+    if arr.dtype.kind != "U":
+        # Object column with None for "no colony"; names are never blank
+        arr = np.array(["" if v is None else str(v) for v in arr.ravel()]).reshape(arr.shape)
+    # One dict lookup per distinct name, not per parcel
+    uniq, inverse = np.unique(arr, return_inverse=True)
+    lut = np.array([rows.get(k, -1) for k in uniq.tolist()], dtype=np.intp)
+    return lut[inverse].reshape(arr.shape)
+
+
+def with_colony_rates(property_type, circle, con, cat_code, colony_name):
+    """
+    (circle, construction, code) with colony overrides folded in.
+
+    The override rows of calc_engine.colony_rates() are appended to the
+    category arrays, so overriding colonies index past the categories
+    and every parcel still takes a single gather.
+    """
+    rates = colony_rates()
+    if colony_name is None or not len(rates):
+        return circle, con, cat_code
+    codes = colony_codes(colony_name, rates.rows)
+    if not (codes >= 0).any():
+        return circle, con, cat_code
+    table = _override_table(rates)
+    col = 0 if property_type == "Residential" else 2
+    return (
+        np.concatenate([circle, table[:, col]]),
+        np.concatenate([con, table[:, col + 1]]),
+        np.where(codes >= 0, len(circle) + codes, cat_code),
+    )
+
+
+def build_dda_rate_arrays(area_rates=None, uniform_rates=None):
+    """
+    DDA/CGHS tables -> (band_rates[usage, band], uniform_rates[usage]).
+    Defaults to AREA_CATEGORY_RATES / UNIFORM_RATES_MORE_THAN_4.
+    """
+    area_rates = area_rates or AREA_CATEGORY_RATES
+    uniform_rates = uniform_rates or UNIFORM_RATES_MORE_THAN_4
+    return (
+        np.array(
+            [[area_rates[u][b] for b in AREA_BAND_KEYS] for u in USAGE_KEYS],
+            dtype=np.float64,
+        ),
+        np.array([uniform_rates[u] for u in USAGE_KEYS], dtype=np.float64),
+    )
+
+
+# -------------------------------------------------
+# ARRAY HELPERS
+# -------------------------------------------------
+
+def encode(values, keys, missing=-1):
+    """
+    Map labels to integer codes (position in `keys`).
+
+    Integer arrays are treated as already-encoded. Unknown labels
+    get `missing`.
+
+    Category letters and owner types all start with a different
+    character, so for fixed-width str columns the first code unit picks
+    the candidate key via a lookup table and a single string compare
+    confirms it. That is several times cheaper than sorting/hashing the
+    column or comparing it against every key.
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iu":
+        return arr.astype(np.intp)
+
+    firsts = [ord(k[0]) for k in keys]
+    if arr.dtype.kind != "U" or len(set(firsts)) != len(keys):
+        codes = np.full(arr.shape, missing, dtype=np.intp)
+        for i, key in enumerate(keys):
+            codes[arr == key] = i
+        return codes
+
+    no_match = len(keys)
+    lut = np.full(max(firsts) + 2, no_match, dtype=np.intp)
+    lut[firsts] = np.arange(len(keys))
+
+    flat = np.ascontiguousarray(arr).reshape(-1)
+    width = flat.dtype.itemsize // 4
+    first_unit = flat.view(np.uint32)[::width]
+    cand = lut[np.minimum(first_unit, len(lut) - 1)]
+
+    labels = np.array(list(keys) + [""])
+    ok = (flat == labels[cand]) & (cand != no_match)
+    return np.where(ok, cand, missing).reshape(arr.shape)
+
+
+def yes_flags(values):
+    """'yes'/'no' column (or bools) -> boolean array."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "b":
+        return arr
+    return arr == "yes"
+
+
+def sq_yards_to_sq_meters(yards):
+    """
+    Vector form of convert_sq_yards_to_sq_meters: round(y * 0.8361, 2).
+
+    np.round works on the binary product, while Python's round() rounds
+    the exact decimal value, so the two can disagree right at a .5 tie.
+    Those (rare) rows are re-rounded with round() to stay bit-identical.
+    """
+    x = np.asarray(yards, dtype=np.float64) * 0.8361
+    scaled = x * 100.0
+    out = np.rint(scaled) / 100.0
+
+    frac = scaled - np.floor(scaled)
+    near_tie = np.abs(frac - 0.5) <= 2 * np.spacing(scaled)
+    if near_tie.any():
+        idx = np.flatnonzero(near_tie)
+        out.flat[idx] = [round(v, 2) for v in x.flat[idx].tolist()]
+    return out
+
+
+def age_band_array(year):
+    """Index into AGE_MULTIPLIERS for each construction year."""
+    year = np.asarray(year)
+    return (
+        (year >= 1960).astype(np.intp)
+        + (year > 1969)
+        + (year > 1979)
+        + (year > 1989)
+        + (year > 2000)
+    )
+
+
+def age_multiplier_array(year):
+    """Vector form of age_multiplier()."""
+    return AGE_MULTIPLIERS[age_band_array(year)]
+
+
+def duty_segment_array(val):
+    """DutySchedule.segment() for arrays: 0 / 1 / 2 around 25L and 50L."""
+    return (val > EXTRA_DUTY_THRESHOLD).astype(np.intp) + (val > TDS_THRESHOLD)
+
+
+def stampduty_rate_array(owner_code, val):
+    """Vector form of get_stampduty_rate() for encoded owners."""
+    return STAMP_RATE_TABLE[owner_code, duty_segment_array(val)]
+
+
+def duty_arrays(owner_code, val, mutation_above_50l=MUTATION_FEE_ABOVE_50L):
+    """
+    DutySchedule.breakdown() over a column with mixed buyer types.
+    `mutation_above_50l` may itself be a per-row array.
+    """
+    seg = duty_segment_array(val)
+    rate = STAMP_RATE_TABLE[owner_code, seg]
+    mutation = np.where(seg == 2, mutation_above_50l, MUTATION_FEE)
+    stamp = val * rate
+    e_fees = val * E_FEE_RATE + mutation
+    tds = val * TDS_RATE_TABLE[seg]
+    return {
+        "stamp_rate": rate,
+        "stamp_duty": stamp,
+        "mutation": mutation,
+        "e_fees": e_fees,
+        "tds": tds,
+        "total": stamp + e_fees + tds,
+    }
+
+
+def area_band_array(plinth_area_sqm):
+    """Vector form of determine_area_category(), as AREA_BAND_KEYS codes."""
+    sqm = np.asarray(plinth_area_sqm)
+    return (sqm > 30).astype(np.intp) + (sqm > 50) + (sqm > 100)
+
+
+# -------------------------------------------------
+# BATCH CALCULATION
+# -------------------------------------------------
+
+def calc_batch(
+    property_type,
+    land_area_yards,
+    category,
+    owner,
+    include_const="no",
+    parking="no",
+    total_storey=1,
+    user_storey=1,
+    constructed_area=0.0,
+    year_built=2000,
+    custom_cons=0,
+    colony_name=None,
+    rates=None,
+):
+    """
+    Value many parcels at once.
+
+    Every argument except `property_type` may be a scalar or a 1-D
+    column; scalars are broadcast. Returns a dict with the same keys
+    as _calc(), each holding one array entry per parcel, and the
+    numbers match _calc() row for row exactly.
+
+    `rates` optionally overrides the (circle, construction) arrays
+    from rate_arrays(property_type). Colonies with rate overrides
+    (calc_engine.set_colony_rates) take those instead, as in _calc().
+    """
+    land_area_yards = np.asarray(land_area_yards, dtype=np.float64)
+    total_storey = np.asarray(total_storey)
+    user_storey = np.asarray(user_storey)
+    constructed_area = np.asarray(constructed_area, dtype=np.float64)
+    year_built = np.asarray(year_built)
+    custom_cons = np.asarray(custom_cons)
+
+    cat_code = encode(category, CATEGORY_KEYS)
+    if (cat_code < 0).any():
+        bad = np.asarray(category).ravel()[np.flatnonzero(cat_code < 0)[0]]
+        raise KeyError(bad)
+    owner_code = encode(owner, OWNER_KEYS, missing=len(OWNER_KEYS))
+    with_const = yes_flags(include_const)
+    with_parking = yes_flags(parking)
+
+    n = np.broadcast_shapes(
+        land_area_yards.shape, cat_code.shape, owner_code.shape,
+        with_const.shape, with_parking.shape, total_storey.shape,
+        user_storey.shape, constructed_area.shape, year_built.shape,
+        custom_cons.shape, np.shape(colony_name),
+    )
+
+    circle, con = rates if rates is not None else rate_arrays(property_type)
+    circle, con, rate_code = with_colony_rates(
+        property_type, circle, con, cat_code, colony_name
+    )
+    circle_rate = circle[rate_code]
+    con_rate = con[rate_code]
+
+    land_m = sq_yards_to_sq_meters(land_area_yards)
+    land_total = circle_rate * land_m
+    land_user = land_total * (user_storey / total_storey)
+
+    area_m = sq_yards_to_sq_meters(constructed_area)
+    base_const = con_rate * area_m
+    construction_value = np.where(
+        with_const, base_const * age_multiplier_array(year_built) * user_storey, 0.0
+    )
+    parking_cost = np.where(
+        with_const & with_parking,
+        land_m * con_rate * user_storey / total_storey,
+        0.0,
+    )
+
+    auto_cons = land_user + construction_value + parking_cost
+    final = np.where(custom_cons > 0, custom_cons, auto_cons)
+
+    duty = duty_arrays(
+        owner_code,
+        final,
+        MUTATION_FEE_ABOVE_50L if property_type == "Residential" else MUTATION_FEE,
+    )
+    stamp_rate = duty["stamp_rate"]
+    stamp = duty["stamp_duty"]
+    mutation = duty["mutation"]
+    e = duty["e_fees"]
+    tds = duty["tds"]
+    total = duty["total"]
+
+    def column(values, dtype=None):
+        return np.broadcast_to(np.asarray(values, dtype=dtype), n)
+
+    return {
+        "timestamp": column(datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        "property_type": column(property_type),
+        "colony_name": column(colony_name, dtype=object),
+        "land_area_yards": column(land_area_yards),
+        "land_area_m": column(land_m),
+        "category": column(np.asarray(CATEGORY_KEYS)[cat_code]),
+        "owner": column(owner),
+        "include_const": column(include_const),
+        "parking": column(parking),
+        "total_storey": column(total_storey),
+        "user_storey": column(user_storey),
+        "constructed_area": column(constructed_area),
+        "year_built": column(year_built),
+        "auto_consideration": column(auto_cons),
+        "custom_consideration": column(custom_cons),
+        "final_consideration": column(final),
+        "stamp_rate": column(stamp_rate),
+        "stamp_duty": column(stamp),
+        "mutation": column(mutation),
+        "e_fees": column(e),
+        "tds": column(tds),
+        "total_payable": column(total),
+        "land_value_user": column(land_user),
+        "construction_value": column(construction_value),
+        "parking_cost": column(parking_cost),
+    }
+
+
+def dda_batch(area_yards, usage, more_than_4, owner, rates=None):
+    """
+    Vector form of the DDA / CGHS tab: minimum govt value plus duties.
+
+    `usage` is 'residential' / 'commercial', `more_than_4` a yes/no (or
+    bool) column. `rates` optionally overrides build_dda_rate_arrays().
+    """
+    usage_code = encode(usage, USAGE_KEYS)
+    if (usage_code < 0).any():
+        raise ValueError("Usage must be 'residential' or 'commercial'.")
+    owner_code = encode(owner, OWNER_KEYS, missing=len(OWNER_KEYS))
+    tall = yes_flags(more_than_4)
+    band_rates, uniform_rates = rates if rates is not None else build_dda_rate_arrays()
+
+    plinth_area_sqm = sq_yards_to_sq_meters(area_yards)
+    rate = np.where(
+        tall,
+        uniform_rates[usage_code],
+        band_rates[usage_code, area_band_array(plinth_area_sqm)],
+    )
+    value = plinth_area_sqm * rate
+
+    is_res = usage_code == USAGE_KEYS.index("residential")
+    duty = duty_arrays(
+        owner_code, value, np.where(is_res, MUTATION_FEE_ABOVE_50L, MUTATION_FEE)
+    )
+
+    return {
+        "plinth_area_sqm": plinth_area_sqm,
+        "rate_per_sqm": rate,
+        "govt_value": value,
+        "stamp_rate": duty["stamp_rate"],
+        "stamp_duty": duty["stamp_duty"],
+        "mutation": duty["mutation"],
+        "e_fees": duty["e_fees"],
+        "tds": duty["tds"],
+        "total_payable": duty["total"],
+    }
@@ -0,0 +1,179 @@
+# ================================================
+# benchmarks/bench_calculators.py – Hot paths at 1, 1k and 1M inputs
+# ================================================
+
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import calc_engine
+import commercial_code
+import database
+import dda_cghs_code
+import residential_code
+from colonies import build_colony_map, category_for, read_colonies_csv
+from conftest import ROOT, SIZES, calc_inputs, run, write_colonies_csv
+
+sizes = pytest.mark.parametrize("size", SIZES, ids=lambda n: f"n={n}")
+
+
+# -------------------------------------------------
+# CALC ENGINE
+# -------------------------------------------------
+
+@sizes
+def bench_calc(benchmark, size):
+    rows = calc_inputs(size)
+    calc = calc_engine._calc
+    run(benchmark, lambda: [calc(**r) for r in rows], size)
+
+
+@sizes
+def bench_dda_minimum_value(benchmark, size):
+    rng = random.Random(1)
+    rows = [
+        (rng.uniform(20, 200), rng.choice([True, False]),
+         rng.choice(["residential", "commercial"]))
+        for _ in range(size)
+    ]
+    fn = calc_engine.dda_minimum_value
+    run(benchmark, lambda: [fn(a, t, u) for a, t, u in rows], size)
+
+
+@sizes
+def bench_age_multiplier(benchmark, size):
+    rng = random.Random(2)
+    years = [rng.randint(1900, 2025) for _ in range(size)]
+    fn = calc_engine.age_multiplier
+    run(benchmark, lambda: [fn(y) for y in years], size)
+
+
+@sizes
+def bench_determine_area_category(benchmark, size):
+    rng = random.Random(3)
+    areas = [rng.uniform(10, 200) for _ in range(size)]
+    fn = calc_engine.determine_area_category
+    run(benchmark, lambda: [fn(a) for a in areas], size)
+
+
+# -------------------------------------------------
+# CLI CALCULATORS
+# -------------------------------------------------
+
+def cli_inputs(size):
+    return [
+        (r["land_area_yards"], r["category"], r["owner"], r["include_const"],
+         r["parking"], r["total_storey"], r["user_storey"],
+         r["constructed_area"], r["year_built"])
+        for r in calc_inputs(size)
+    ]
+
+
+@sizes
+def bench_calculate_residential(benchmark, size):
+    rows = cli_inputs(size)
+    fn = residential_code.calculate_residential
+    run(benchmark, lambda: [fn(*r) for r in rows], size)
+
+
+@sizes
+def bench_calculate_commercial(benchmark, size):
+    rows = cli_inputs(size)
+    fn = commercial_code.calculate_commercial
+    run(benchmark, lambda: [fn(*r) for r in rows], size)
+
+
+@sizes
+def bench_calculate_dda_cghs(benchmark, size):
+    rng = random.Random(4)
+    rows = [
+        (rng.uniform(20, 200), rng.choice(["residential", "commercial"]),
+         rng.choice([True, False]), rng.choice(["male", "female", "joint"]))
+        for _ in range(size)
+    ]
+    fn = dda_cghs_code.calculate_dda_cghs
+    run(benchmark, lambda: [fn(*r) for r in rows], size)
+
+
+# -------------------------------------------------
+# COLONIES
+# -------------------------------------------------
+
+IMPORT_ROUNDS = {1: 100, 1_000: 20, 1_000_000: 1}
+
+
+@sizes
+def bench_import_colonies_from_csv(benchmark, tmp_path, size):
+    # A fresh, empty table every round: re-importing into the same one
+    # would find nothing to write from round 2 on
+    csv_path = str(write_colonies_csv(tmp_path / "colonies.csv", size))
+
+    def empty_table():
+        conn = sqlite3.connect(":memory:")
+        database.ensure_colonies_schema(conn)
+        return (conn, csv_path), {}
+
+    summary = benchmark.pedantic(
+        database.import_colonies_from_csv,
+        setup=empty_table,
+        teardown=lambda conn, _: conn.close(),
+        rounds=IMPORT_ROUNDS[size],
+    )
+    assert summary["inserted"] == size
+
+
+def bench_reimport_unchanged_colonies(benchmark):
+    # The real master list, already in the table: should write nothing
+    csv_path = f"{ROOT}/colonies.csv"
+    conn = sqlite3.connect(":memory:")
+    database.ensure_colonies_schema(conn)
+    database.import_colonies_from_csv(conn, csv_path)
+    summary = benchmark(database.import_colonies_from_csv, conn, csv_path)
+    assert summary["inserted"] == summary["updated"] == summary["removed"] == 0
+    conn.close()
+
+
+@sizes
+def bench_colony_lookup(benchmark, size):
+    names, colony_map = build_colony_map(read_colonies_csv(f"{ROOT}/colonies.csv"))
+    rng = random.Random(5)
+    # ~10% misses fall back to the default category
+    queries = [
+        rng.choice(names) if rng.random() < 0.9 else "Unknown Colony"
+        for _ in range(size)
+    ]
+    run(benchmark, lambda: [category_for(colony_map, q) for q in queries], size)
+
+
+# -------------------------------------------------
+# APP
+# -------------------------------------------------
+
+# Bare `import app` outside `streamlit run`, on local SQLite: catches
+# import-time breakage and times the module-level start-up work
+APP_IMPORT = (
+    "import sys, streamlit as st; "
+    "st.secrets = {'STORAGE_BACKEND': 'sqlite', 'SQLITE_PATH': sys.argv[1]}; "
+    "import app"
+)
+
+
+def bench_app_import_headless(benchmark, tmp_path_factory):
+    pytest.importorskip("streamlit")
+    env = {**os.environ, "PYTHONPATH": ROOT}
+
+    def fresh_dir():
+        # No snapshot or queued writes left over from the last round
+        return (tmp_path_factory.mktemp("app"),), {}
+
+    def import_app(cwd):
+        subprocess.run(
+            [sys.executable, "-c", APP_IMPORT, str(cwd / "data.db")],
+            cwd=cwd, env=env, check=True, capture_output=True,
+        )
+
+    benchmark.pedantic(import_app, setup=fresh_dir, rounds=3)
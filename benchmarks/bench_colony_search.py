@@ -0,0 +1,115 @@
+# ================================================
+# benchmarks/bench_colony_search.py – Trigram index vs difflib scan,
+# prefix autocomplete, SQLite FTS5 vs LIKE
+# ================================================
+
+import difflib
+import random
+import sqlite3
+
+import pytest
+
+import database
+from colonies import read_colonies_csv
+from colony_search import PrefixIndex, TrigramIndex
+from conftest import ROOT
+
+# Misspellings / abbreviations users actually type
+QUERIES = (
+    "Lajpat Ngr",
+    "Saket Extension",
+    "greater kailash",
+    "Def Col",
+    "Rajouri gdn",
+    "Sarita Vihr",
+    "Green Park Extn",
+    "Pitampura",
+)
+
+
+@pytest.fixture(scope="module")
+def colony_rows():
+    return read_colonies_csv(f"{ROOT}/colonies.csv")
+
+
+@pytest.fixture(scope="module")
+def index(colony_rows):
+    return TrigramIndex(colony_rows)
+
+
+def bench_trigram_build(benchmark, colony_rows):
+    benchmark(TrigramIndex, colony_rows)
+
+
+def bench_trigram_search(benchmark, index):
+    results = benchmark(lambda: [index.search(q, k=10) for q in QUERIES])
+    assert results[0][0][0].endswith("Lajpat Nagar-I —")
+    # Budget: under 1 ms per query (no timings with --benchmark-disable)
+    if benchmark.enabled:
+        assert benchmark.stats.stats.mean / len(QUERIES) < 1e-3
+
+
+def bench_difflib_scan(benchmark, colony_rows):
+    names = [name for name, _ in colony_rows]
+    benchmark.pedantic(
+        lambda: [difflib.get_close_matches(q, names, n=10, cutoff=0.0) for q in QUERIES],
+        rounds=3,
+    )
+
+
+PREFIXES = ("laj", "A.B. Ex", "greater k", "def", "vasant", "s")
+
+
+def bench_prefix_complete(benchmark, colony_rows):
+    index = PrefixIndex(colony_rows)
+    benchmark.extra_info["memory_bytes"] = index.memory_bytes()
+    results = benchmark(lambda: [index.complete(p, n=10) for p in PREFIXES])
+    assert results[1] == [("AB Extn Colony", "F")]
+
+
+# -------------------------------------------------
+# SQLITE: FTS5 vs LIKE '%q%' on a 100k-row master
+# -------------------------------------------------
+
+FTS_ROWS = 100_000
+# Broad words (hundreds of hits), one exact row, one absent name
+WORD_QUERIES = ("lajpat", "greater kailash", "vihar extn", "42170", "no such colony")
+
+
+@pytest.fixture(scope="module")
+def colony_db(colony_rows, tmp_path_factory):
+    # Real names recombined: "<words of one> <words of another> <n>"
+    rng = random.Random(11)
+    words = [name.split() for name, _ in colony_rows]
+    rows = [
+        (
+            " ".join(rng.choice(words)[:2] + rng.choice(words)[-2:] + [str(i)]),
+            rng.choice("ABCDEFGH"),
+        )
+        for i in range(FTS_ROWS)
+    ]
+    conn = sqlite3.connect(tmp_path_factory.mktemp("fts") / "colonies.db")
+    if not database.ensure_colonies_schema(conn):
+        pytest.skip("SQLite built without FTS5")
+    conn.executemany("INSERT INTO colonies (colony_name, category) VALUES (?, ?);", rows)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def bench_fts_search(benchmark, colony_db):
+    results = benchmark(
+        lambda: [database.search_colonies(q, 10, colony_db) for q in WORD_QUERIES]
+    )
+    assert all(results[:4]) and not results[4]
+
+
+def bench_like_scan(benchmark, colony_db):
+    def like(q):
+        return colony_db.execute(
+            "SELECT colony_name, category FROM colonies "
+            "WHERE colony_name LIKE ? LIMIT 10;",
+            (f"%{q}%",),
+        ).fetchall()
+
+    benchmark.pedantic(lambda: [like(q) for q in WORD_QUERIES], rounds=5)
@@ -0,0 +1,123 @@
+# ================================================
+# benchmarks/bench_storage.py – Local SQLite storage backend
+# Batched vs row-at-a-time writes, the app's hot reads, and write
+# throughput under 16 concurrent sessions (pooled WAL vs connect per call)
+# ================================================
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+import database
+from storage import SqliteBackend
+
+EVENTS = 1_000
+
+
+def event_rows(n):
+    now = datetime(2024, 1, 1).isoformat()
+    return [
+        {"email": "guest", "event_type": "calculation_run", "details": f"run {i}", "created_at": now}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    db = SqliteBackend(str(tmp_path / "data.db"))
+    yield db
+    db.close()
+
+
+def bench_insert_events_batched(benchmark, backend):
+    rows = event_rows(EVENTS)
+    benchmark(backend.insert, "events", rows)
+
+
+def bench_insert_events_one_by_one(benchmark, backend):
+    rows = event_rows(EVENTS)
+    benchmark.pedantic(lambda: [backend.insert("events", r) for r in rows], rounds=3)
+
+
+def bench_colony_delta_check(benchmark, backend):
+    # What every app process runs each check interval when nothing changed
+    watermark = backend.colony_watermark()
+    rows = benchmark(lambda: backend.colony_rows(backend.colony_watermark()))
+    assert backend.colony_watermark() == watermark and len(rows) >= 1
+
+
+# -------------------------------------------------
+# CONCURRENT SESSIONS
+# -------------------------------------------------
+
+SESSIONS = 16
+WRITES_PER_SESSION = 50
+
+CALC_EVENT_SQL = (
+    "INSERT INTO calc_events (visitor_id, event_time, property_type, colony_name, "
+    "category, consideration, total_govt_duty) VALUES (?, ?, ?, ?, ?, ?, ?);"
+)
+
+
+def calc_event(session, i):
+    return (f"visitor-{session}", datetime(2024, 1, 1).isoformat(), "Residential",
+            f"Colony {i}", "C", 5_000_000.0, 350_000.0)
+
+
+def log_connect_per_call(path, row):
+    # What every helper did before the pool: fresh connection, default
+    # rollback journal, commit, close
+    conn = sqlite3.connect(path, timeout=database.BUSY_TIMEOUT)
+    conn.execute(CALC_EVENT_SQL, row)
+    conn.commit()
+    conn.close()
+
+
+def log_pooled(path, row):
+    with database.get_pool(path).connection() as conn, conn:
+        conn.execute(CALC_EVENT_SQL, row)
+
+
+def run_sessions(log, path):
+    def session(n):
+        for i in range(WRITES_PER_SESSION):
+            log(path, calc_event(n, i))
+
+    with ThreadPoolExecutor(SESSIONS) as pool:
+        list(pool.map(session, range(SESSIONS)))
+
+
+def count_events(path):
+    conn = sqlite3.connect(path)
+    (n,) = conn.execute("SELECT COUNT(*) FROM calc_events;").fetchone()
+    conn.close()
+    return n
+
+
+@pytest.fixture
+def calc_db(tmp_path):
+    path = str(tmp_path / "data.db")
+    database.init_db(path)
+    yield path
+    database.get_pool(path).close()
+
+
+@pytest.mark.parametrize("mode", ["connect_per_call", "pooled_wal"])
+def bench_concurrent_session_writes(benchmark, calc_db, mode):
+    if mode == "connect_per_call":
+        conn = sqlite3.connect(calc_db)
+        conn.execute("PRAGMA journal_mode=DELETE;")  # init_db() left it in WAL
+        conn.close()
+        log = log_connect_per_call
+    else:
+        log = log_pooled
+
+    # --benchmark-disable runs the target once and records no stats
+    rounds = 3 if benchmark.enabled else 1
+    benchmark.pedantic(run_sessions, args=(log, calc_db), rounds=rounds)
+    writes = SESSIONS * WRITES_PER_SESSION
+    assert count_events(calc_db) == writes * rounds
+    if benchmark.enabled:
+        benchmark.extra_info["writes_per_sec"] = round(writes / benchmark.stats.stats.mean)
@@ -0,0 +1,128 @@
+# ================================================
+# benchmarks/cold_start.py – Time to first render in a fresh process
+# The app's colony start path, without and with a snapshot
+#
+#   python -m benchmarks.cold_start [--runs 5] [--latency-ms 150]
+#
+# Each run is a new interpreter, so module imports are included as on
+# a fresh Streamlit worker. The clock stops when the page could render:
+# colony cache caught up (colony_cache.catch_up), names / category map,
+# effective rates and trigram index built. "caught up" is when the
+# background refresh started from a snapshot has finished too.
+#
+# With SUPABASE_URL / SUPABASE_KEY set the table is the live one;
+# otherwise a local SQLite copy of colonies.csv stands in, with
+# --latency-ms added to every query as the network round trip.
+# ================================================
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# pandas / numpy are imported by app.py either way, so they load
+# before the clock starts
+PRELUDE = """
+import os, time
+import numpy as np
+import pandas as pd
+t = time.perf_counter()
+"""
+
+START = PRELUDE + """
+from benchmarks.cold_start import open_backend
+from calc_engine import EffectiveRates, set_colony_rates
+from colonies import build_colony_map
+from colony_cache import catch_up, open_colony_cache
+from colony_search import TrigramIndex
+
+backend = open_backend({db_path!r})
+
+def over_network(fn):
+    def call(*args):
+        time.sleep({latency})
+        return fn(*args)
+    return call
+
+cache = open_colony_cache(
+    over_network(backend.colony_rows), over_network(backend.colony_watermark), {snapshot!r}
+)
+refresh = catch_up(cache)
+names, colony_map = build_colony_map(sorted(cache.rows()))
+set_colony_rates(EffectiveRates(cache.records()))
+index = TrigramIndex(tuple(colony_map.items()))
+first_render = time.perf_counter() - t
+if refresh is not None:
+    refresh.join()
+print(first_render, time.perf_counter() - t)
+"""
+
+
+def open_backend(db_path):
+    """Live Supabase table when configured, else local SQLite at `db_path`."""
+    if os.environ.get("SUPABASE_URL"):
+        from storage import SupabaseBackend
+
+        return SupabaseBackend(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    from storage import SqliteBackend
+
+    return SqliteBackend(db_path)  # init_db() imports colonies.csv
+
+
+def run(code, runs):
+    first, done = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+            text=True, check=True,
+        )
+        a, b = out.stdout.strip().splitlines()[-1].split()
+        first.append(float(a))
+        done.append(float(b))
+    return statistics.median(first), statistics.median(done)
+
+
+def main(runs, latency_ms):
+    sys.path.insert(0, ROOT)
+    from colonies import read_colonies_csv
+    from colony_snapshot import build_snapshot
+
+    live = bool(os.environ.get("SUPABASE_URL"))
+    latency = 0.0 if live else latency_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "data.db")
+        backend = open_backend(db_path)
+        csv_snap = os.path.join(tmp, "csv.snap")
+        build_snapshot(read_colonies_csv(os.path.join(ROOT, "colonies.csv")), csv_snap)
+        db_snap = os.path.join(tmp, "db.snap")
+        build_snapshot(backend.colony_rows(None), db_snap)  # rows carry updated_at
+        backend.close()
+
+        cases = (
+            ("no snapshot: full table", os.path.join(tmp, "missing.snap")),
+            ("CSV snapshot (no watermark)", csv_snap),
+            ("table snapshot (watermark)", db_snap),
+        )
+        results = [
+            (label, run(START.format(db_path=db_path, latency=latency, snapshot=path), runs))
+            for label, path in cases
+        ]
+
+    source = "Supabase" if live else f"local SQLite, {latency_ms:g} ms per query"
+    print(f"colony start path, median of {runs} fresh processes ({source})")
+    print(f"  {'':<30} {'first render':>14} {'caught up':>12}")
+    for label, (first, done) in results:
+        print(f"  {label:<30} {first * 1000:11.1f} ms {done * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Colony cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=150.0,
+                        help="simulated round trip per query without Supabase")
+    args = parser.parse_args()
+    main(args.runs, args.latency_ms)
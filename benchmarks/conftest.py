@@ -0,0 +1,81 @@
+# ================================================
+# benchmarks/conftest.py – Offline fixtures for the benchmark suite
+# Storage cases use the local SQLite backend, no Supabase needed
+# ================================================
+
+import csv
+import glob
+import os
+import random
+import sys
+import warnings
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = (1, 1_000, 1_000_000)
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", ".baselines")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Regressions fail against the stored baseline, but a machine that has
+    # none yet (other OS / Python) should record one, not error out.
+    compare = config.option.benchmark_compare
+    if not compare or compare is True:
+        return
+    pattern = os.path.join(BASELINE_DIR, get_machine_id(), f"{compare}_*.json")
+    if not glob.glob(pattern):
+        warnings.warn(
+            f"No benchmark baseline {compare} for {get_machine_id()}; "
+            "record one with --benchmark-save=baseline."
+        )
+        config.option.benchmark_compare = []
+        config.option.benchmark_compare_fail = None
+
+
+# -------------------------------------------------
+# INPUT GENERATORS (deterministic)
+# -------------------------------------------------
+
+def calc_inputs(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        total = rng.randint(1, 4)
+        rows.append(
+            dict(
+                property_type=rng.choice(["Residential", "Commercial"]),
+                land_area_yards=round(rng.uniform(25, 500), 1),
+                category=rng.choice("ABCDEFGH"),
+                owner=rng.choice(["male", "female", "joint"]),
+                include_const=rng.choice(["yes", "no"]),
+                parking=rng.choice(["yes", "no"]),
+                total_storey=total,
+                user_storey=rng.randint(1, total),
+                constructed_area=round(rng.uniform(25, 500), 1),
+                year_built=rng.randint(1950, 2024),
+                custom_cons=0,
+            )
+        )
+    return rows
+
+
+def write_colonies_csv(path, n, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["colony_name", "category"])
+        for i in range(n):
+            writer.writerow([f"Colony {i} Extn", rng.choice("ABCDEFGH")])
+    return path
+
+
+def run(benchmark, fn, size):
+    """1M-input cases run once per round and for few rounds."""
+    if size >= 1_000_000:
+        return benchmark.pedantic(fn, rounds=1, iterations=1, warmup_rounds=0)
+    return benchmark(fn)
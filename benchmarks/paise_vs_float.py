@@ -0,0 +1,59 @@
+# ================================================
+# benchmarks/paise_vs_float.py – Integer-paise mode vs float path
+#
+#   python -m benchmarks.paise_vs_float --rows 1000000
+# ================================================
+
+import argparse
+import time
+
+import numpy as np
+
+import batch_engine
+from calc_engine import _calc
+from fixed_point import calc_paise, calc_batch_paise
+from parallel_engine import synthetic_columns
+
+SCALAR_ROWS = 20_000
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(rows):
+    cols = synthetic_columns(rows)
+
+    float_s = timed(lambda: batch_engine.calc_batch("Residential", **cols))
+    paise_s = timed(lambda: calc_batch_paise("Residential", **cols))
+
+    n = min(rows, SCALAR_ROWS)
+    inputs = [{k: cols[k][i].item() for k in cols} for i in range(n)]
+    float_1 = timed(lambda: [_calc("Residential", **kw) for kw in inputs], 1)
+    paise_1 = timed(lambda: [calc_paise("Residential", **kw) for kw in inputs], 1)
+
+    f = batch_engine.calc_batch("Residential", **cols)["total_payable"]
+    p = calc_batch_paise("Residential", **cols)["total_payable"]
+    diff = np.abs(p - f * 100)
+
+    print(f"batch, {rows:,} rows")
+    print(f"  float64 calc_batch      {rows / float_s:14,.0f} rows/sec")
+    print(f"  int64 calc_batch_paise  {rows / paise_s:14,.0f} rows/sec")
+    print(f"scalar, {n:,} calls")
+    print(f"  float _calc             {n / float_1:14,.0f} calls/sec")
+    print(f"  int calc_paise          {n / paise_1:14,.0f} calls/sec")
+    print(
+        f"total_payable vs float: median {np.median(diff):.2f} paise, "
+        f"max {diff.max():,.2f} paise, {np.mean(diff > 2):.4%} rows > 2 paise"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paise mode vs float benchmark.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,70 @@
+# ================================================
+# benchmarks/result_memory.py – Bytes per stored result
+# _calc() dicts vs QuoteResult records vs ResultBatch columns
+#
+#   python -m benchmarks.result_memory --rows 100000
+# ================================================
+
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+
+import batch_engine
+from calc_engine import _calc
+from parallel_engine import synthetic_columns
+from results import QuoteResult, ResultBatch
+
+
+def measure(build):
+    """(object, bytes allocated while building it and still alive)."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def scalar_inputs(cols, rows):
+    keys = list(cols)
+    for i in range(rows):
+        row = {k: cols[k][i].item() for k in keys}
+        yield dict(property_type="Residential", colony_name=None, **row)
+
+
+def main(rows):
+    cols = synthetic_columns(rows)
+    inputs = list(scalar_inputs(cols, rows))
+
+    dicts, dict_bytes = measure(lambda: [_calc(**kw) for kw in inputs])
+    records, record_bytes = measure(
+        lambda: [QuoteResult.from_dict(_calc(**kw)) for kw in inputs]
+    )
+    batch, batch_bytes = measure(
+        lambda: ResultBatch(
+            {
+                k: np.ascontiguousarray(v)
+                for k, v in batch_engine.calc_batch("Residential", **cols).items()
+            }
+        )
+    )
+
+    assert records[0].to_dict().keys() == dicts[0].keys()
+    assert len(batch) == len(dicts)
+
+    print(f"{rows:,} results, tracemalloc bytes incl. values")
+    for label, size in (
+        ("list of _calc() dicts", dict_bytes),
+        ("list of QuoteResult", record_bytes),
+        ("ResultBatch (columnar)", batch_bytes),
+    ):
+        print(f"  {label:<24} {size / rows:8.1f} bytes/result")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Result container memory benchmark.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,230 @@
+# bulk_cli.py
+#
+# Non-interactive, streaming mode shared by the CLI calculators
+# (residential_code / commercial_code / dda_cghs_code).
+#
+#   python residential_code.py parcels.csv -o results.csv --rejects bad.jsonl
+#   cat parcels.jsonl | python dda_cghs_code.py - --format jsonl
+#
+# Input is read one record at a time and every result is written as soon
+# as it is computed, so memory stays flat no matter how big the file is.
+# Rows that fail validation go to the reject stream instead of aborting.
+
+import argparse
+import csv
+import json
+import sys
+
+from colonies import load_colony_index
+
+FORMATS = ("csv", "jsonl")
+
+# Same errors the interactive loops treat as "invalid input"
+ROW_ERRORS = (ValueError, KeyError, TypeError)
+
+# ----------------- FIELD HELPERS -----------------
+
+
+def text_field(row: dict, key: str, default: str | None = None) -> str:
+    """Stripped, lower-cased text value; `default` when missing/blank."""
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        if default is None:
+            raise KeyError(key)
+        return default
+    return str(value).strip().lower()
+
+
+def float_field(row: dict, key: str, default: float | None = None) -> float:
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        if default is None:
+            raise KeyError(key)
+        return default
+    return float(value)
+
+
+def int_field(row: dict, key: str, default: int | None = None) -> int:
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        if default is None:
+            raise KeyError(key)
+        return default
+    return int(value)
+
+
+def optional_field(row: dict, key: str, cast):
+    """`cast(value)` or None when the column is missing/blank."""
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        return None
+    return cast(value)
+
+
+def category_field(row: dict) -> str:
+    """
+    `category` column; when blank, the category of the colony named in
+    the `colony` column (any spelling / alias the ColonyIndex knows).
+    """
+    if optional_field(row, "category", str) is not None:
+        return text_field(row, "category")
+    colony = optional_field(row, "colony", str)
+    if colony is None:
+        raise KeyError("category")
+    try:
+        index = load_colony_index()
+    except OSError as e:
+        raise ValueError(f"colony list unavailable: {e}") from e
+    record = index.resolve(colony)
+    if record is None:
+        raise KeyError(f"unknown or ambiguous colony {colony.strip()!r}")
+    return record[1].lower()
+
+
+# ----------------- READERS / WRITERS -----------------
+
+
+def detect_format(path: str, explicit: str | None = None) -> str:
+    if explicit:
+        return explicit
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+def iter_records(stream, fmt: str):
+    """
+    Yield (record_no, row, error) lazily.
+
+    `row` is a dict on success. For undecodable input `row` is the raw
+    text and `error` explains why, so the caller can reject it.
+    """
+    if fmt == "jsonl":
+        for n, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield n, line.rstrip("\r\n"), f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield n, row, "Expected a JSON object per line."
+                continue
+            yield n, row, None
+    else:
+        reader = csv.DictReader(stream)
+        for n, row in enumerate(reader, start=1):
+            if None in row:
+                extra = row.pop(None)
+                yield n, row, f"Too many columns: {extra!r}"
+                continue
+            yield n, row, None
+
+
+class ResultWriter:
+    """Writes one output row per call; CSV header is emitted on first row."""
+
+    def __init__(self, stream, fmt: str, fields: list[str]):
+        self.stream = stream
+        self.fmt = fmt
+        self.fields = ["record"] + list(fields)
+        self._csv = None
+
+    def write(self, record_no: int, result: dict):
+        row = {"record": record_no, **result}
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps(row, default=str) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(
+                self.stream, fieldnames=self.fields, extrasaction="ignore"
+            )
+            self._csv.writeheader()
+        self._csv.writerow(row)
+
+
+def write_reject(stream, record_no: int, row, error: str):
+    """Rejects are always JSON lines: the raw row may not fit any header."""
+    stream.write(
+        json.dumps({"record": record_no, "error": error, "row": row}, default=str)
+        + "\n"
+    )
+
+
+# ----------------- DRIVER -----------------
+
+
+def stream_valuations(records, value_row, writer: ResultWriter, rejects):
+    """
+    Run `value_row` over (record_no, row, error) tuples.
+    Returns (valued, rejected) counts.
+    """
+    valued = rejected = 0
+    for record_no, row, error in records:
+        if error is None:
+            try:
+                result = value_row(row)
+            except ROW_ERRORS as e:
+                error = f"{type(e).__name__}: {e}"
+        if error is not None:
+            write_reject(rejects, record_no, row, error)
+            rejected += 1
+            continue
+        writer.write(record_no, result)
+        valued += 1
+    return valued, rejected
+
+
+def _open(path: str, mode: str, default):
+    if path == "-":
+        return default, False
+    return open(path, mode, newline="", encoding="utf-8"), True
+
+
+def main(argv, value_row, result_fields, description: str) -> int:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("input", help="CSV/JSONL file of parcels, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="where to write results (default: stdout)")
+    parser.add_argument("--rejects", default="-",
+                        help="where to write rejected rows as JSONL (default: stderr)")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="input format (default: from file extension, else csv)")
+    parser.add_argument("--output-format", choices=FORMATS,
+                        help="output format (default: same as input)")
+    args = parser.parse_args(argv)
+
+    in_fmt = detect_format(args.input, args.format)
+    out_fmt = args.output_format or in_fmt
+
+    # Build the colony index before the first row, not in the middle of
+    # the stream; without the master list only `colony` lookups fail
+    try:
+        index = load_colony_index()
+    except OSError as e:
+        print(f"Colony list unavailable ({e}); rows without a category "
+              "will be rejected.", file=sys.stderr)
+    else:
+        if index.conflicts:
+            print(f"{len(index.conflicts)} ambiguous colony names; rows naming "
+                  f"them without a category will be rejected:\n"
+                  f"{index.conflict_report()}", file=sys.stderr)
+
+    src, close_src = _open(args.input, "r", sys.stdin)
+    out, close_out = _open(args.output, "w", sys.stdout)
+    rej, close_rej = _open(args.rejects, "w", sys.stderr)
+    try:
+        writer = ResultWriter(out, out_fmt, result_fields)
+        valued, rejected = stream_valuations(
+            iter_records(src, in_fmt), value_row, writer, rej
+        )
+    finally:
+        for stream, close in ((src, close_src), (out, close_out), (rej, close_rej)):
+            if close:
+                stream.close()
+            else:
+                stream.flush()
+
+    print(f"Valued {valued} rows, rejected {rejected}.", file=sys.stderr)
+    return 0
@@ -0,0 +1,407 @@
+# ================================================
+# calc_engine.py – Rate tables & scalar calculation
+# Pure math shared by app.py and the batch tools
+# (no Streamlit / Supabase imports here)
+# ================================================
+
+import time
+
+from colonies import parse_colony_row
+from duty_schedule import compile_schedule, E_FEE_RATE, MUTATION_FEE, MUTATION_FEE_ABOVE_50L
+
+# -------------------------------------------------
+# RATE TABLES
+# -------------------------------------------------
+
+stampdutyrates = {"male": 0.06, "female": 0.04, "joint": 0.05}
+
+# Residential circle & construction rates
+circlerates_res = {
+    "A": 774000,
+    "B": 245520,
+    "C": 159840,
+    "D": 127680,
+    "E": 70080,
+    "F": 56640,
+    "G": 46200,
+    "H": 23280,
+}
+construction_rates_res = {
+    "A": 21960,
+    "B": 17400,
+    "C": 13920,
+    "D": 11160,
+    "E": 9360,
+    "F": 8220,
+    "G": 6960,
+    "H": 3480,
+}
+
+# Commercial circle & construction rates
+circlerates_com = {k: v * 3 for k, v in circlerates_res.items()}
+construction_rates_com = {
+    "A": 25200,
+    "B": 19920,
+    "C": 15960,
+    "D": 12840,
+    "E": 10800,
+    "F": 9480,
+    "G": 8040,
+    "H": 3960,
+}
+
+# DDA / CGHS built-up rates (per sq. mtr.)
+AREA_CATEGORY_RATES = {
+    "residential": {
+        "upto_30": 50400,
+        "30_50": 54480,
+        "50_100": 66240,
+        "above_100": 76200,
+    },
+    "commercial": {
+        "upto_30": 57840,
+        "30_50": 62520,
+        "50_100": 75960,
+        "above_100": 87360,
+    },
+}
+UNIFORM_RATES_MORE_THAN_4 = {
+    "residential": 87840,
+    "commercial": 100800,
+}
+
+# Per-colony overrides set in admin_app (colonies table columns), in
+# EffectiveRates.table column order. Blank / 0 means "use the category".
+COLONY_RATE_COLUMNS = ("res_land_rate", "res_const_rate", "com_land_rate", "com_const_rate")
+
+# -------------------------------------------------
+# COLONY RATE OVERRIDES
+# -------------------------------------------------
+
+def _override(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None  # NaN > 0 is False too
+
+class EffectiveRates:
+    """
+    Circle / construction rates of the colonies that override them.
+
+    Built once per colony list: `table` holds one (res land, res const,
+    com land, com const) tuple per overriding colony, with blank
+    columns already filled from the colony's category, and `rows` maps
+    the colony name to its tuple. A calculation then costs one dict
+    lookup and one index, with no per-column None checks. Colonies
+    without overrides are not stored and use the category tables.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = {}
+        self.table = []
+        for row in rows:
+            parsed = parse_colony_row(row)
+            if parsed is None or parsed[1] not in circlerates_res:
+                continue
+            overrides = [_override(row.get(col)) for col in COLONY_RATE_COLUMNS]
+            if not any(overrides):
+                continue
+            name, cat = parsed
+            base = (
+                circlerates_res[cat],
+                construction_rates_res[cat],
+                circlerates_com[cat],
+                construction_rates_com[cat],
+            )
+            self.rows[name] = len(self.table)
+            self.table.append(
+                tuple(b if o is None else o for o, b in zip(overrides, base))
+            )
+        self.fingerprint = hash((tuple(self.rows.items()), tuple(self.table)))
+
+    def __len__(self):
+        return len(self.table)
+
+def _rate_pairs(circle, con, rates, col):
+    """({category: (circle, con)}, {overriding colony: (circle, con)})"""
+    return (
+        {cat: (circle[cat], con[cat]) for cat in circle},
+        {name: (rates.table[i][col], rates.table[i][col + 1]) for name, i in rates.rows.items()},
+    )
+
+def set_colony_rates(rates: EffectiveRates):
+    """
+    Make `rates` the overrides used by _calc() and calc_batch().
+
+    Also precomputes the (circle, construction) pairs _calc() looks
+    up, so edits to the category tables take effect from the next
+    set_colony_rates() call.
+    """
+    global _colony_rates, _res_pairs, _com_pairs
+    _colony_rates = rates
+    _res_pairs = _rate_pairs(circlerates_res, construction_rates_res, rates, 0)
+    _com_pairs = _rate_pairs(circlerates_com, construction_rates_com, rates, 2)
+
+def colony_rates() -> EffectiveRates:
+    return _colony_rates
+
+def reload_rate_tables():
+    """Rebuild _calc()'s rate pairs after the category tables were edited in place."""
+    set_colony_rates(_colony_rates)
+
+set_colony_rates(EffectiveRates())
+
+# -------------------------------------------------
+# CALC HELPERS
+# -------------------------------------------------
+
+def convert_sq_yards_to_sq_meters(y):
+    return round(y * 0.8361, 2)
+
+def age_multiplier(year):
+    if year < 1960:
+        return 0.5
+    if year <= 1969:
+        return 0.6
+    if year <= 1979:
+        return 0.7
+    if year <= 1989:
+        return 0.8
+    if year <= 2000:
+        return 0.9
+    return 1.0
+
+def get_stampduty_rate(owner, val):
+    base = stampdutyrates.get(owner, 0)
+    return base + 0.01 if val > 2_500_000 else base
+
+def duty_schedule_for(owner, property_type="Residential"):
+    """
+    Compiled duty schedule for a buyer. Higher mutation above 50L
+    applies to residential property only.
+    """
+    return compile_schedule(
+        stampdutyrates.get(owner, 0),
+        MUTATION_FEE_ABOVE_50L if property_type == "Residential" else MUTATION_FEE,
+    )
+
+_last_stamp = (None, "")
+
+def _timestamp():
+    """Local time as "YYYY-mm-dd HH:MM:SS", formatted once per second."""
+    global _last_stamp
+    sec = int(time.time())
+    if sec != _last_stamp[0]:
+        _last_stamp = (sec, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec)))
+    return _last_stamp[1]
+
+def determine_area_category(plinth_area_sqm: float) -> str:
+    if plinth_area_sqm <= 30:
+        return "upto_30"
+    elif plinth_area_sqm <= 50:
+        return "30_50"
+    elif plinth_area_sqm <= 100:
+        return "50_100"
+    return "above_100"
+
+def dda_minimum_value(plinth_area_sqm, building_more_than_4_storeys, usage):
+    usage = usage.lower()
+    if usage not in AREA_CATEGORY_RATES:
+        raise ValueError("Usage must be 'residential' or 'commercial'.")
+
+    if building_more_than_4_storeys:
+        rate = UNIFORM_RATES_MORE_THAN_4[usage]
+    else:
+        cat = determine_area_category(plinth_area_sqm)
+        rate = AREA_CATEGORY_RATES[usage][cat]
+
+    value = plinth_area_sqm * rate
+    return rate, value
+
+# -------------------------------------------------
+# CALCULATION STAGES
+# -------------------------------------------------
+# The calculation as a chain of stages, for staged_calc.py. Each
+# stage's parameters are its dependencies: raw inputs, or outputs of
+# an earlier stage. _calc() inlines the same math.
+
+def rate_pair(property_type, category, colony_name=None):
+    """(circle rate, construction rate): the colony's override, else the category's."""
+    categories, overrides = _res_pairs if property_type == "Residential" else _com_pairs
+    return overrides.get(colony_name) or categories[category]
+
+def rate_stage(property_type, category, colony_name):
+    circle_rate, con_rate = rate_pair(property_type, category, colony_name)
+    return {"circle_rate": circle_rate, "con_rate": con_rate}
+
+def land_stage(land_area_yards, circle_rate, total_storey, user_storey):
+    land_m = convert_sq_yards_to_sq_meters(land_area_yards)
+    land_total = circle_rate * land_m
+    return {
+        "land_area_m": land_m,
+        "land_value_user": land_total * (user_storey / total_storey),
+    }
+
+def construction_stage(
+    con_rate,
+    include_const,
+    parking,
+    constructed_area,
+    year_built,
+    total_storey,
+    user_storey,
+    land_area_m,
+):
+    construction_value = 0.0
+    parking_cost = 0.0
+
+    if include_const == "yes":
+        area_m = convert_sq_yards_to_sq_meters(constructed_area)
+        base_const = con_rate * area_m
+        construction_value = base_const * age_multiplier(year_built) * user_storey
+
+        if parking == "yes":
+            parking_cost = land_area_m * con_rate * user_storey / total_storey
+
+    return {"construction_value": construction_value, "parking_cost": parking_cost}
+
+def consideration_stage(land_value_user, construction_value, parking_cost, custom_cons):
+    auto_cons = land_value_user + construction_value + parking_cost
+
+    if custom_cons > 0:
+        final = custom_cons
+    else:
+        final = auto_cons
+
+    return {"auto_consideration": auto_cons, "final_consideration": final}
+
+def duty_stage(property_type, owner, final_consideration):
+    duty = duty_schedule_for(owner, property_type).breakdown(final_consideration)
+    return {
+        "stamp_rate": duty["stamp_rate"],
+        "stamp_duty": duty["stamp_duty"],
+        "mutation": duty["mutation"],
+        "e_fees": duty["e_fees"],
+        "tds": duty["tds"],
+        "total_payable": duty["total"],
+    }
+
+CALC_STAGES = (
+    ("rates", rate_stage),
+    ("land", land_stage),
+    ("construction", construction_stage),
+    ("consideration", consideration_stage),
+    ("duty", duty_stage),
+)
+
+def stage_inputs(fn):
+    """Names a stage function reads (its dependencies)."""
+    code = fn.__code__
+    return code.co_varnames[: code.co_argcount]
+
+def assemble_result(inputs, values, timestamp=None):
+    """_calc()'s result dict from the raw inputs and all stage outputs."""
+    return {
+        "timestamp": timestamp or _timestamp(),
+        "property_type": inputs["property_type"],
+        "colony_name": inputs.get("colony_name"),
+        "land_area_yards": inputs["land_area_yards"],
+        "land_area_m": values["land_area_m"],
+        "category": inputs["category"],
+        "owner": inputs["owner"],
+        "include_const": inputs["include_const"],
+        "parking": inputs["parking"],
+        "total_storey": inputs["total_storey"],
+        "user_storey": inputs["user_storey"],
+        "constructed_area": inputs["constructed_area"],
+        "year_built": inputs["year_built"],
+        "auto_consideration": values["auto_consideration"],
+        "custom_consideration": inputs["custom_cons"],
+        "final_consideration": values["final_consideration"],
+        "stamp_rate": values["stamp_rate"],
+        "stamp_duty": values["stamp_duty"],
+        "mutation": values["mutation"],
+        "e_fees": values["e_fees"],
+        "tds": values["tds"],
+        "total_payable": values["total_payable"],
+        "land_value_user": values["land_value_user"],
+        "construction_value": values["construction_value"],
+        "parking_cost": values["parking_cost"],
+    }
+
+# -------------------------------------------------
+# MAIN CALCULATION
+# -------------------------------------------------
+
+def _calc(
+    property_type,
+    land_area_yards,
+    category,
+    owner,
+    include_const,
+    parking,
+    total_storey,
+    user_storey,
+    constructed_area,
+    year_built,
+    custom_cons,
+    colony_name=None,
+):
+    # Flat on purpose: this is the hot path behind every quote, and
+    # chaining the stage functions' dicts costs ~45%. Keep the math in
+    # step with the stages above (tests/test_staged_calc.py checks).
+    categories, overrides = _res_pairs if property_type == "Residential" else _com_pairs
+    circle_rate, con_rate = overrides.get(colony_name) or categories[category]
+
+    land_m = convert_sq_yards_to_sq_meters(land_area_yards)
+    land_total = circle_rate * land_m
+    land_user = land_total * (user_storey / total_storey)
+
+    construction_value = 0.0
+    parking_cost = 0.0
+    if include_const == "yes":
+        area_m = convert_sq_yards_to_sq_meters(constructed_area)
+        base_const = con_rate * area_m
+        construction_value = base_const * age_multiplier(year_built) * user_storey
+        if parking == "yes":
+            parking_cost = land_m * con_rate * user_storey / total_storey
+
+    auto_cons = land_user + construction_value + parking_cost
+    final = custom_cons if custom_cons > 0 else auto_cons
+
+    schedule = duty_schedule_for(owner, property_type)
+    seg = schedule.segment(final)
+    stamp_rate = schedule.stamp_rates[seg]
+    mutation = schedule.mutations[seg]
+    stamp = final * stamp_rate
+    e = final * E_FEE_RATE + mutation
+    tds = final * schedule.tds_rates[seg]
+
+    return {
+        "timestamp": _timestamp(),
+        "property_type": property_type,
+        "colony_name": colony_name,
+        "land_area_yards": land_area_yards,
+        "land_area_m": land_m,
+        "category": category,
+        "owner": owner,
+        "include_const": include_const,
+        "parking": parking,
+        "total_storey": total_storey,
+        "user_storey": user_storey,
+        "constructed_area": constructed_area,
+        "year_built": year_built,
+        "auto_consideration": auto_cons,
+        "custom_consideration": custom_cons,
+        "final_consideration": final,
+        "stamp_rate": stamp_rate,
+        "stamp_duty": stamp,
+        "mutation": mutation,
+        "e_fees": e,
+        "tds": tds,
+        "total_payable": stamp + e + tds,
+        "land_value_user": land_user,
+        "construction_value": construction_value,
+        "parking_cost": parking_cost,
+    }
@@ -0,0 +1,213 @@
+# ================================================
+# colonies.py – Colony master list helpers
+# Parsing, name normalization and category lookup shared by app.py,
+# database.py and the bulk CLIs
+# ================================================
+
+import csv
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+DEFAULT_CATEGORY = "G"  # used when a colony is not in the master list
+
+# Shipped next to this module, so lookups work from any working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+COLONIES_CSV = os.path.join(HERE, "colonies.csv")
+ALIASES_CSV = os.path.join(HERE, "colony_aliases.csv")
+
+# Common spellings in the master list / user queries -> one form
+ABBREVIATIONS = {
+    "ngr": "nagar",
+    "extn": "extension",
+    "ext": "extension",
+    "encl": "enclave",
+    "vhr": "vihar",
+    "col": "colony",
+    "blk": "block",
+    "ph": "phase",
+    "sec": "sector",
+    "pt": "part",
+}
+
+# Standalone numerals: "Phase-II" == "Phase 2", "Greater Kailash I" == "... 1"
+ROMAN_NUMERALS = {
+    "i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5",
+    "vi": "6", "vii": "7", "viii": "8", "ix": "9", "x": "10",
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_SERIAL = re.compile(r"^\d{3,} ")  # "1092 Lajpat Nagar-I" from the source list
+_DROPPED = re.compile(r"[.']")  # "A.B." == "AB"
+_PARENS = re.compile(r"\([^)]*\)")
+
+
+def parse_colony_row(row: dict):
+    """(name, CATEGORY) from a CSV/DB row, or None if either is blank."""
+    name = (row.get("colony_name") or row.get("Colony Name") or "").strip()
+    cat = (row.get("category") or row.get("Category") or "").strip().upper()
+    if name and cat:
+        return name, cat
+    return None
+
+
+def read_colonies_csv(csv_path=COLONIES_CSV):
+    """All valid (name, category) rows of a colonies CSV, in file order."""
+    with open(csv_path, "r", encoding="utf-8") as f:
+        return [p for p in map(parse_colony_row, csv.DictReader(f)) if p]
+
+
+def build_colony_map(rows):
+    """(names, {name: category}) from (name, category) pairs."""
+    rows = list(rows)
+    names = [name for name, _ in rows]
+    return names, dict(rows)
+
+
+def category_for(colony_map: dict, colony_name: str) -> str:
+    return colony_map.get(colony_name, DEFAULT_CATEGORY)
+
+
+# -------------------------------------------------
+# NAME NORMALIZATION / ALIAS INDEX
+# -------------------------------------------------
+
+def plain_key(name: str) -> str:
+    """
+    canonical_key() before any word is rewritten: lower case, dots /
+    apostrophes dropped ("A.B." -> "ab"), other punctuation turned into
+    spaces and a leading serial number removed.
+    """
+    text = unicodedata.normalize("NFKC", name).lower()
+    text = _NON_ALNUM.sub(" ", _DROPPED.sub("", text)).strip()
+    return _SERIAL.sub("", text)
+
+
+def expanded_key(name: str) -> str:
+    """plain_key() with abbreviations spelled out ("Ngr" -> "nagar")."""
+    return " ".join(ABBREVIATIONS.get(w, w) for w in plain_key(name).split())
+
+
+def canonical_key(name: str) -> str:
+    """
+    One spelling per colony name, for exact-match lookups:
+    "Inder Enclave Ph-II" / "inder encl. phase 2" -> "inder enclave phase 2",
+    "Inderlok A Block" / "Inderlok Block-A" -> "inderlok block a".
+    Block letters are kept: "Jangpura A" and "Jangpura B" differ in category.
+    """
+    words = [ROMAN_NUMERALS.get(w, w) for w in expanded_key(name).split()]
+    for i in range(len(words) - 1):
+        if words[i + 1] == "block" and len(words[i]) == 1:
+            words[i], words[i + 1] = "block", words[i]
+    return " ".join(words)
+
+
+def source_key(name: str) -> str:
+    """
+    canonical_key() keeping the source list's serial number, for
+    deduplicating raw rows: "1194 Mandli" and "1195 Mandli" are two
+    colonies of the same name.
+    """
+    serial = _SERIAL.match(name.strip())
+    key = canonical_key(name)
+    return serial.group() + key if serial else key
+
+
+def base_key(name: str) -> str:
+    """canonical_key() without a parenthesised note or ", locality" tail."""
+    return canonical_key(_PARENS.sub(" ", name).split(",")[0])
+
+
+class ColonyIndex:
+    """
+    O(1) colony lookup for free text (deeds, bulk CSVs).
+
+    Every master-list row is indexed under its exact name and its
+    canonical_key(); its base_key() ("Anand Park Extn., Shakrawati" ->
+    "anand park extension") is a weaker, derived alias. `aliases` adds
+    explicit (alias, colony name) pairs, which win over both.
+
+    A key claimed by colonies of different categories is a conflict:
+    it is listed in `conflicts` and left unresolved rather than
+    guessed. Same-category duplicates just resolve to the first row.
+    """
+
+    # Lower wins when several sources claim a key
+    EXPLICIT, CANONICAL, DERIVED = 0, 1, 2
+
+    def __init__(self, rows, aliases=()):
+        rows = list(rows)
+        self.by_name = {}
+        claims = {}  # key -> {level: [(name, category), ...]}
+
+        def claim(key, level, record):
+            if key:
+                claims.setdefault(key, {}).setdefault(level, []).append(record)
+
+        for name, cat in rows:
+            self.by_name.setdefault(name, (name, cat))
+            key = canonical_key(name)
+            claim(key, self.CANONICAL, (name, cat))
+            derived = base_key(name)
+            if derived != key:
+                claim(derived, self.DERIVED, (name, cat))
+
+        for alias, name in aliases:
+            record = self.by_name.get(name)
+            if record is None:
+                raise KeyError(f"alias {alias!r} points to unknown colony {name!r}")
+            claim(canonical_key(alias), self.EXPLICIT, record)
+
+        self.keys = {}
+        self.conflicts = []
+        for key, levels in claims.items():
+            level = min(levels)
+            records = levels[level]
+            if len({cat for _, cat in records}) == 1:
+                self.keys[key] = records[0]
+            else:
+                self.conflicts.append((key, records))
+            # An explicit alias overriding a colony of another category
+            # is allowed, but worth a look
+            if level == self.EXPLICIT and self.CANONICAL in levels:
+                shadowed = [r for r in levels[self.CANONICAL] if r[1] != records[0][1]]
+                if shadowed:
+                    self.conflicts.append((key, records[:1] + shadowed))
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def resolve(self, text: str):
+        """(name, category) of the colony `text` refers to, or None."""
+        return self.by_name.get(text) or self.keys.get(canonical_key(text))
+
+    def category(self, text: str, default=None):
+        record = self.resolve(text)
+        return default if record is None else record[1]
+
+    def conflict_report(self) -> str:
+        lines = [
+            f"{key!r}: " + "; ".join(f"{name} ({cat})" for name, cat in records)
+            for key, records in self.conflicts
+        ]
+        return "\n".join(lines)
+
+
+def read_aliases_csv(csv_path=ALIASES_CSV):
+    """(alias, colony_name) pairs; a missing file means no aliases."""
+    try:
+        with open(csv_path, "r", encoding="utf-8") as f:
+            return [
+                (row["alias"].strip(), row["colony_name"].strip())
+                for row in csv.DictReader(f)
+                if (row.get("alias") or "").strip()
+            ]
+    except FileNotFoundError:
+        return []
+
+
+@lru_cache(maxsize=4)
+def load_colony_index(csv_path=COLONIES_CSV, aliases_path=ALIASES_CSV):
+    """ColonyIndex of a colonies CSV plus its alias file, built once per process."""
+    return ColonyIndex(read_colonies_csv(csv_path), read_aliases_csv(aliases_path))
@@ -0,0 +1,254 @@
+# ================================================
+# colony_cache.py – Versioned, incrementally refreshed colony list
+# Replaces the forever-cached load: polls an updated_at watermark
+# ================================================
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from calc_engine import COLONY_RATE_COLUMNS
+from colonies import parse_colony_row
+from colony_snapshot import SNAPSHOT_PATH, load_snapshot
+
+DEFAULT_CHECK_INTERVAL = 30.0  # seconds between watermark checks
+# Longest a colonies write may take to commit after its updated_at
+# stamp: deltas re-read this far below the watermark
+DEFAULT_COMMIT_WINDOW = 60.0
+
+
+def _record(row):
+    """What the app keeps of a colonies row: name, category, rate overrides."""
+    if not isinstance(row, dict):
+        row = {"colony_name": row[0], "category": row[1]}
+    parsed = parse_colony_row(row)
+    if parsed is None:
+        return None
+    record = {"colony_name": parsed[0], "category": parsed[1]}
+    record.update((col, row.get(col)) for col in COLONY_RATE_COLUMNS)
+    return record
+
+
+def open_colony_cache(fetch_rows, fetch_watermark, snapshot_path=SNAPSHOT_PATH, **kwargs):
+    """
+    ColonyCache seeded from the snapshot at `snapshot_path` when there
+    is a readable one (at any age: the watermark says how far behind).
+    """
+    cache = ColonyCache(fetch_rows, fetch_watermark, **kwargs)
+    snap = load_snapshot(snapshot_path, max_age=None)
+    if snap is not None:
+        cache.seed(snap.records(), snap.watermark)
+        snap.close()
+    return cache
+
+
+def catch_up(cache, on_change=None, on_error=None):
+    """
+    Get `cache` ready for a render. With rows to show (seeded, or loaded
+    earlier) the check / delta / full reload runs in the background and
+    this returns at once, with the thread (None if no check was due);
+    an empty cache is loaded here, and errors are raised. `on_change` /
+    `on_error` as in refresh_in_background().
+    """
+    if cache.loaded:
+        return cache.refresh_in_background(on_change, on_error)
+    if cache.refresh() and on_change is not None:
+        on_change(cache)
+    return None
+
+
+def _before(stamp, seconds):
+    """ISO timestamp `seconds` earlier; other watermarks are returned as is."""
+    try:
+        moved = datetime.fromisoformat(stamp) - timedelta(seconds=seconds)
+    except (TypeError, ValueError):
+        return stamp
+    return moved.isoformat(timespec="milliseconds")
+
+
+class ColonyCache:
+    """
+    Process-wide colony master list that follows admin edits.
+
+    `fetch_watermark()` returns the newest updated_at in the table (one
+    tiny query); `fetch_rows(since)` returns the rows with updated_at
+    >= since, or all rows when since is None. Rows with deleted = true
+    are tombstones and drop the colony.
+
+    refresh() is rate-limited to one watermark check per
+    `check_interval` seconds and only pulls changed rows. `version`
+    goes up on every change, so derived structures (search indexes,
+    snapshots) can be rebuilt only when needed.
+
+    updated_at is stamped before commit, so a slow transaction can
+    become visible below the watermark already seen. Deltas therefore
+    start `commit_window` seconds below it, and after the watermark
+    moves the delta is repeated once the window has passed, even if
+    the probe shows nothing newer. Re-read rows apply idempotently.
+    """
+
+    def __init__(
+        self,
+        fetch_rows,
+        fetch_watermark,
+        check_interval=DEFAULT_CHECK_INTERVAL,
+        clock=time.monotonic,
+        commit_window=DEFAULT_COMMIT_WINDOW,
+    ):
+        self._fetch_rows = fetch_rows
+        self._fetch_watermark = fetch_watermark
+        self.check_interval = check_interval
+        self.commit_window = commit_window
+        self._clock = clock
+        self._late_check_due = None  # clock time of the post-window delta
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._refresher = None  # refresh_in_background() thread
+        self._rows = {}  # colony name -> _record(), in master-list order
+        self.watermark = None
+        self.version = 0
+        self.loaded = False
+        self._last_check = None
+        self.checks = 0
+        self.delta_loads = 0
+        self.full_loads = 0
+
+    def seed(self, rows, watermark):
+        """
+        Start from known rows (e.g. a snapshot) taken at `watermark`.
+        With watermark None the next refresh() replaces them with a full load.
+        """
+        with self._lock:
+            records = filter(None, map(_record, rows))
+            self._rows = {r["colony_name"]: r for r in records}
+            self.watermark = watermark
+            self.loaded = True
+            self.version += 1
+            self._late_check_due = self._clock()
+
+    def _fetched(self, now, before):
+        # A new watermark may still have late rows below it: look again
+        # once the commit window has passed
+        if self.watermark != before:
+            self._late_check_due = now + self.commit_window
+        elif self._late_check_due is not None and now >= self._late_check_due:
+            self._late_check_due = None
+
+    def _apply(self, rows):
+        changed = False
+        for row in rows:
+            record = _record(row)
+            if record is None:
+                continue
+            name = record["colony_name"]
+            if row.get("deleted"):
+                changed |= self._rows.pop(name, None) is not None
+            elif self._rows.get(name) != record:
+                self._rows[name] = record
+                changed = True
+            stamp = row.get("updated_at")
+            if stamp and (self.watermark is None or stamp > self.watermark):
+                self.watermark = stamp
+        return changed
+
+    def due(self) -> bool:
+        """True if refresh() would check the table now."""
+        return (
+            not self.loaded
+            or self._last_check is None
+            or self._clock() - self._last_check >= self.check_interval
+        )
+
+    def refresh(self, force=False) -> bool:
+        """Catch up with the table if due; True if the colony list changed."""
+        # Queries run outside self._lock, so readers keep getting the
+        # current rows while a refresh waits on the network
+        with self._refresh_lock:
+            with self._lock:
+                now = self._clock()
+                if not force and not self.due():
+                    return False
+                self._last_check = now
+                watermark = self.watermark
+
+            if not self.loaded or watermark is None:
+                # No watermark to take a delta from (first load, or seeded
+                # from a source without one, e.g. colonies.csv): replace
+                # the list with the whole table
+                rows = self._fetch_rows(None)
+                with self._lock:
+                    old, self._rows = self._rows, {}
+                    self._apply(rows)
+                    changed = not self.loaded or self._rows != old
+                    self.loaded = True
+                    self.full_loads += 1
+                    self._fetched(now, None)
+                    if changed:
+                        self.version += 1
+                return changed
+
+            self.checks += 1
+            latest = self._fetch_watermark()
+            late_check = self._late_check_due is not None and now >= self._late_check_due
+            if latest is None or (latest <= watermark and not late_check):
+                return False
+
+            rows = self._fetch_rows(_before(watermark, self.commit_window))
+            with self._lock:
+                changed = self._apply(rows)
+                self._fetched(now, watermark)
+                self.delta_loads += 1
+                if changed:
+                    self.version += 1
+            return changed
+
+    def refresh_in_background(self, on_change=None, on_error=None):
+        """
+        refresh() on a daemon thread, if due and none is running, so the
+        caller renders from the current rows meanwhile. `on_change(cache)`
+        runs after a change, `on_error(exc)` on a failure. Returns the
+        thread, or None when nothing was started.
+        """
+        with self._lock:
+            if not self.due() or (self._refresher and self._refresher.is_alive()):
+                return None
+            self._refresher = threading.Thread(
+                target=self._background_refresh,
+                args=(on_change, on_error),
+                name="colony-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+            return self._refresher
+
+    def _background_refresh(self, on_change, on_error):
+        try:
+            if self.refresh() and on_change is not None:
+                on_change(self)
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+
+    def rows(self) -> list:
+        """(name, category) pairs."""
+        with self._lock:
+            return [(name, r["category"]) for name, r in self._rows.items()]
+
+    def records(self) -> list:
+        """Row dicts with the rate override columns (None = not set)."""
+        with self._lock:
+            return [dict(r) for r in self._rows.values()]
+
+    def category_map(self) -> dict:
+        with self._lock:
+            return {name: r["category"] for name, r in self._rows.items()}
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "watermark": self.watermark,
+            "colonies": len(self._rows),
+            "checks": self.checks,
+            "delta_loads": self.delta_loads,
+            "full_loads": self.full_loads,
+        }
@@ -0,0 +1,145 @@
+# ================================================
+# colony_search.py – Server-side colony name search
+# Trigram fuzzy index + prefix autocomplete over the colony master list
+# ================================================
+
+import sys
+from bisect import bisect_left
+
+import numpy as np
+
+from colonies import expanded_key, plain_key
+
+
+def search_key(name: str) -> str:
+    """
+    Key for fuzzy search: colonies.expanded_key(), the first two steps
+    of canonical_key(), so "Ngr" == "Nagar". Numerals stay as written
+    ("Nagar-I" is not rewritten to "nagar 1"), which keeps the trigram
+    weights of the source list's own spellings.
+    """
+    return expanded_key(name)
+
+
+def prefix_key(name: str) -> str:
+    """
+    Case- and punctuation-insensitive key for prefix matching:
+    colonies.plain_key() ("A.B. Extn" -> "ab extn"). No abbreviation
+    expansion, so what the user has typed so far is matched as-is.
+    """
+    return plain_key(name)
+
+
+def trigrams(key: str) -> set:
+    """Word trigrams, padded like pg_trgm: '  w', ' wo', 'wor', 'ord', 'rd '."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Fuzzy colony lookup by trigram similarity.
+
+    Built once from (name, category) pairs. Each trigram maps to the
+    array of colony ids containing it, so a query only touches the
+    postings of its own trigrams. Similarity is a weighted Jaccard,
+    w(A & B) / w(A | B), with each trigram weighted by its rarity
+    (IDF): "saket" outweighs "extension", which ~140 names share.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.names = [name for name, _ in rows]
+        self.categories = [cat for _, cat in rows]
+
+        postings = {}
+        name_grams = []
+        for i, (name, _) in enumerate(rows):
+            grams = trigrams(search_key(name))
+            name_grams.append(grams)
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+
+        n = max(len(rows), 1)
+        # A trigram no colony has gets the weight of one seen once
+        self._unseen_weight = np.log1p(n)
+        self._weights = {g: np.log1p(n / len(ids)) for g, ids in postings.items()}
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._sizes = np.array(
+            [sum(self._weights[g] for g in grams) for grams in name_grams]
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_map(cls, colony_map: dict) -> "TrigramIndex":
+        return cls(colony_map.items())
+
+    def search(self, query: str, k: int = 10, min_score: float = 0.1):
+        """Top `k` (name, category, score) matches, best first."""
+        grams = trigrams(search_key(query))
+        known = [g for g in grams if g in self._postings]
+        if not known or k <= 0:
+            return []
+
+        ids = np.concatenate([self._postings[g] for g in known])
+        weights = np.repeat(
+            [self._weights[g] for g in known], [len(self._postings[g]) for g in known]
+        )
+        shared = np.bincount(ids, weights=weights, minlength=len(self.names))
+        query_size = sum(self._weights.get(g, self._unseen_weight) for g in grams)
+        scores = shared / (query_size + self._sizes - shared)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Best score first; ties keep master-list order
+        top = top[np.lexsort((top, -scores[top]))]
+        return [
+            (self.names[i], self.categories[i], float(scores[i]))
+            for i in top.tolist()
+            if scores[i] >= min_score
+        ]
+
+
+class PrefixIndex:
+    """
+    As-you-type colony completion: a sorted array of prefix_key()s.
+
+    complete() bisects to the first key >= prefix and walks forward
+    while keys still start with it: O(log n + prefix + N) for the
+    first N completions, with no per-character node objects.
+    """
+
+    def __init__(self, rows):
+        entries = sorted(
+            (prefix_key(name), name, cat) for name, cat in rows
+        )
+        self.keys = [k for k, _, _ in entries]
+        self.names = [n for _, n, _ in entries]
+        self.categories = [c for _, _, c in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_map(cls, colony_map: dict) -> "PrefixIndex":
+        return cls(colony_map.items())
+
+    def complete(self, prefix: str, n: int = 10):
+        """First `n` (name, category) pairs whose key starts with `prefix`."""
+        p = prefix_key(prefix)
+        out = []
+        i = bisect_left(self.keys, p)
+        while i < len(self.keys) and len(out) < n and self.keys[i].startswith(p):
+            out.append((self.names[i], self.categories[i]))
+            i += 1
+        return out
+
+    def memory_bytes(self) -> int:
+        """Lists plus key strings (names / categories are shared with the master list)."""
+        lists = sum(sys.getsizeof(x) for x in (self.keys, self.names, self.categories))
+        return lists + sum(sys.getsizeof(k) for k in self.keys)
@@ -0,0 +1,253 @@
+# ================================================
+# colony_snapshot.py – Binary colony snapshot for fast cold start
+# Build once, then mmap at app start to seed the colony cache
+#
+#   python colony_snapshot.py                  # from colonies.csv
+#   python colony_snapshot.py --supabase       # from the live table
+# ================================================
+#
+# File layout (little-endian, sections 8-byte aligned):
+#
+#   header   96 bytes   magic, version, count, built_at, names size,
+#                       rate-table digest, colonies updated_at watermark
+#   rates    float64[count, 4]   RATE_COLUMNS overrides, NaN = use category
+#   offsets  uint32[count + 1]   name i = names[offsets[i]:offsets[i+1]]
+#   category uint8[count]        ASCII category letter
+#   names    utf-8 bytes
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from calc_engine import (
+    COLONY_RATE_COLUMNS,
+    circlerates_res,
+    construction_rates_res,
+    circlerates_com,
+    construction_rates_com,
+)
+from colonies import parse_colony_row, read_colonies_csv
+
+SNAPSHOT_PATH = "colonies.snap"
+MAGIC = b"DPCSNAP1"
+VERSION = 3
+HEADER = struct.Struct("<8sHIdI16s40s")
+HEADER_SIZE = 96
+DEFAULT_MAX_AGE = 24 * 3600  # seconds
+
+RATE_COLUMNS = COLONY_RATE_COLUMNS
+_RATE_TABLES = (circlerates_res, construction_rates_res, circlerates_com, construction_rates_com)
+
+
+def rates_digest() -> bytes:
+    """Stable digest of the rate tables baked into a snapshot."""
+    text = repr([sorted(t.items()) for t in _RATE_TABLES])
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _rate_row(row):
+    # Raw overrides only; calc_engine.EffectiveRates fills in the category
+    return [
+        np.nan if row.get(col) is None else float(row[col]) for col in RATE_COLUMNS
+    ]
+
+
+def build_snapshot(rows, path=SNAPSHOT_PATH, watermark=None) -> int:
+    """
+    Write a snapshot of `rows` ((name, category) pairs or table dicts).
+    `watermark` is the colonies updated_at the rows are current to
+    (default: the newest updated_at among dict rows); deleted rows are
+    skipped. Written to a uniquely named temp file beside `path` and
+    renamed, so readers never see half a file and two builders never
+    write into the same temp file. Returns the number of colonies written.
+    """
+    records = []
+    for row in rows:
+        if isinstance(row, dict):
+            stamp = row.get("updated_at")
+            if stamp and (watermark is None or stamp > watermark):
+                watermark = stamp
+            parsed = parse_colony_row(row)
+            if parsed and not row.get("deleted"):
+                records.append({**row, "colony_name": parsed[0], "category": parsed[1]})
+        else:
+            records.append({"colony_name": row[0], "category": row[1]})
+
+    count = len(records)
+    encoded = [r["colony_name"].encode("utf-8") for r in records]
+    offsets = np.zeros(count + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    categories = np.frombuffer(
+        "".join(r["category"][:1] for r in records).encode("ascii"), dtype=np.uint8
+    )
+    rates = np.array([_rate_row(r) for r in records], dtype="<f8").reshape(count, 4)
+    names = b"".join(encoded)
+
+    mark = (watermark or "").encode("ascii")
+    if len(mark) > 40:
+        raise ValueError(f"watermark too long for the header: {watermark!r}")
+    header = HEADER.pack(
+        MAGIC, VERSION, count, time.time(), len(names), rates_digest(), mark
+    )
+    f = tempfile.NamedTemporaryFile(
+        "wb",
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            for section in (rates.tobytes(), offsets.tobytes(), categories.tobytes()):
+                f.write(section.ljust(_align(len(section)), b"\0"))
+            f.write(names)
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+    return count
+
+
+class ColonySnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+
+    Opening costs one mmap plus a header parse; the arrays are NumPy
+    views straight onto the mapping, so nothing is copied or parsed
+    until a column is actually used.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < HEADER_SIZE:
+            self.close()
+            raise ValueError(f"{path}: truncated snapshot")
+        magic, version, count, built_at, names_len, digest, mark = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a version {VERSION} colony snapshot")
+
+        self.count = count
+        self.built_at = built_at
+        self.rates_digest = digest
+        # updated_at of the newest row baked in; None for CSV builds
+        self.watermark = mark.rstrip(b"\0").decode("ascii") or None
+
+        pos = HEADER_SIZE
+        self.rates = np.frombuffer(self._mm, "<f8", count * 4, pos).reshape(count, 4)
+        pos += _align(count * 4 * 8)
+        self._offsets = np.frombuffer(self._mm, "<u4", count + 1, pos)
+        pos += _align((count + 1) * 4)
+        self._categories = np.frombuffer(self._mm, np.uint8, count, pos)
+        pos += _align(count)
+        if pos + names_len > len(self._mm):
+            self.close()
+            raise ValueError(f"{path}: truncated snapshot")
+        self._names_at = pos
+
+    def __len__(self):
+        return self.count
+
+    def name(self, i: int) -> str:
+        start, end = self._offsets[i], self._offsets[i + 1]
+        base = self._names_at
+        return self._mm[base + start:base + end].decode("utf-8")
+
+    def names(self) -> list:
+        blob = self._mm[self._names_at:self._names_at + int(self._offsets[-1])]
+        bounds = self._offsets.tolist()
+        return [blob[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+    def categories(self) -> list:
+        return list(self._categories.tobytes().decode("ascii"))
+
+    def rows(self) -> list:
+        """(name, category) pairs in snapshot order."""
+        return list(zip(self.names(), self.categories()))
+
+    def records(self) -> list:
+        """Colonies-table style dicts, with None for rates not overridden."""
+        rates = np.where(np.isnan(self.rates), None, self.rates).tolist()
+        return [
+            {"colony_name": name, "category": cat, **dict(zip(RATE_COLUMNS, row))}
+            for name, cat, row in zip(self.names(), self.categories(), rates)
+        ]
+
+    def is_stale(self, max_age=DEFAULT_MAX_AGE) -> bool:
+        """Rate tables changed since the build, or older than `max_age` seconds."""
+        if self.rates_digest != rates_digest():
+            return True
+        return max_age is not None and time.time() - self.built_at > max_age
+
+    def close(self):
+        # The NumPy views pin the mapping; drop ours first. If a caller
+        # still holds one, the mapping is released when that goes away.
+        self.rates = self._offsets = self._categories = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age=DEFAULT_MAX_AGE):
+    """An open ColonySnapshot, or None if it is missing, unreadable or stale."""
+    try:
+        snap = ColonySnapshot(path)
+    except (OSError, ValueError):
+        return None
+    if snap.is_stale(max_age):
+        snap.close()
+        return None
+    return snap
+
+
+# -------------------------------------------------
+# BUILD STEP
+# -------------------------------------------------
+
+def fetch_supabase_rows():
+    """All rows of the colonies table, using SUPABASE_URL / SUPABASE_KEY."""
+    from supabase import create_client
+
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    except ImportError:
+        pass
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    res = client.table("colonies").select("*").order("colony_name").execute()
+    return res.data or []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the binary colony snapshot.")
+    parser.add_argument("--csv", default="colonies.csv", help="source CSV (default)")
+    parser.add_argument("--supabase", action="store_true",
+                        help="read the live colonies table instead of the CSV")
+    parser.add_argument("-o", "--output", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    # Table rows carry updated_at, so a --supabase snapshot records the
+    # watermark and the app only fetches the delta since it
+    rows = fetch_supabase_rows() if args.supabase else read_colonies_csv(args.csv)
+    n = build_snapshot(rows, args.output)
+    snap = ColonySnapshot(args.output)
+    mark = snap.watermark or "none (the app reloads the full table in the background)"
+    snap.close()
+    print(f"Wrote {n} colonies to {args.output} ({os.path.getsize(args.output):,} bytes), "
+          f"watermark {mark}.")
@@ -1,5 +1,9 @@
 import math
 import os
+import sys
+
+import bulk_cli
+from duty_schedule import compile_schedule, MUTATION_FEE
 
 # Circle rates (Commercial is 3× Residential)
 circlerates = {
@@ -45,16 +49,6 @@ def get_stampduty(ownertype, total_consideration):
         return None
     return base_rate + 0.01 if total_consideration > 2500000 else base_rate
 
-def calculate_stampduty(stampable_value, ownertype, total_consideration):
-    duty_rate = get_stampduty(ownertype, total_consideration)
-    return stampable_value * duty_rate if duty_rate else None
-
-def calculate_efees(total_consideration):
-    return total_consideration * 0.01
-
-def calculate_tds(total_consideration):
-    return total_consideration * 0.01 if total_consideration > 5000000 else 0
-
 def age(year_built):
     if year_built < 1960:
         return 0.5
@@ -73,6 +67,126 @@ def convert_sq_yards_to_sq_meters(sq_yards):
     result = sq_yards * 0.8361
     return math.floor(result * 100) / 100
 
+RESULT_FIELDS = [
+    "category",
+    "area_yards",
+    "area_m",
+    "owner_type",
+    "total_storey",
+    "user_storey",
+    "storey_ratio",
+    "user_land_value",
+    "base_construction_value",
+    "age_multiplier",
+    "construction_value",
+    "parking_cost",
+    "user_construction_value",
+    "calculated_consideration",
+    "total_consideration",
+    "stamp_duty_rate",
+    "stamp_duty",
+    "mutation_fees",
+    "e_fees",
+    "tds",
+    "total_payable",
+    "total_payable_tds",
+]
+
+def calculate_commercial(area_yards, category, owner_type, add_construction="no",
+                          parking="no", total_storey=1, user_storey=1,
+                          constructed_area=0.0, year_built=2000,
+                          custom_consideration=None):
+    """Non-interactive core of run_commercial(). Raises ValueError on bad input."""
+    category = category.upper()
+    owner_type = owner_type.lower()
+    area = convert_sq_yards_to_sq_meters(area_yards)
+
+    if add_construction != "yes":
+        total_storey = 1
+        user_storey = 1
+    if user_storey > total_storey or user_storey <= 0:
+        raise ValueError("Invalid no. of Storeys.")
+    if get_stampduty(owner_type, 0) is None:
+        raise ValueError("Invalid buyer type.")
+
+    total_land_value = calculate_property_value(area, category)
+    if total_land_value is None:
+        raise ValueError("Invalid Category.")
+
+    storey_ratio = user_storey / total_storey if total_storey > 1 else 1.0
+    user_land_value = total_land_value * storey_ratio
+
+    base_construction_value = 0
+    construction_value = 0
+    construction_rate_used = 0
+    age_multiplier = 1.0
+
+    if add_construction == "yes":
+        constructed_area_m = convert_sq_yards_to_sq_meters(constructed_area)
+        age_multiplier = age(year_built)
+        base_construction_value = calculate_construction_value(constructed_area_m, category)
+        construction_value = base_construction_value * age_multiplier * user_storey
+        construction_rate_used = construction_rates[category]
+
+    parking_cost = 0
+    if parking == "yes" and construction_rate_used > 0:
+        parking_cost = (area * construction_rate_used * user_storey) / total_storey
+
+    user_construction_value = construction_value + parking_cost
+    calculated_consideration = user_land_value + user_construction_value
+    if custom_consideration is None:
+        total_consideration = calculated_consideration
+    else:
+        total_consideration = custom_consideration
+
+    # Commercial mutation stays at 1,124 above 50L too
+    duty = compile_schedule(stampdutyrates[owner_type], MUTATION_FEE).breakdown(total_consideration)
+    stamp_duty = duty["stamp_duty"]
+    stamp_duty_rate_used = duty["stamp_rate"]
+    mutation_fees = duty["mutation"]
+    e_fees = duty["e_fees"]
+    tds = duty["tds"]
+
+    return {
+        "category": category,
+        "area_yards": area_yards,
+        "area_m": area,
+        "owner_type": owner_type,
+        "total_storey": total_storey,
+        "user_storey": user_storey,
+        "storey_ratio": storey_ratio,
+        "user_land_value": user_land_value,
+        "base_construction_value": base_construction_value,
+        "age_multiplier": age_multiplier,
+        "construction_value": construction_value,
+        "parking_cost": parking_cost,
+        "user_construction_value": user_construction_value,
+        "calculated_consideration": calculated_consideration,
+        "total_consideration": total_consideration,
+        "stamp_duty_rate": stamp_duty_rate_used,
+        "stamp_duty": stamp_duty,
+        "mutation_fees": mutation_fees,
+        "e_fees": e_fees,
+        "tds": tds,
+        "total_payable": stamp_duty + e_fees,
+        "total_payable_tds": stamp_duty + e_fees + tds,
+    }
+
+def value_row(row):
+    """Bulk mode: one CSV/JSONL record -> calculate_commercial() result."""
+    return calculate_commercial(
+        area_yards=bulk_cli.float_field(row, "area"),
+        category=bulk_cli.category_field(row),
+        owner_type=bulk_cli.text_field(row, "owner"),
+        add_construction=bulk_cli.text_field(row, "construction", "no"),
+        parking=bulk_cli.text_field(row, "parking", "no"),
+        total_storey=bulk_cli.int_field(row, "total_storey", 1),
+        user_storey=bulk_cli.int_field(row, "user_storey", 1),
+        constructed_area=bulk_cli.float_field(row, "constructed_area", 0.0),
+        year_built=bulk_cli.int_field(row, "year_built", 2000),
+        custom_consideration=bulk_cli.optional_field(row, "consideration", int),
+    )
+
 def run_commercial():
     print("Delhi Commercial Property Calculator!".center(80))
     try:
@@ -91,91 +205,75 @@ def run_commercial():
             total_storey = int(input("Enter Total No. of Storeys: "))
             user_storey = int(input("Enter No. of Storeys buying: "))
 
-        total_land_value = calculate_property_value(area, category)
-        if total_land_value is None:
+        if calculate_property_value(area, category) is None:
             print("Invalid Category.")
             return 0
 
-        storey_ratio = user_storey / total_storey if total_storey > 1 else 1.0
-        user_land_value = total_land_value * storey_ratio
-
         print("sq meter:", area)
 
-        construction_value = 0
-        construction_rate_used = 0
-        age_multiplier = 1.0
-
+        constructed_area = 0.0
+        year_built = 2000
         if add_construction == "yes":
             constructed_area = float(input("Enter constructed area (in sq. yards): "))
-            constructed_area_m = convert_sq_yards_to_sq_meters(constructed_area)
             year_built = int(input("Enter year of Construction: "))
-            age_multiplier = age(year_built)
-
-            base_construction_value = calculate_construction_value(constructed_area_m, category)
-            if base_construction_value is None:
-                print("Invalid category for construction.")
-                return 0
-
-            construction_value = base_construction_value * age_multiplier * user_storey
-            construction_rate_used = construction_rates[category.upper()]
-
-            print(f"Base Construction Value: Rs.{base_construction_value:,.2f}")
-            print(f"Age Multiplier Applied: {age_multiplier}")
-            print(f"Depreciated Construction Value: Rs.{construction_value:,.2f}")
 
-        parking_cost = 0
-        if parking_input == "yes" and construction_rate_used > 0:
-            parking_cost = (area * construction_rate_used * user_storey) / total_storey
+        inputs = dict(
+            area_yards=area_1,
+            category=category,
+            owner_type=owner_type,
+            add_construction=add_construction,
+            parking=parking_input,
+            total_storey=total_storey,
+            user_storey=user_storey,
+            constructed_area=constructed_area,
+            year_built=year_built,
+        )
+        try:
+            res = calculate_commercial(**inputs)
+        except ValueError as e:
+            print(e)
+            return 0
 
-        user_construction_value = construction_value + parking_cost
-        total_user_value = user_land_value + user_construction_value
-        total_consideration = total_user_value
+        if add_construction == "yes":
+            print(f"Base Construction Value: Rs.{res['base_construction_value']:,.2f}")
+            print(f"Age Multiplier Applied: {res['age_multiplier']}")
+            print(f"Depreciated Construction Value: Rs.{res['construction_value']:,.2f}")
 
-        print(f"\nCalculated Total Consideration: Rs.{math.ceil(total_consideration):,}")
+        print(f"\nCalculated Total Consideration: Rs.{math.ceil(res['total_consideration']):,}")
 
         custom_consid = input("Own Consideration Value? (yes/no): ").lower()
         if custom_consid == "yes":
             try:
                 user_defined_consid = int(input("Enter your own consideration value (in Rs.): "))
-                total_consideration = user_defined_consid    
+                res = calculate_commercial(**inputs, custom_consideration=user_defined_consid)
             except ValueError:
                 print("Invalid consideration value entered.")
 
-        if user_storey > total_storey or user_storey <= 0:
-            print("Invalid no. of Storeys.")
-            return 0
-
-        stamp_duty = calculate_stampduty(total_consideration, owner_type, total_consideration)
-        stamp_duty_rate_used = get_stampduty(owner_type, total_consideration)
-        mutation_fees = 1124
-        e_fees = calculate_efees(total_consideration) + mutation_fees
-        tds = calculate_tds(total_consideration)
-        total_payable = stamp_duty + e_fees
-        total_payable_tds = stamp_duty + e_fees + tds
+        total_consideration = res["total_consideration"]
         os.system('cls')
 
         print("\n--- Property Calculation Summary ---")
         print(f"Category: {category}")
         print(f"Land Area: {area_1} sq. yards")
-        print(f"Land Value: Rs.{math.ceil(user_land_value):,}")
-        print(f"Building Storeys: {total_storey}, You’re Buying: {user_storey}")
-        print(f"Your Share: {storey_ratio * 100:.2f}%")
-        print(f"Your Land Value: Rs.{math.ceil(user_land_value):,}")
+        print(f"Land Value: Rs.{math.ceil(res['user_land_value']):,}")
+        print(f"Building Storeys: {res['total_storey']}, You’re Buying: {res['user_storey']}")
+        print(f"Your Share: {res['storey_ratio'] * 100:.2f}%")
+        print(f"Your Land Value: Rs.{math.ceil(res['user_land_value']):,}")
         if parking_input == "yes":
-            print(f"Your Construction Value (with parking): Rs.{math.ceil(user_construction_value):,}")
+            print(f"Your Construction Value (with parking): Rs.{math.ceil(res['user_construction_value']):,}")
         else:
-            print(f"Your Construction Value: Rs.{math.ceil(user_construction_value):,}")
+            print(f"Your Construction Value: Rs.{math.ceil(res['user_construction_value']):,}")
         print(f"Total Consideration: Rs.{math.ceil(total_consideration):,}")
-        print(f"Stamp Duty Rate: {stamp_duty_rate_used * 100:.2f}%")
-        print(f"Stamp Duty: Rs.{math.ceil(stamp_duty):,}")
-        print(f"E-Fees: Rs.{math.ceil(e_fees):,}")
+        print(f"Stamp Duty Rate: {res['stamp_duty_rate'] * 100:.2f}%")
+        print(f"Stamp Duty: Rs.{math.ceil(res['stamp_duty']):,}")
+        print(f"E-Fees: Rs.{math.ceil(res['e_fees']):,}")
         if total_consideration > 5000000:
-            print(f"TDS Applicable (1% over ₹50L): Rs.{math.ceil(tds):,}")
-            print(f"Total Payable Govt. Duty (Stamp Duty + E-Fees + TDS): Rs.{math.ceil(total_payable_tds):,}")
+            print(f"TDS Applicable (1% over ₹50L): Rs.{math.ceil(res['tds']):,}")
+            print(f"Total Payable Govt. Duty (Stamp Duty + E-Fees + TDS): Rs.{math.ceil(res['total_payable_tds']):,}")
         else:
             print(f"TDS Not Applicable")
-            print(f"Total Payable Govt. Duty (Stamp Duty + E-Fees): Rs.{math.ceil(total_payable):,}")
-        print(f"Parking Cost: Rs.{math.ceil(parking_cost):,}")
+            print(f"Total Payable Govt. Duty (Stamp Duty + E-Fees): Rs.{math.ceil(res['total_payable']):,}")
+        print(f"Parking Cost: Rs.{math.ceil(res['parking_cost']):,}")
 
         return total_consideration
 
@@ -184,4 +282,9 @@ def run_commercial():
         return 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(bulk_cli.main(
+            sys.argv[1:], value_row, RESULT_FIELDS,
+            "Bulk commercial valuation (CSV/JSONL in, one result row per parcel out).",
+        ))
     run_commercial()
@@ -1,19 +1,118 @@
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import csv
 import os
+import queue
+import re
+import threading
+
+from colonies import parse_colony_row
 
 DB_NAME = "data.db"
 
+POOL_SIZE = 8  # open connections kept per database file
+BUSY_TIMEOUT = 5.0  # seconds a writer waits for the lock before "database is locked"
+
 
-def get_connection():
+def get_connection(path=None):
     # check_same_thread=False so we can reuse in Streamlit
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn = sqlite3.connect(path or DB_NAME, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    # WAL: readers never block the (single) writer or each other.
+    # NORMAL is durable in WAL mode except for the last commits on power loss.
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)};")
     return conn
 
 
-def init_db():
-    conn = get_connection()
+class ConnectionPool:
+    """
+    Reusable connections to one database file, safe to share between
+    threads (Streamlit sessions). connection() lends one out for a
+    `with` block and takes it back afterwards, rolling back anything
+    left uncommitted. At most `size` connections are ever opened; a
+    borrower waits when all are in use.
+    """
+
+    def __init__(self, path=None, size=POOL_SIZE):
+        self.path = path or DB_NAME
+        self.size = size
+        self._idle = queue.LifoQueue()  # most recently used first: warm caches
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return get_connection(self.path)
+                except BaseException:
+                    self._opened -= 1
+                    raise
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                # Broken connection: drop it, a new one is opened on demand
+                conn.close()
+                with self._lock:
+                    self._opened -= 1
+            else:
+                self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None) -> ConnectionPool:
+    """The process-wide pool for a database file (DB_NAME by default)."""
+    key = os.path.abspath(path or DB_NAME)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+
+def add_missing_columns(c, table: str, columns: dict):
+    """ALTER TABLE ADD COLUMN for each {name: definition} the table lacks."""
+    c.execute(f"PRAGMA table_info({table});")
+    have = {row[1] for row in c.fetchall()}
+    for name, definition in columns.items():
+        if name not in have:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition};")
+
+
+# ISO-8601 UTC with milliseconds: sorts as text, like Supabase timestamps
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+
+def init_db(path=None):
+    conn = get_connection(path)
     c = conn.cursor()
 
     # ---------- USERS ----------
@@ -26,6 +125,9 @@ def init_db():
             created_at TEXT NOT NULL
         );
     """)
+    # Columns the app uses (same as the Supabase users table)
+    add_missing_columns(c, "users", {"username": "TEXT", "last_login": "TEXT"})
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_username_idx ON users (username);")
 
     # ---------- OTPS ----------
     c.execute("""
@@ -37,15 +139,10 @@ def init_db():
             used INTEGER NOT NULL DEFAULT 0
         );
     """)
+    add_missing_columns(c, "otps", {"purpose": "TEXT NOT NULL DEFAULT 'signup'"})
 
     # ---------- COLONIES ----------
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS colonies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            colony_name TEXT NOT NULL,
-            category TEXT NOT NULL
-        );
-    """)
+    ensure_colonies_schema(conn)
 
     # ---------- HISTORY (USER-SAVED SUMMARIES) ----------
     c.execute("""
@@ -65,6 +162,17 @@ def init_db():
         );
     """)
 
+    # ---------- EVENTS (APP ANALYTICS, SAME SHAPE AS SUPABASE) ----------
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT,
+            event_type TEXT NOT NULL,
+            details TEXT,
+            created_at TEXT NOT NULL
+        );
+    """)
+
     # ---------- VISITORS (ANONYMOUS OR LOGGED IN) ----------
     # One row per unique visitor_id (session/device)
     c.execute("""
@@ -113,85 +221,289 @@ def init_db():
     conn.close()
 
 
+def ensure_colonies_schema(conn) -> bool:
+    """
+    Create / migrate the colonies table: rate overrides, updated_at
+    stamps, deleted tombstones and the FTS index. Returns
+    ensure_colony_fts()'s answer (False: no FTS5 in this SQLite).
+    """
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS colonies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            colony_name TEXT NOT NULL,
+            category TEXT NOT NULL
+        );
+    """)
+    # Rate overrides and change tracking, as in sql/colonies_versioning.sql
+    add_missing_columns(c, "colonies", {
+        "res_land_rate": "REAL",
+        "res_const_rate": "REAL",
+        "com_land_rate": "REAL",
+        "com_const_rate": "REAL",
+        "updated_at": "TEXT",
+        "deleted": "INTEGER NOT NULL DEFAULT 0",
+    })
+    c.execute("CREATE INDEX IF NOT EXISTS colonies_name_idx ON colonies (colony_name);")
+    c.execute("CREATE INDEX IF NOT EXISTS colonies_updated_at_idx ON colonies (updated_at);")
+    c.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS colonies_stamp_insert AFTER INSERT ON colonies
+        WHEN new.updated_at IS NULL BEGIN
+            UPDATE colonies SET updated_at = {SQL_NOW} WHERE id = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS colonies_stamp_update AFTER UPDATE ON colonies
+        WHEN new.updated_at IS old.updated_at BEGIN
+            UPDATE colonies SET updated_at = {SQL_NOW} WHERE id = new.id;
+        END;
+    """)
+    return ensure_colony_fts(conn)
+
+
+def diff_colonies(current, rows):
+    """
+    Changes that turn the table into `rows`.
+
+    `current` is [(id, colony_name, category, deleted)] in id order,
+    `rows` the wanted [(colony_name, category)] in file order. The n-th
+    row of a name pairs with the n-th table row of that name, live rows
+    before tombstones, so repeated names (the master list has a few)
+    keep their ids and a name that comes back revives its tombstone.
+    Returns (inserts, updates, deletes) ready for executemany():
+    updates set the category and clear `deleted`, deletes are the live
+    rows to tombstone.
+    """
+    existing = {}
+    for row_id, name, cat, deleted in current:
+        existing.setdefault(name, []).append((bool(deleted), row_id, cat))
+    for matches in existing.values():
+        matches.sort()
+
+    inserts, updates = [], []
+    for name, cat in rows:
+        matches = existing.get(name)
+        if not matches:
+            inserts.append((name, cat))
+            continue
+        deleted, row_id, old_cat = matches.pop(0)
+        if deleted or old_cat != cat:
+            updates.append((cat, row_id))
+
+    deletes = [
+        (row_id,)
+        for matches in existing.values()
+        for deleted, row_id, _ in matches
+        if not deleted
+    ]
+    return inserts, updates, deletes
+
+
 def import_colonies_from_csv(conn=None, csv_path="colonies.csv"):
-    close_after = False
+    """
+    Sync the colonies table with a CSV by applying only the differences.
+
+    Unchanged rows keep their ids and are not written, and all changes
+    go in one transaction, so readers never see a half-imported or
+    empty table. Inside a transaction the caller already opened, the
+    changes go in a savepoint instead and committing is left to the
+    caller. Rows missing from the CSV become tombstones (deleted = 1)
+    with a fresh updated_at, so running apps' ColonyCache deltas see
+    them go; a name that returns is revived. Returns {"inserted",
+    "updated", "removed", "unchanged"} counts, or None if the CSV is
+    missing.
+    """
     if conn is None:
-        conn = get_connection()
-        close_after = True
+        with get_pool().connection() as conn:
+            return import_colonies_from_csv(conn, csv_path)
 
     c = conn.cursor()
     if not os.path.exists(csv_path):
         print(f"[database] Warning: {csv_path} not found. Colonies not imported.")
-        if close_after:
-            conn.close()
-        return
+        return None
 
     with open(csv_path, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        rows = []
-        for row in reader:
-            name = (row.get("colony_name") or row.get("Colony Name") or "").strip()
-            cat = (row.get("category") or row.get("Category") or "").strip().upper()
-            if name and cat:
-                rows.append((name, cat))
-
-    c.execute("DELETE FROM colonies;")
-    c.executemany(
-        "INSERT INTO colonies (colony_name, category) VALUES (?, ?);",
-        rows
+        rows = [p for p in map(parse_colony_row, reader) if p]
+
+    # IMMEDIATE: no other writer can slip in between the read and the diff
+    nested = conn.in_transaction
+    c.execute("SAVEPOINT import_colonies;" if nested else "BEGIN IMMEDIATE;")
+    try:
+        c.execute("SELECT id, colony_name, category, deleted FROM colonies ORDER BY id;")
+        inserts, updates, deletes = diff_colonies(c.fetchall(), rows)
+        c.executemany(
+            f"UPDATE colonies SET deleted = 1, updated_at = {SQL_NOW} WHERE id = ?;",
+            deletes
+        )
+        c.executemany(
+            f"UPDATE colonies SET category = ?, deleted = 0, updated_at = {SQL_NOW} "
+            "WHERE id = ?;",
+            updates
+        )
+        c.executemany(
+            "INSERT INTO colonies (colony_name, category, updated_at) "
+            f"VALUES (?, ?, {SQL_NOW});",
+            inserts
+        )
+        if nested:
+            c.execute("RELEASE import_colonies;")
+        else:
+            conn.commit()
+    except BaseException:
+        if nested:
+            # Undo this import only; the caller's own writes stay pending
+            c.execute("ROLLBACK TO import_colonies;")
+            c.execute("RELEASE import_colonies;")
+        else:
+            conn.rollback()
+        raise
+
+    summary = {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "removed": len(deletes),
+        "unchanged": len(rows) - len(inserts) - len(updates),
+    }
+    print(
+        f"[database] Synced {len(rows)} colonies from {csv_path}: "
+        f"{summary['inserted']} inserted, {summary['updated']} updated, "
+        f"{summary['removed']} removed."
     )
-    conn.commit()
-    print(f"[database] Imported {len(rows)} colonies from {csv_path}.")
+    return summary
 
-    if close_after:
-        conn.close()
 
+# ---------- COLONY SEARCH (FTS5) ----------
 
-# ---------- OTP HELPERS ----------
+_FTS_TOKEN = re.compile(r"\w+")
 
-def create_otp(email: str, otp_code: str, minutes_valid: int = 10):
-    conn = get_connection()
+
+def ensure_colony_fts(conn) -> bool:
+    """
+    Create colonies_fts, an FTS5 index over colonies.colony_name kept in
+    sync by triggers (the name text lives only in colonies). Fills it
+    from existing rows on first creation. Returns False when this
+    SQLite build has no FTS5; search_colonies() then falls back to LIKE.
+    """
     c = conn.cursor()
-    expires_at = (datetime.utcnow() + timedelta(minutes=minutes_valid)).isoformat()
-    c.execute(
-        "INSERT INTO otps (email, otp_code, expires_at, used) VALUES (?, ?, ?, 0);",
-        (email.lower(), otp_code, expires_at),
-    )
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'colonies_fts';")
+    if c.fetchone():
+        return True
+    try:
+        c.execute("""
+            CREATE VIRTUAL TABLE colonies_fts USING fts5(
+                colony_name,
+                content = 'colonies',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            );
+        """)
+    except sqlite3.OperationalError:
+        return False
+
+    c.executescript("""
+        CREATE TRIGGER IF NOT EXISTS colonies_fts_insert AFTER INSERT ON colonies BEGIN
+            INSERT INTO colonies_fts (rowid, colony_name) VALUES (new.id, new.colony_name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS colonies_fts_delete AFTER DELETE ON colonies BEGIN
+            INSERT INTO colonies_fts (colonies_fts, rowid, colony_name)
+            VALUES ('delete', old.id, old.colony_name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS colonies_fts_rename AFTER UPDATE OF colony_name ON colonies BEGIN
+            INSERT INTO colonies_fts (colonies_fts, rowid, colony_name)
+            VALUES ('delete', old.id, old.colony_name);
+            INSERT INTO colonies_fts (rowid, colony_name) VALUES (new.id, new.colony_name);
+        END;
+        INSERT INTO colonies_fts (colonies_fts) VALUES ('rebuild');
+    """)
     conn.commit()
-    conn.close()
+    return True
 
 
-def verify_otp(email: str, otp_code: str) -> bool:
-    conn = get_connection()
+def fts_query(text: str) -> str:
+    """Free text -> FTS5 query: every word must match, as a prefix."""
+    return " ".join(f'"{w}"*' for w in _FTS_TOKEN.findall(text.lower()))
+
+
+def search_colonies(query: str, limit: int = 10, conn=None):
+    """
+    Colonies whose name has every word of `query` (word prefixes, any
+    order, case / accent insensitive), best match first; tombstoned
+    (deleted) colonies are left out. Returns
+    [(colony_name, category, rank)]; lower rank (bm25) is better.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+
+    if conn is None:
+        with get_pool().connection() as conn:
+            return search_colonies(query, limit, conn)
+
     c = conn.cursor()
-    now = datetime.utcnow().isoformat()
-    c.execute(
-        """
-        SELECT id, expires_at, used FROM otps
-        WHERE email = ? AND otp_code = ?
-        ORDER BY id DESC LIMIT 1;
-        """,
-        (email.lower(), otp_code),
-    )
-    row = c.fetchone()
-    if not row:
-        conn.close()
-        return False
+    try:
+        c.execute(
+            """
+            SELECT c.colony_name, c.category, bm25(colonies_fts) AS rank
+            FROM colonies_fts
+            JOIN colonies c ON c.id = colonies_fts.rowid
+            WHERE colonies_fts MATCH ? AND c.deleted = 0
+            ORDER BY rank, c.id
+            LIMIT ?;
+            """,
+            (match, limit),
+        )
+    except sqlite3.OperationalError:
+        # No FTS5 (or no index yet): unindexed substring scan
+        c.execute(
+            """
+            SELECT colony_name, category, 0.0 FROM colonies
+            WHERE colony_name LIKE ? AND deleted = 0 ORDER BY id LIMIT ?;
+            """,
+            (f"%{query.strip()}%", limit),
+        )
+    return c.fetchall()
 
-    otp_id, expires_at_str, used = row
-    if used:
-        conn.close()
-        return False
 
-    if expires_at_str < now:
-        conn.close()
-        return False
+# ---------- OTP HELPERS ----------
 
-    # Mark used
-    c.execute("UPDATE otps SET used = 1 WHERE id = ?;", (otp_id,))
-    conn.commit()
-    conn.close()
-    return True
+def create_otp(email: str, otp_code: str, minutes_valid: int = 10):
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        expires_at = (datetime.utcnow() + timedelta(minutes=minutes_valid)).isoformat()
+        c.execute(
+            "INSERT INTO otps (email, otp_code, expires_at, used) VALUES (?, ?, ?, 0);",
+            (email.lower(), otp_code, expires_at),
+        )
+        conn.commit()
+
+
+def verify_otp(email: str, otp_code: str) -> bool:
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+        c.execute(
+            """
+            SELECT id, expires_at, used FROM otps
+            WHERE email = ? AND otp_code = ?
+            ORDER BY id DESC LIMIT 1;
+            """,
+            (email.lower(), otp_code),
+        )
+        row = c.fetchone()
+        if not row:
+            return False
+
+        otp_id, expires_at_str, used = row
+        if used:
+            return False
+
+        if expires_at_str < now:
+            return False
+
+        # Mark used
+        c.execute("UPDATE otps SET used = 1 WHERE id = ?;", (otp_id,))
+        conn.commit()
+        return True
 
 
 # ---------- VISITOR TRACKING HELPERS ----------
@@ -205,45 +517,44 @@ def touch_visitor(visitor_id: str,
     Create or update a visitor row.
     Called once per session/run from app.py.
     """
-    conn = get_connection()
-    c = conn.cursor()
-    now = datetime.utcnow().isoformat()
-
-    # Insert if not exists
-    c.execute(
-        """
-        INSERT OR IGNORE INTO visitors (
-            visitor_id, first_seen, last_seen, visit_count, device, browser, city, ref_source
-        ) VALUES (?, ?, ?, 1, ?, ?, ?, ?);
-        """,
-        (
-            visitor_id,
-            now,
-            now,
-            device,
-            browser,
-            city,
-            ref_source,
-        ),
-    )
-
-    # If already exists, update last_seen + visit_count + optional fields
-    c.execute(
-        """
-        UPDATE visitors
-        SET last_seen = ?,
-            visit_count = visit_count + 1,
-            device = COALESCE(?, device),
-            browser = COALESCE(?, browser),
-            city = COALESCE(?, city),
-            ref_source = COALESCE(?, ref_source)
-        WHERE visitor_id = ?;
-        """,
-        (now, device, browser, city, ref_source, visitor_id),
-    )
-
-    conn.commit()
-    conn.close()
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+
+        # Insert if not exists
+        c.execute(
+            """
+            INSERT OR IGNORE INTO visitors (
+                visitor_id, first_seen, last_seen, visit_count, device, browser, city, ref_source
+            ) VALUES (?, ?, ?, 1, ?, ?, ?, ?);
+            """,
+            (
+                visitor_id,
+                now,
+                now,
+                device,
+                browser,
+                city,
+                ref_source,
+            ),
+        )
+
+        # If already exists, update last_seen + visit_count + optional fields
+        c.execute(
+            """
+            UPDATE visitors
+            SET last_seen = ?,
+                visit_count = visit_count + 1,
+                device = COALESCE(?, device),
+                browser = COALESCE(?, browser),
+                city = COALESCE(?, city),
+                ref_source = COALESCE(?, ref_source)
+            WHERE visitor_id = ?;
+            """,
+            (now, device, browser, city, ref_source, visitor_id),
+        )
+
+        conn.commit()
 
 
 def log_calc_event(
@@ -263,34 +574,33 @@ def log_calc_event(
     Log one calculation (res/com/DDA) for analytics.
     Can be called for anonymous or logged-in users.
     """
-    conn = get_connection()
-    c = conn.cursor()
-    now = datetime.utcnow().isoformat()
-
-    c.execute(
-        """
-        INSERT INTO calc_events (
-            visitor_id, user_id, event_time,
-            property_type, colony_name, category,
-            consideration, total_govt_duty,
-            device, browser, city, ref_source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """,
-        (
-            visitor_id,
-            user_id,
-            now,
-            property_type,
-            colony_name,
-            category,
-            consideration,
-            total_govt_duty,
-            device,
-            browser,
-            city,
-            ref_source,
-        ),
-    )
-
-    conn.commit()
-    conn.close()
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+
+        c.execute(
+            """
+            INSERT INTO calc_events (
+                visitor_id, user_id, event_time,
+                property_type, colony_name, category,
+                consideration, total_govt_duty,
+                device, browser, city, ref_source
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            (
+                visitor_id,
+                user_id,
+                now,
+                property_type,
+                colony_name,
+                category,
+                consideration,
+                total_govt_duty,
+                device,
+                browser,
+                city,
+                ref_source,
+            ),
+        )
+
+        conn.commit()
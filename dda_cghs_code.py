@@ -1,5 +1,10 @@
 # dda_cghs_code.py
 
+import sys
+
+import bulk_cli
+from duty_schedule import compile_schedule, MUTATION_FEE_ABOVE_50L
+
 # ----------------- CONSTANTS -----------------
 
 # Table 1.3 – minimum built-up rates up to four storeys
@@ -32,9 +37,7 @@ BASE_DUTY_RATES = {
     "male":   0.06
 }
 
-EXTRA_DUTY_THRESHOLD = 2500000   # 25 lakh
-TDS_THRESHOLD        = 5000000   # 50 lakh
-TDS_RATE             = 0.01      # 1% TDS
+# The 25L / 50L thresholds, e-fees and TDS come from duty_schedule.
 
 CONVERSION_FACTOR_YD_TO_M = 0.8361  # 1 sq. yd = 0.8361 sq. m
 
@@ -81,41 +84,117 @@ def calculate_minimum_value(plinth_area_sqm: float,
     return plinth_area_sqm * rate
 
 
-def get_stamp_duty_rate(gender: str, consideration: float) -> float:
+def get_duty_schedule(gender: str):
     """
-    Base rate by gender, +1% if consideration > 25L.
-    female : 4% / 5%
-    joint  : 5% / 6%
-    male   : 6% / 7%
+    Compiled duty schedule (stamp duty + e-fees + TDS) for a buyer.
+    Mutation is 1,136 above 50L for both usages here.
     """
     gender = gender.lower()
     if gender not in BASE_DUTY_RATES:
         raise ValueError("Gender must be 'male', 'female' or 'joint'.")
+    return compile_schedule(BASE_DUTY_RATES[gender], MUTATION_FEE_ABOVE_50L)
 
-    rate = BASE_DUTY_RATES[gender]
-    if consideration > EXTRA_DUTY_THRESHOLD:
-        rate += 0.01
-    return rate
 
+def get_stamp_duty_rate(gender: str, consideration: float) -> float:
+    """
+    Base rate by gender, +1% if consideration > 25L.
+    female : 4% / 5%
+    joint  : 5% / 6%
+    male   : 6% / 7%
+    """
+    return get_duty_schedule(gender).breakdown(consideration)["stamp_rate"]
+
+
+# ----------------- BULK (NON-INTERACTIVE) -----------------
+
+RESULT_FIELDS = [
+    "usage",
+    "area_sqyd",
+    "plinth_area_sqm",
+    "more_than_4_storeys",
+    "gender",
+    "govt_value",
+    "duty_rate_govt",
+    "stamp_govt",
+    "tds_govt",
+    "mutation_govt",
+    "e_fees_govt",
+    "total_govt",
+    "custom_consideration",
+    "duty_rate_custom",
+    "stamp_custom",
+    "tds_custom",
+    "mutation_custom",
+    "e_fees_custom",
+    "total_custom",
+]
+
+
+def calculate_dda_cghs(area_sqyd: float,
+                       usage: str,
+                       building_more_than_4: bool,
+                       gender: str,
+                       custom_consideration: float | None = None) -> dict:
+    """
+    Non-interactive version of run_dda_cghs().
+    Custom-consideration fields are None when no custom value is given.
+    Raises ValueError on invalid input.
+    """
+    if area_sqyd <= 0:
+        raise ValueError("Plinth area must be greater than 0.")
+    if custom_consideration is not None and custom_consideration <= 0:
+        raise ValueError("Consideration must be greater than 0.")
 
-def calculate_stamp_duty(consideration: float, gender: str) -> float:
-    rate = get_stamp_duty_rate(gender, consideration)
-    return consideration * rate
+    schedule = get_duty_schedule(gender)
+    plinth_area_sqm = convert_sq_yards_to_sq_meters(area_sqyd)
+    govt_value = calculate_minimum_value(plinth_area_sqm, building_more_than_4, usage)
+    duty_govt = schedule.breakdown(govt_value)
+
+    result = {
+        "usage": usage.lower(),
+        "area_sqyd": area_sqyd,
+        "plinth_area_sqm": plinth_area_sqm,
+        "more_than_4_storeys": building_more_than_4,
+        "gender": gender.lower(),
+        "govt_value": govt_value,
+        "duty_rate_govt": duty_govt["stamp_rate"],
+        "stamp_govt": duty_govt["stamp_duty"],
+        "tds_govt": duty_govt["tds"],
+        "mutation_govt": duty_govt["mutation"],
+        "e_fees_govt": duty_govt["e_fees"],
+        "total_govt": duty_govt["total"],
+        "custom_consideration": custom_consideration,
+        "duty_rate_custom": None,
+        "stamp_custom": None,
+        "tds_custom": None,
+        "mutation_custom": None,
+        "e_fees_custom": None,
+        "total_custom": None,
+    }
 
+    if custom_consideration is not None:
+        duty_custom = schedule.breakdown(custom_consideration)
+        result.update({
+            "duty_rate_custom": duty_custom["stamp_rate"],
+            "stamp_custom": duty_custom["stamp_duty"],
+            "tds_custom": duty_custom["tds"],
+            "mutation_custom": duty_custom["mutation"],
+            "e_fees_custom": duty_custom["e_fees"],
+            "total_custom": duty_custom["total"],
+        })
 
-def calculate_tds(consideration: float) -> float:
-    return consideration * TDS_RATE if consideration > TDS_THRESHOLD else 0.0
+    return result
 
 
-def calculate_e_fees(consideration: float):
-    """
-    E/MCD fees = 1% of consideration + mutation.
-    Mutation = 1,124 if <= 50L, else 1,136.
-    Returns (total_e_fees, mutation_amount).
-    """
-    mutation = 1136 if consideration > 5000000 else 1124
-    e_fee = consideration * 0.01 + mutation
-    return e_fee, mutation
+def value_row(row: dict) -> dict:
+    """Bulk mode: one CSV/JSONL record -> calculate_dda_cghs() result."""
+    return calculate_dda_cghs(
+        area_sqyd=bulk_cli.float_field(row, "area"),
+        usage=bulk_cli.text_field(row, "usage"),
+        building_more_than_4=bulk_cli.text_field(row, "more_than_4", "no") in ("yes", "y", "true", "1"),
+        gender=bulk_cli.text_field(row, "owner"),
+        custom_consideration=bulk_cli.optional_field(row, "consideration", float),
+    )
 
 
 # ----------------- MAIN RUNNER -----------------
@@ -150,15 +229,17 @@ def run_dda_cghs():
     # 1️⃣ Govt consideration (circle-value)
     try:
         govt_value = calculate_minimum_value(plinth_area_sqm, building_more_than_4, usage)
-        duty_rate_govt = get_stamp_duty_rate(gender, govt_value)
-        stamp_govt = calculate_stamp_duty(govt_value, gender)
-        tds_govt = calculate_tds(govt_value)
-        e_fees_govt, mutation_govt = calculate_e_fees(govt_value)
+        schedule = get_duty_schedule(gender)
     except Exception as e:
         print(f"Error: {e}")
         return
 
-    total_govt = stamp_govt + tds_govt + e_fees_govt
+    duty_govt = schedule.breakdown(govt_value)
+    duty_rate_govt = duty_govt["stamp_rate"]
+    stamp_govt = duty_govt["stamp_duty"]
+    tds_govt = duty_govt["tds"]
+    e_fees_govt, mutation_govt = duty_govt["e_fees"], duty_govt["mutation"]
+    total_govt = duty_govt["total"]
 
     print("\n------ GOVERNMENT (CIRCLE) VALUE ------")
     print(f"Usage type            : {usage.capitalize()}")
@@ -188,11 +269,12 @@ def run_dda_cghs():
             print("Consideration must be greater than 0.")
             return
 
-        duty_rate_custom = get_stamp_duty_rate(gender, custom_consideration)
-        stamp_custom = calculate_stamp_duty(custom_consideration, gender)
-        tds_custom = calculate_tds(custom_consideration)
-        e_fees_custom, mutation_custom = calculate_e_fees(custom_consideration)
-        total_custom = stamp_custom + tds_custom + e_fees_custom
+        duty_custom = schedule.breakdown(custom_consideration)
+        duty_rate_custom = duty_custom["stamp_rate"]
+        stamp_custom = duty_custom["stamp_duty"]
+        tds_custom = duty_custom["tds"]
+        e_fees_custom, mutation_custom = duty_custom["e_fees"], duty_custom["mutation"]
+        total_custom = duty_custom["total"]
 
         print("\n------ CUSTOM CONSIDERATION ------")
         print(f"Consideration value   : ₹{custom_consideration:,.2f}")
@@ -212,7 +294,10 @@ def run_dda_cghs():
     print("\nCalculation finished.")
 
 
-print("FILE LOADED SUCCESSFULLY")
-
 if  __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(bulk_cli.main(
+            sys.argv[1:], value_row, RESULT_FIELDS,
+            "Bulk DDA/CGHS valuation (CSV/JSONL in, one result row per flat out).",
+        ))
     run_dda_cghs()
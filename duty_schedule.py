@@ -0,0 +1,148 @@
+# ================================================
+# duty_schedule.py – Govt duty as a piecewise-linear function
+# Stamp duty + e-fees (1% + mutation) + TDS, by consideration
+# ================================================
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+EXTRA_DUTY_THRESHOLD = 2_500_000  # +1% stamp duty above 25 lakh
+TDS_THRESHOLD = 5_000_000  # 1% TDS (and higher mutation) above 50 lakh
+EXTRA_DUTY_RATE = 0.01
+E_FEE_RATE = 0.01
+TDS_RATE = 0.01
+MUTATION_FEE = 1124
+MUTATION_FEE_ABOVE_50L = 1136
+
+
+class DutySchedule:
+    """
+    Total govt duty for one buyer type, compiled into segments.
+
+    Segments are [0, 25L], (25L, 50L], (50L, inf); on each one
+    total = v * slope + mutation. Components are computed the same way
+    as _calc() (v * rate, v * 1% + mutation, v * 1%), so results are
+    bit-identical to the procedural version.
+
+    Scalars stay plain Python floats; NumPy arrays are evaluated
+    element-wise. Either way each item costs O(1).
+    """
+
+    def __init__(self, base_rate: float, mutation_above_50l: int = MUTATION_FEE_ABOVE_50L):
+        self.base_rate = base_rate
+        self.breakpoints = (EXTRA_DUTY_THRESHOLD, TDS_THRESHOLD)
+        self.stamp_rates = (base_rate, base_rate + EXTRA_DUTY_RATE, base_rate + EXTRA_DUTY_RATE)
+        self.tds_rates = (0.0, 0.0, TDS_RATE)
+        self.mutations = (MUTATION_FEE, MUTATION_FEE, mutation_above_50l)
+        self.slopes = tuple(
+            s + E_FEE_RATE + t for s, t in zip(self.stamp_rates, self.tds_rates)
+        )
+        self._arrays = None
+
+    def __repr__(self):
+        return (
+            f"DutySchedule(base_rate={self.base_rate!r}, "
+            f"mutation_above_50l={self.mutations[2]!r})"
+        )
+
+    def _np(self):
+        if self._arrays is None:
+            self._arrays = tuple(
+                np.array(x)
+                for x in (self.stamp_rates, self.tds_rates, self.mutations, self.slopes)
+            )
+        return self._arrays
+
+    # ---------- forward ----------
+
+    def segment(self, consideration):
+        """0, 1 or 2: which side of the 25L / 50L breakpoints."""
+        lo, hi = self.breakpoints
+        if isinstance(consideration, np.ndarray):
+            return (consideration > lo).astype(np.intp) + (consideration > hi)
+        # int(): NumPy scalar bools would add up as logical OR
+        return int(consideration > lo) + int(consideration > hi)
+
+    def breakdown(self, consideration) -> dict:
+        """stamp_rate, stamp_duty, mutation, e_fees, tds and total."""
+        seg = self.segment(consideration)
+        if isinstance(consideration, np.ndarray):
+            stamp_rates, tds_rates, mutations, _ = self._np()
+        else:
+            stamp_rates, tds_rates, mutations = self.stamp_rates, self.tds_rates, self.mutations
+
+        rate = stamp_rates[seg]
+        mutation = mutations[seg]
+        stamp = consideration * rate
+        e_fees = consideration * E_FEE_RATE + mutation
+        tds = consideration * tds_rates[seg]
+        return {
+            "stamp_rate": rate,
+            "stamp_duty": stamp,
+            "mutation": mutation,
+            "e_fees": e_fees,
+            "tds": tds,
+            "total": stamp + e_fees + tds,
+        }
+
+    def total(self, consideration):
+        return self.breakdown(consideration)["total"]
+
+    # ---------- inverse ----------
+
+    def max_consideration(self, budget):
+        """
+        Largest consideration whose total duty fits in `budget`.
+
+        Solved per segment in closed form, v = (budget - mutation) / slope,
+        from the top segment down. A budget that lands in the jump at a
+        breakpoint returns the breakpoint itself. 0.0 if even the
+        mutation fee is not covered.
+        """
+        if isinstance(budget, np.ndarray):
+            return self._max_consideration_array(budget)
+
+        lows = (0.0,) + self.breakpoints
+        highs = self.breakpoints + (math.inf,)
+        for seg in (2, 1, 0):
+            slope, mutation = self.slopes[seg], self.mutations[seg]
+            lo, hi = lows[seg], highs[seg]
+            v = min((budget - mutation) / slope, hi)
+            if v > lo or (seg == 0 and v >= 0):
+                return self._tighten(v, budget, lo, hi)
+        return 0.0
+
+    def _tighten(self, v, budget, lo, hi):
+        # The closed form is exact in real numbers; float rounding can
+        # leave total(v) an ulp or two over budget, so nudge down.
+        for _ in range(8):
+            if v <= lo or self.total(v) <= budget:
+                break
+            v = math.nextafter(v, -math.inf)
+        return v
+
+    def _max_consideration_array(self, budget):
+        _, _, mutations, slopes = self._np()
+        lows = np.array((0.0,) + self.breakpoints)
+        highs = np.array(self.breakpoints + (np.inf,))
+
+        out = np.zeros(budget.shape)
+        done = np.zeros(budget.shape, dtype=bool)
+        for seg in (2, 1, 0):
+            v = np.minimum((budget - mutations[seg]) / slopes[seg], highs[seg])
+            ok = ~done & ((v > lows[seg]) | ((seg == 0) & (v >= 0)))
+            out[ok] = v[ok]
+            done |= ok
+
+        for _ in range(8):
+            over = self.total(out) > budget
+            out = np.where(over & (out > 0), np.nextafter(out, -np.inf), out)
+        return out
+
+
+@lru_cache(maxsize=64)
+def compile_schedule(base_rate: float, mutation_above_50l: int = MUTATION_FEE_ABOVE_50L) -> DutySchedule:
+    """Shared DutySchedule per (base rate, mutation) pair."""
+    return DutySchedule(base_rate, mutation_above_50l)
@@ -0,0 +1,235 @@
+# ================================================
+# event_logger.py – Buffered, non-blocking analytics event writer
+# A worker thread bulk-inserts batches; the UI thread only enqueues.
+# EventDedupe keeps Streamlit reruns from logging the same event again
+# ================================================
+
+import atexit
+import hashlib
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+DEFAULT_MAXSIZE = 10_000
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds an event may wait for a batch
+DEFAULT_SHED_AT = 0.8  # queue fill ratio above which low-priority events are dropped
+
+# Queue markers: write the partial batch now / and then exit
+_FLUSH = object()
+_STOP = object()
+
+
+class EventLogger:
+    """
+    Bounded in-memory queue drained by one daemon thread.
+
+    log() never blocks: the event is queued, or dropped and counted when
+    the queue is full. Above `shed_at` of capacity low-priority events
+    are shed first, so a backlog keeps the important ones. The worker
+    calls `insert_batch(rows)` once per batch, when `batch_size` events
+    are waiting or the oldest has waited `flush_interval` seconds.
+    Pending events are flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        insert_batch,
+        maxsize=DEFAULT_MAXSIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        shed_at=DEFAULT_SHED_AT,
+    ):
+        self._insert_batch = insert_batch
+        self._queue = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._shed_above = int(maxsize * shed_at)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self.counters = {
+            "queued": 0,
+            "written": 0,
+            "dropped": 0,
+            "shed": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="event-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def log(self, row: dict, low_priority: bool = False) -> bool:
+        """Queue one event row; False if it was shed or dropped."""
+        if self._closed:
+            self._count("dropped")
+            return False
+        if low_priority and self._queue.qsize() >= self._shed_above:
+            self._count("shed")
+            return False
+        try:
+            with self._lock:
+                self._queue.put_nowait(row)
+                self._in_flight += 1
+                self.counters["queued"] += 1
+        except queue.Full:
+            self._count("dropped")
+            return False
+        return True
+
+    def _write(self, batch):
+        try:
+            self._insert_batch(batch)
+            self._count("written", len(batch))
+        except Exception as e:
+            # Never let a logging failure reach the app
+            self._count("failed", len(batch))
+            print("EVENT LOG ERROR:", e)
+        with self._lock:
+            self.counters["batches"] += 1
+            self._in_flight -= len(batch)
+            self._idle.notify_all()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            marker = item is _FLUSH or item is _STOP
+            if item is not None and not marker:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (len(batch) >= self.batch_size or due or marker):
+                self._write(batch)
+                batch = []
+                deadline = None
+            if item is _STOP:
+                return
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every queued event is written (or failed)."""
+        try:
+            # Don't let a partial batch sit out its flush_interval
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass  # a full queue drains in whole batches anyway
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._in_flight:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Write what is pending and stop the worker (idempotent)."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "pending": self._in_flight}
+
+
+# -------------------------------------------------
+# PER-SESSION DEDUPE / SAMPLING
+# -------------------------------------------------
+
+@dataclass(frozen=True)
+class EventPolicy:
+    """
+    window: seconds during which a repeat of the same (event, key) is
+    dropped; None = once per session, 0 = never deduped.
+    sample: fraction of distinct events kept (decided once per key).
+    """
+
+    window: float | None = 0
+    sample: float = 1.0
+
+
+# Streamlit reruns the whole script on every widget change; these events
+# fire on each rerun, so only the first per visit / per result counts
+EVENT_POLICIES = {
+    "visit": EventPolicy(window=None),
+    "visit_home": EventPolicy(window=30 * 60),
+    "result_viewed": EventPolicy(window=None),  # keyed by the result
+}
+DEFAULT_POLICY = EventPolicy()
+
+# Keys remembered per session; the oldest are forgotten first
+MAX_SEEN_KEYS = 512
+
+
+class EventDedupe:
+    """
+    One per session (kept in st.session_state). admit() says whether an
+    event should be persisted, going by its type's EventPolicy.
+    Sampling hashes the session id with the event key, so a rerun of
+    the same event gets the same answer instead of a fresh coin flip.
+    """
+
+    def __init__(self, session_id: str, policies=None, clock=time.monotonic):
+        self.session_id = session_id
+        self.policies = EVENT_POLICIES if policies is None else policies
+        self._clock = clock
+        self._seen = {}  # (event_type, key) -> time last admitted
+        self.counters = {"admitted": 0, "deduped": 0, "sampled_out": 0}
+
+    def policy(self, event_type: str) -> EventPolicy:
+        return self.policies.get(event_type, DEFAULT_POLICY)
+
+    def _sampled(self, event_type, key, rate):
+        if rate >= 1:
+            return True
+        h = hashlib.blake2b(
+            f"{self.session_id}\0{event_type}\0{key}".encode(), digest_size=8
+        )
+        return int.from_bytes(h.digest(), "big") / 2**64 < rate
+
+    def admit(self, event_type: str, key="") -> bool:
+        policy = self.policy(event_type)
+        ident = (event_type, str(key))
+        now = self._clock()
+        if policy.window != 0 and ident in self._seen:
+            if policy.window is None or now - self._seen[ident] < policy.window:
+                self.counters["deduped"] += 1
+                return False
+        if not self._sampled(event_type, ident[1], policy.sample):
+            # Remembered too, so the dedupe window applies to it as well
+            self._remember(ident, now, policy)
+            self.counters["sampled_out"] += 1
+            return False
+        self._remember(ident, now, policy)
+        self.counters["admitted"] += 1
+        return True
+
+    def _remember(self, ident, now, policy):
+        if policy.window == 0:
+            return
+        self._seen.pop(ident, None)
+        self._seen[ident] = now
+        while len(self._seen) > MAX_SEEN_KEYS:
+            del self._seen[next(iter(self._seen))]
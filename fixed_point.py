@@ -0,0 +1,217 @@
+# ================================================
+# fixed_point.py – Integer-paise calculation mode
+# Same formulas as _calc / calc_batch, in exact int64 arithmetic
+# ================================================
+#
+# ROUNDING POLICY
+#
+# Money is held as integer paise, areas as integer hundredths of a
+# square metre, rates as integer basis points. Every product is exact;
+# rounding happens only at these points:
+#
+#   1. Inputs: sq. yd -> sq. m with the float path's own
+#      round(y * 0.8361, 2), taken as 0.01 sq. m units; custom
+#      consideration to 1 paisa (round-to-nearest of the entered value).
+#   2. Land share, construction value, parking: one division each,
+#      half-up to 1 paisa (storey split and age multiplier folded in
+#      exactly).
+#   3. Stamp duty, e-fee percentage, TDS: final * bps / 10000, half-up
+#      to 1 paisa.
+#   4. Display: ceil to whole rupees (ceil_rupees), as the UI does.
+#
+# The area is quantized exactly where _calc() quantizes it, on purpose:
+# an exact half-up of yd100 * 8361 / 10000 disagrees with round() on the
+# binary product at .005 sq. m ties (~1 row in 1,000), and 0.01 sq. m
+# times a circle rate is worth up to ~₹8,000 of consideration. With the
+# shared step 1, total_payable agrees with the float path to within 2
+# paise (measured over 1M random rows). Results are still identical on
+# every platform: step 1 is IEEE arithmetic plus a correctly rounded
+# round(), and there is no float anywhere after it.
+
+import numpy as np
+
+import batch_engine
+from calc_engine import (
+    age_multiplier,
+    convert_sq_yards_to_sq_meters,
+    duty_schedule_for,
+    rate_stage,
+)
+from duty_schedule import (
+    EXTRA_DUTY_THRESHOLD,
+    TDS_THRESHOLD,
+    E_FEE_RATE,
+    TDS_RATE,
+    MUTATION_FEE,
+    MUTATION_FEE_ABOVE_50L,
+)
+
+BPS = 10_000
+E_FEE_BPS = round(E_FEE_RATE * BPS)
+TDS_BPS = round(TDS_RATE * BPS)
+EXTRA_DUTY_PAISE = EXTRA_DUTY_THRESHOLD * 100
+TDS_PAISE = TDS_THRESHOLD * 100
+
+# [owner code, duty segment] stamp rates, in basis points
+STAMP_BPS_TABLE = np.rint(batch_engine.STAMP_RATE_TABLE * BPS).astype(np.int64)
+AGE_TENTHS = np.rint(batch_engine.AGE_MULTIPLIERS * 10).astype(np.int64)
+
+
+def div_half_up(num, den):
+    """num / den rounded half-up, for non-negative ints or int arrays."""
+    return (2 * num + den) // (2 * den)
+
+
+def ceil_rupees(paise):
+    return -(-paise // 100)
+
+
+def _scalar_where(cond, a, b):
+    return a if cond else b
+
+
+def _paise_core(
+    circle_rate,
+    con_rate,
+    land_m100,
+    area_m100,
+    age_tenths,
+    with_const,
+    with_parking,
+    total_storey,
+    user_storey,
+    custom_paise,
+    stamp_bps,
+    mutation_above_50l,
+    where,
+):
+    # Shared by the scalar and int64-array paths; `where` picks branches
+    # rupees/sq. m x hundredths of a sq. m = paise
+    land_user = div_half_up(circle_rate * land_m100 * user_storey, total_storey)
+
+    construction = where(
+        with_const, div_half_up(con_rate * area_m100 * age_tenths * user_storey, 10), 0
+    )
+    parking = where(
+        with_const & with_parking,
+        div_half_up(land_m100 * con_rate * user_storey, total_storey),
+        0,
+    )
+
+    auto = land_user + construction + parking
+    final = where(custom_paise > 0, custom_paise, auto)
+
+    above_50l = final > TDS_PAISE
+    seg = 1 * (final > EXTRA_DUTY_PAISE) + above_50l  # 1 *: no bool-array OR
+    rate_bps = stamp_bps(seg)
+    stamp = div_half_up(final * rate_bps, BPS)
+    mutation = where(above_50l, mutation_above_50l, MUTATION_FEE) * 100
+    e_fees = div_half_up(final * E_FEE_BPS, BPS) + mutation
+    tds = where(above_50l, div_half_up(final * TDS_BPS, BPS), 0)
+
+    return {
+        "land_area_m100": land_m100,
+        "auto_consideration": auto,
+        "final_consideration": final,
+        "stamp_rate_bps": rate_bps,
+        "stamp_duty": stamp,
+        "mutation": mutation,
+        "e_fees": e_fees,
+        "tds": tds,
+        "total_payable": stamp + e_fees + tds,
+        "land_value_user": land_user,
+        "construction_value": construction,
+        "parking_cost": parking,
+    }
+
+
+def calc_paise(
+    property_type,
+    land_area_yards,
+    category,
+    owner,
+    include_const,
+    parking,
+    total_storey,
+    user_storey,
+    constructed_area,
+    year_built,
+    custom_cons,
+    colony_name=None,
+):
+    """
+    _calc() in integer paise (see ROUNDING POLICY above).
+
+    Returns the numeric _calc() keys as ints: money in paise,
+    land_area_m100 in hundredths of a sq. m, stamp_rate_bps in basis
+    points.
+    """
+    rates = rate_stage(property_type, category, colony_name)
+    schedule = duty_schedule_for(owner, property_type)
+    bps = tuple(round(r * BPS) for r in schedule.stamp_rates)
+
+    return _paise_core(
+        circle_rate=round(rates["circle_rate"]),
+        con_rate=round(rates["con_rate"]),
+        land_m100=round(convert_sq_yards_to_sq_meters(land_area_yards) * 100),
+        area_m100=round(convert_sq_yards_to_sq_meters(constructed_area) * 100),
+        age_tenths=round(age_multiplier(year_built) * 10),
+        with_const=include_const == "yes",
+        with_parking=parking == "yes",
+        total_storey=int(total_storey),
+        user_storey=int(user_storey),
+        custom_paise=round(custom_cons * 100),
+        stamp_bps=lambda seg: bps[seg],
+        mutation_above_50l=schedule.mutations[2],
+        where=_scalar_where,
+    )
+
+
+def calc_batch_paise(
+    property_type,
+    land_area_yards,
+    category,
+    owner,
+    include_const="no",
+    parking="no",
+    total_storey=1,
+    user_storey=1,
+    constructed_area=0.0,
+    year_built=2000,
+    custom_cons=0,
+    colony_name=None,
+    rates=None,
+):
+    """calc_paise() over columns, in int64. Arguments as calc_batch()."""
+    cat_code = batch_engine.encode(category, batch_engine.CATEGORY_KEYS)
+    if (cat_code < 0).any():
+        bad = np.asarray(category).ravel()[np.flatnonzero(cat_code < 0)[0]]
+        raise KeyError(bad)
+    owner_code = batch_engine.encode(
+        owner, batch_engine.OWNER_KEYS, missing=len(batch_engine.OWNER_KEYS)
+    )
+    circle, con = rates if rates is not None else batch_engine.rate_arrays(property_type)
+    circle, con, rate_code = batch_engine.with_colony_rates(
+        property_type, circle, con, cat_code, colony_name
+    )
+
+    def to_int(values, scale=1):
+        return np.rint(np.asarray(values, dtype=np.float64) * scale).astype(np.int64)
+
+    return _paise_core(
+        circle_rate=to_int(circle)[rate_code],
+        con_rate=to_int(con)[rate_code],
+        land_m100=to_int(batch_engine.sq_yards_to_sq_meters(land_area_yards), 100),
+        area_m100=to_int(batch_engine.sq_yards_to_sq_meters(constructed_area), 100),
+        age_tenths=AGE_TENTHS[batch_engine.age_band_array(year_built)],
+        with_const=batch_engine.yes_flags(include_const),
+        with_parking=batch_engine.yes_flags(parking),
+        total_storey=np.asarray(total_storey, dtype=np.int64),
+        user_storey=np.asarray(user_storey, dtype=np.int64),
+        custom_paise=to_int(custom_cons, 100),
+        stamp_bps=lambda seg: STAMP_BPS_TABLE[owner_code, seg.astype(np.intp)],
+        mutation_above_50l=(
+            MUTATION_FEE_ABOVE_50L if property_type == "Residential" else MUTATION_FEE
+        ),
+        where=np.where,
+    )
@@ -0,0 +1,242 @@
+# ================================================
+# parallel_engine.py – Multi-core portfolio valuation
+# Shards batch_engine work over a ProcessPoolExecutor
+# ================================================
+
+import argparse
+import inspect
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import batch_engine
+from calc_engine import (
+    colony_rates,
+    set_colony_rates,
+    circlerates_res,
+    construction_rates_res,
+    circlerates_com,
+    construction_rates_com,
+    AREA_CATEGORY_RATES,
+    UNIFORM_RATES_MORE_THAN_4,
+)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# calc_batch() output keys that are just the inputs echoed back.
+# Workers drop them and the parent rebuilds them from the columns it
+# already holds, which keeps result pickles (IPC) to the computed values.
+ECHO_FIELDS = {
+    "property_type": None,
+    "colony_name": "colony_name",
+    "land_area_yards": "land_area_yards",
+    "owner": "owner",
+    "include_const": "include_const",
+    "parking": "parking",
+    "total_storey": "total_storey",
+    "user_storey": "user_storey",
+    "constructed_area": "constructed_area",
+    "year_built": "year_built",
+    "custom_consideration": "custom_cons",
+    "timestamp": None,
+}
+CALC_DEFAULTS = {
+    name: p.default
+    for name, p in inspect.signature(batch_engine.calc_batch).parameters.items()
+}
+
+# -------------------------------------------------
+# WORKER SIDE
+# -------------------------------------------------
+
+# Filled once per worker process by _init_worker()
+_worker_rates = {}
+
+
+def rate_tables():
+    """Rate dicts shipped to every worker once, at pool start-up."""
+    return {
+        "circlerates_res": circlerates_res,
+        "construction_rates_res": construction_rates_res,
+        "circlerates_com": circlerates_com,
+        "construction_rates_com": construction_rates_com,
+        "AREA_CATEGORY_RATES": AREA_CATEGORY_RATES,
+        "UNIFORM_RATES_MORE_THAN_4": UNIFORM_RATES_MORE_THAN_4,
+        "colony_rates": colony_rates(),
+    }
+
+
+def _init_worker(tables):
+    _worker_rates["Residential"] = batch_engine.build_rate_arrays(
+        tables["circlerates_res"], tables["construction_rates_res"]
+    )
+    _worker_rates["Commercial"] = batch_engine.build_rate_arrays(
+        tables["circlerates_com"], tables["construction_rates_com"]
+    )
+    _worker_rates["dda"] = batch_engine.build_dda_rate_arrays(
+        tables["AREA_CATEGORY_RATES"], tables["UNIFORM_RATES_MORE_THAN_4"]
+    )
+    set_colony_rates(tables["colony_rates"])
+
+
+def _run_chunk(kind, columns):
+    """Value one shard; returns (result, pid, rows, seconds)."""
+    start = time.perf_counter()
+    if kind == "dda":
+        out = batch_engine.dda_batch(**columns, rates=_worker_rates["dda"])
+    else:
+        out = batch_engine.calc_batch(kind, **columns, rates=_worker_rates[kind])
+        out = {k: v for k, v in out.items() if k not in ECHO_FIELDS}
+    rows = len(next(iter(out.values())))
+    return out, os.getpid(), rows, time.perf_counter() - start
+
+
+# -------------------------------------------------
+# PARENT SIDE
+# -------------------------------------------------
+
+def _num_rows(columns):
+    sizes = {len(v) for v in columns.values() if np.ndim(v) > 0}
+    if len(sizes) > 1:
+        raise ValueError("All array columns must have the same length.")
+    return sizes.pop() if sizes else 1
+
+
+def iter_chunks(columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Slice a dict of columns into shards; scalars are passed as-is."""
+    n = _num_rows(columns)
+    for start in range(0, n, chunk_size):
+        stop = start + chunk_size
+        yield {
+            k: (v[start:stop] if np.ndim(v) > 0 else v)
+            for k, v in columns.items()
+        }
+
+
+def iter_parallel(kind, chunks, workers=None, stats=None):
+    """
+    Value an iterable of column shards on a process pool.
+
+    Yields results in input order. At most 2 x workers shards are in
+    flight, so a streaming source never gets fully materialized.
+    Per-worker counters are accumulated into `stats` (pid -> dict).
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {} if stats is None else stats
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(rate_tables(),),
+    ) as pool:
+        pending = deque()
+
+        def collect():
+            out, pid, rows, seconds = pending.popleft().result()
+            s = stats.setdefault(pid, {"chunks": 0, "rows": 0, "seconds": 0.0})
+            s["chunks"] += 1
+            s["rows"] += rows
+            s["seconds"] += seconds
+            return out
+
+        for chunk in chunks:
+            pending.append(pool.submit(_run_chunk, kind, chunk))
+            if len(pending) >= 2 * workers:
+                yield collect()
+        while pending:
+            yield collect()
+
+
+def parallel_valuation(kind, columns, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Value a whole portfolio across cores.
+
+    `kind` is 'Residential', 'Commercial' (calc_batch columns) or 'dda'
+    (dda_batch columns). Returns (merged result columns, report); the
+    result has the same keys as the single-process call, and an empty
+    portfolio gives empty columns, as calc_batch() does.
+    """
+    n = _num_rows(columns)
+    stats = {}
+    start = time.perf_counter()
+    if n == 0:
+        # No shards to hand out; the in-process call has the right keys
+        if kind == "dda":
+            merged = batch_engine.dda_batch(**columns)
+        else:
+            merged = batch_engine.calc_batch(kind, **columns)
+    else:
+        parts = list(iter_parallel(kind, iter_chunks(columns, chunk_size), workers, stats))
+        merged = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    wall = time.perf_counter() - start
+
+    if kind != "dda":
+        for key, source in ECHO_FIELDS.items():
+            if key == "property_type":
+                value = kind
+            elif key == "timestamp":
+                value = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                value = columns.get(source, CALC_DEFAULTS[source])
+            merged[key] = np.broadcast_to(np.asarray(value), n)
+
+    report = {
+        "rows": n,
+        "wall_seconds": wall,
+        "rows_per_sec": n / wall if wall else float("inf"),
+        "workers": {
+            pid: {**s, "rows_per_sec": s["rows"] / s["seconds"] if s["seconds"] else 0.0}
+            for pid, s in stats.items()
+        },
+    }
+    return merged, report
+
+
+def format_report(report):
+    lines = [
+        f"{report['rows']:,} rows in {report['wall_seconds']:.2f}s "
+        f"({report['rows_per_sec']:,.0f} rows/sec overall)"
+    ]
+    for pid, s in sorted(report["workers"].items()):
+        lines.append(
+            f"  worker {pid}: {s['chunks']} chunks, {s['rows']:,} rows, "
+            f"{s['rows_per_sec']:,.0f} rows/sec"
+        )
+    return "\n".join(lines)
+
+
+# -------------------------------------------------
+# SYNTHETIC RUN (python parallel_engine.py --rows 5000000)
+# -------------------------------------------------
+
+def synthetic_columns(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    total = rng.integers(1, 5, rows)
+    return {
+        "land_area_yards": rng.uniform(25, 500, rows).round(1),
+        "category": rng.choice(np.array(batch_engine.CATEGORY_KEYS), rows),
+        "owner": rng.choice(np.array(batch_engine.OWNER_KEYS), rows),
+        "include_const": rng.choice(np.array(["yes", "no"]), rows),
+        "parking": rng.choice(np.array(["yes", "no"]), rows),
+        "total_storey": total,
+        "user_storey": rng.integers(1, total + 1),
+        "constructed_area": rng.uniform(25, 500, rows).round(1),
+        "year_built": rng.integers(1950, 2025, rows),
+        "custom_cons": np.zeros(rows),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel valuation throughput run.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    cols = synthetic_columns(args.rows)
+    _, rep = parallel_valuation("Residential", cols, args.workers, args.chunk_size)
+    print(format_report(rep))
@@ -1,8 +1,53 @@
+import argparse
 import csv
+import hashlib
+import inspect
+import json
+import os
 import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import colonies
+from colonies import canonical_key, source_key
 
 RAW_FILE = "raw_colonies.txt"
 OUT_FILE = "colonies.csv"
+CACHE_FILE = "colonies.parsecache"
+REPORT_FILE = "colonies_report.tsv"
+
+# Bump when check_line() / is_header_line() or the merge rules change:
+# drops every cached block and forces colonies.csv to be rewritten
+PARSER_VERSION = 3
+
+def normalizer_digest() -> str:
+    """Hash of canonical_key() and its tables; decides which rows are duplicates."""
+    steps = (colonies.plain_key, colonies.expanded_key, canonical_key)
+    try:
+        code = "".join(inspect.getsource(fn) for fn in steps)
+    except (OSError, TypeError):  # no source shipped
+        code = "".join(fn.__code__.co_code.hex() for fn in steps)
+    h = hashlib.blake2b(digest_size=8)
+    for part in (
+        code,
+        repr(sorted(colonies.ABBREVIATIONS.items())),
+        repr(sorted(colonies.ROMAN_NUMERALS.items())),
+        colonies._NON_ALNUM.pattern,
+        colonies._SERIAL.pattern,
+        colonies._DROPPED.pattern,
+    ):
+        h.update(part.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+# Editing the normalizer changes this without a manual bump
+CACHE_VERSION = f"{PARSER_VERSION}-{normalizer_digest()}"
+
+# Content-defined blocks: a block ends after a line whose CRC hits the
+# mask (~1 in BLOCK_TARGET_LINES lines), so inserting or editing a line
+# only changes the block it lands in, not every block after it.
+BLOCK_TARGET_LINES = 256
+BLOCK_MAX_LINES = 4096
 
 def is_header_line(line: str) -> bool:
     """Return True if the line is a header/separator we should ignore."""
@@ -19,60 +64,299 @@ def is_header_line(line: str) -> bool:
         return True
     return False
 
-def parse_line(line: str):
+def check_line(line: str):
     """
     Parse a single line like:
     'Aali    H'
     'Lado Sarai Extn  F'
-    into (colony_name, category).
+    into ((colony_name, category), None), or (None, reason) if it is
+    not a colony row. Reason is None for header-like lines.
     """
     line = line.strip()
     if not line:
-        return None
+        return None, None
 
     # Split based on last whitespace group
     parts = line.rsplit(None, 1)
     if len(parts) != 2:
-        return None
+        return None, "no category column"
 
     name, cat = parts[0].strip(), parts[1].strip().upper()
 
     # Skip if cat is clearly not a category letter
     if cat in ("CAT.", "CATEGORY", "CAT"):
-        return None
+        return None, None
     if not re.fullmatch(r"[A-H]", cat):
-        return None
+        return None, f"category {parts[1]!r} is not A-H"
+
+    return (name, cat), None
+
+def parse_line(line: str):
+    """(colony_name, category) of a line, or None."""
+    return check_line(line)[0]
+
+# -------------------------------------------------
+# BLOCK CACHE
+# -------------------------------------------------
+
+def iter_blocks(lines):
+    """Yield (first line number, [lines]) blocks, reading lazily."""
+    block = []
+    start = 1
+    for n, line in enumerate(lines, start=1):
+        if not block:
+            start = n
+        block.append(line)
+        cut = zlib.crc32(line.encode("utf-8")) % BLOCK_TARGET_LINES == 0
+        if cut or len(block) >= BLOCK_MAX_LINES:
+            yield start, block
+            block = []
+    if block:
+        yield start, block
+
+def block_digest(lines) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{CACHE_VERSION}\n".encode())
+    for line in lines:
+        h.update(line.encode("utf-8"))
+    return h.hexdigest()
+
+def parse_block(lines) -> dict:
+    """Rows ([offset in block, name, category]) and rejects ([offset, reason, text])."""
+    rows, rejects = [], []
+    for i, raw_line in enumerate(lines):
+        if is_header_line(raw_line):
+            continue
+        parsed, reason = check_line(raw_line)
+        if parsed:
+            rows.append((i, *parsed))
+        elif reason:
+            rejects.append((i, reason, raw_line.strip()))
+    return {"rows": rows, "rejects": rejects}
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache
+
+def save_cache(path, cache):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+
+def parse_file(raw_file, cache, used, stats):
+    """
+    Stream the (line number, name, category) rows and (line number,
+    reason, text) rejects of a raw file as ("row", ...) / ("reject", ...)
+    items, in file order. Blocks whose digest is in `cache` are not
+    re-parsed; every block seen is added to `used`.
+    """
+    with open(raw_file, encoding="utf-8") as f:
+        for start, lines in iter_blocks(f):
+            digest = block_digest(lines)
+            result = cache.get(digest)
+            if result is None:
+                result = parse_block(lines)
+                stats["parsed_blocks"] += 1
+            else:
+                stats["cached_blocks"] += 1
+            used[digest] = result
+            items = [("row", r) for r in result["rows"]]
+            items += [("reject", r) for r in result["rejects"]]
+            for kind, (i, a, b) in sorted(items, key=lambda item: item[1][0]):
+                yield kind, (start + i, a, b)
+
+# -------------------------------------------------
+# MULTI-FILE INGEST
+# -------------------------------------------------
 
-    return name, cat
+# Filled once per worker process by _init_worker()
+_worker_cache = {}
 
-def main():
-    colonies = []
-    with open(RAW_FILE, encoding="utf-8") as f:
-        for raw_line in f:
-            if is_header_line(raw_line):
-                continue
-            parsed = parse_line(raw_line)
-            if parsed:
-                colonies.append(parsed)
+def _init_worker(cache):
+    _worker_cache.update(cache)
 
-    # Remove duplicates while preserving order
+def parse_source(raw_file, cache):
+    """
+    Parse one whole file (in a worker). Returns (raw_file, items,
+    blocks, stats); `blocks` maps every digest seen to its result, or
+    to None when `cache` already had it, to keep the pickle small.
+    """
+    start = time.perf_counter()
+    used = {}
+    stats = {"parsed_blocks": 0, "cached_blocks": 0}
+    items = list(parse_file(raw_file, cache, used, stats))
+    blocks = {d: None if d in cache else r for d, r in used.items()}
+    stats["seconds"] = time.perf_counter() - start
+    return raw_file, items, blocks, stats
+
+def _parse_in_worker(raw_file):
+    return parse_source(raw_file, _worker_cache)
+
+def iter_sources(raw_files, cache, workers=1):
+    """
+    Yield (raw_file, items, blocks, stats) per file, in `raw_files`
+    order whatever order the workers finish in. With one worker (or
+    one file) files are parsed lazily in-process, and `items` streams.
+    """
+    if workers <= 1 or len(raw_files) <= 1:
+        for raw_file in raw_files:
+            used = {}
+            stats = {"parsed_blocks": 0, "cached_blocks": 0}
+            yield raw_file, parse_file(raw_file, cache, used, stats), used, stats
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(cache,)
+    ) as pool:
+        yield from pool.map(_parse_in_worker, raw_files)
+
+def expand_sources(paths):
+    """Files as given; a directory stands for its *.txt files, sorted."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.endswith(".txt")
+            )
+        else:
+            files.append(path)
+    return files
+
+def main(raw_files=(RAW_FILE,), out_file=OUT_FILE, cache_file=CACHE_FILE,
+         report_file=REPORT_FILE, workers=1):
+    if isinstance(raw_files, str):
+        raw_files = [raw_files]
+    raw_files = expand_sources(raw_files)
+    cache = load_cache(cache_file)
+    blocks = cache.get("blocks", {})
+    used = {}
+    sequence = []  # block digests in output order
+    per_file = []
+
+    # Remove duplicates (incl. variant spellings) while preserving order:
+    # files in the order given, rows in file order. Rows with different
+    # source serials are different colonies, whatever their name. The
+    # first file to
+    # list a colony wins: a later file giving another category is
+    # reported and its row left out; within one file both rows are kept
+    # (and reported). Rows are written as they arrive, not collected.
     seen = set()
-    cleaned = []
-    for name, cat in colonies:
-        key = (name.lower(), cat)
-        if key not in seen:
-            seen.add(key)
-            cleaned.append((name, cat))
-
-    print(f"Parsed {len(cleaned)} colony rows.")
-
-    # Write to CSV
-    with open(OUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
+    first_cat = {}  # canonical key -> (file, name, category) first seen
+    kept = rejected = conflicts = 0
+    tmp_out = f"{out_file}.tmp"
+    with open(tmp_out, "w", newline="", encoding="utf-8") as out, \
+            open(report_file, "w", newline="", encoding="utf-8") as rep:
+        writer = csv.writer(out)
         writer.writerow(["colony_name", "category"])
-        writer.writerows(cleaned)
+        report = csv.writer(rep, delimiter="\t")
+        report.writerow(["file", "line", "problem", "text"])
+
+        for raw_file, items, file_blocks, stats in iter_sources(raw_files, blocks, workers):
+            start = time.perf_counter()
+            rows = 0
+            for kind, item in items:
+                if kind == "reject":
+                    report.writerow((raw_file, *item))
+                    rejected += 1
+                    continue
+                line_no, name, cat = item
+                key = canonical_key(name)
+                if (source_key(name), cat) in seen:
+                    continue
+                seen.add((source_key(name), cat))
+                first = first_cat.setdefault(key, (raw_file, name, cat))
+                if first[2] != cat:
+                    where = "" if first[0] == raw_file else f" in {first[0]}"
+                    report.writerow([
+                        raw_file,
+                        line_no,
+                        f"category conflict with {first[1]} ({first[2]}){where}",
+                        f"{name} ({cat})",
+                    ])
+                    conflicts += 1
+                    if where:
+                        continue
+                writer.writerow((name, cat))
+                rows += 1
+
+            # In-process sources parse while being consumed above
+            stats.setdefault("seconds", time.perf_counter() - start)
+            for digest, result in file_blocks.items():
+                used[digest] = blocks[digest] if result is None else result
+            sequence += list(file_blocks)
+            per_file.append({"file": raw_file, "rows": rows, **stats})
+            kept += rows
+
+    # Same blocks as last time -> same output: leave the CSV (and its mtime)
+    # untouched
+    run_digest = block_digest(sequence)
+    if cache.get("output") == [out_file, run_digest] and os.path.exists(out_file):
+        os.remove(tmp_out)
+        written = False
+    else:
+        os.replace(tmp_out, out_file)
+        written = True
+    save_cache(cache_file, {
+        "version": CACHE_VERSION,
+        "output": [out_file, run_digest],
+        "blocks": used,
+    })
+
+    for f in per_file:
+        print(f"  {f['file']}: {f['rows']} new rows, {f['parsed_blocks']} blocks parsed, "
+              f"{f['cached_blocks']} cached, {f['seconds'] * 1000:.1f} ms")
+    parsed = sum(f["parsed_blocks"] for f in per_file)
+    cached = sum(f["cached_blocks"] for f in per_file)
+    print(f"Parsed {kept} colony rows from {len(per_file)} file(s) "
+          f"({parsed} blocks parsed, {cached} cached).")
+    if rejected or conflicts:
+        print(f"{rejected} lines rejected, {conflicts} category conflicts: see {report_file}")
+    print(f"Written to {out_file}" if written else f"{out_file} is up to date")
 
-    print(f"Written to {OUT_FILE}")
+    # Names the ColonyIndex will refuse to resolve, aliases included
+    rows = colonies.read_colonies_csv(out_file)
+    names = {name for name, _ in rows}
+    aliases = []
+    for alias, name in colonies.read_aliases_csv():
+        if name in names:
+            aliases.append((alias, name))
+        else:
+            print(f"Alias {alias!r} points to {name!r}, which is not in {out_file}")
+    index = colonies.ColonyIndex(rows, aliases)
+    if index.conflicts:
+        print(f"{len(index.conflicts)} ambiguous colony keys (not resolved in lookups):")
+        print(index.conflict_report())
+    return {
+        "rows": kept,
+        "rejected": rejected,
+        "conflicts": conflicts,
+        "ambiguous_keys": len(index.conflicts),
+        "parsed_blocks": parsed,
+        "cached_blocks": cached,
+        "files": per_file,
+    }
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Parse raw colony lists into colonies.csv.")
+    parser.add_argument("raw_files", nargs="*", default=[RAW_FILE],
+                        help="raw text exports (or directories of *.txt), merged in order")
+    parser.add_argument("-o", "--output", default=OUT_FILE)
+    parser.add_argument("--cache", default=CACHE_FILE)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="parser processes (default: one per CPU)")
+    args = parser.parse_args()
+    main(args.raw_files, args.output, args.cache, args.report, args.workers)
@@ -0,0 +1,165 @@
+# ================================================
+# quote_cache.py – Process-wide LRU cache of quotes
+# Memoizes calc_engine._calc for repeated inputs
+# ================================================
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import calc_engine
+
+DEFAULT_MAXSIZE = 2048
+
+# _calc() keys that just echo the caller's inputs. A hit re-fills them
+# from the actual call so output matches a fresh _calc() exactly.
+ECHO_KEYS = {
+    "property_type": "property_type",
+    "colony_name": "colony_name",
+    "land_area_yards": "land_area_yards",
+    "category": "category",
+    "owner": "owner",
+    "include_const": "include_const",
+    "parking": "parking",
+    "total_storey": "total_storey",
+    "user_storey": "user_storey",
+    "constructed_area": "constructed_area",
+    "year_built": "year_built",
+    "custom_consideration": "custom_cons",
+}
+
+
+def rates_fingerprint():
+    """Changes whenever any rate table used by _calc() is edited."""
+    return hash(
+        tuple(
+            tuple(table.items())
+            for table in (
+                calc_engine.stampdutyrates,
+                calc_engine.circlerates_res,
+                calc_engine.construction_rates_res,
+                calc_engine.circlerates_com,
+                calc_engine.construction_rates_com,
+            )
+        )
+        + (calc_engine.colony_rates().fingerprint,)
+    )
+
+
+def normalize_key(
+    property_type,
+    land_area_yards,
+    category,
+    owner,
+    include_const,
+    parking,
+    total_storey,
+    user_storey,
+    constructed_area,
+    year_built,
+    custom_cons,
+    colony_name=None,
+):
+    """
+    Cache key for a _calc() call.
+
+    Colony name only matters through its rate override (colonies
+    without one share their category's entries), and without
+    construction the parking / constructed area / year inputs are
+    ignored by _calc(), so those are left out. Numbers compare by
+    value (50 == 50.0).
+    """
+    with_const = include_const == "yes"
+    return (
+        property_type,
+        land_area_yards,
+        category,
+        calc_engine.colony_rates().rows.get(colony_name),
+        owner,
+        with_const,
+        parking == "yes" if with_const else None,
+        total_storey,
+        user_storey,
+        constructed_area if with_const else None,
+        year_built if with_const else None,
+        custom_cons,
+    )
+
+
+class QuoteCache:
+    """Thread-safe, size-bounded LRU of _calc() results."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = rates_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_rates(self):
+        fp = rates_fingerprint()
+        if fp != self._fingerprint:
+            # _calc() reads category rates from pairs built by
+            # set_colony_rates(); bring those up to date too
+            calc_engine.reload_rate_tables()
+            self._data.clear()
+            self._fingerprint = fp
+            self.invalidations += 1
+
+    def calculate(self, compute=None, **kwargs) -> dict:
+        """
+        Same contract as _calc(), served from cache when possible.
+        `compute` replaces _calc() on a miss (e.g. a StagedCalculator).
+        """
+        key = normalize_key(**kwargs)
+
+        with self._lock:
+            self._check_rates()
+            cached = self._data.get(key)
+            if cached is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if cached is not None:
+            res = dict(cached)
+            res["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for out_key, arg in ECHO_KEYS.items():
+                res[out_key] = kwargs.get(arg)
+            return res
+
+        res = (compute or calc_engine._calc)(**kwargs)
+
+        with self._lock:
+            self._data[key] = dict(res)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return res
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# One cache per process: Streamlit re-runs app.py but keeps imported
+# modules, so every session and rerun shares this instance.
+QUOTES = QuoteCache()
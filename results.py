@@ -0,0 +1,183 @@
+# ================================================
+# results.py – Compact calculation results
+# One slotted record per quote, one columnar block per batch
+# ================================================
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# _calc() keys, in _calc() order
+RESULT_FIELDS = (
+    "timestamp",
+    "property_type",
+    "colony_name",
+    "land_area_yards",
+    "land_area_m",
+    "category",
+    "owner",
+    "include_const",
+    "parking",
+    "total_storey",
+    "user_storey",
+    "constructed_area",
+    "year_built",
+    "auto_consideration",
+    "custom_consideration",
+    "final_consideration",
+    "stamp_rate",
+    "stamp_duty",
+    "mutation",
+    "e_fees",
+    "tds",
+    "total_payable",
+    "land_value_user",
+    "construction_value",
+    "parking_cost",
+)
+
+# history table column -> result field (see save_history_to_db)
+HISTORY_COLUMNS = {
+    "colony_name": "colony_name",
+    "property_type": "property_type",
+    "category": "category",
+    "consideration": "final_consideration",
+    "stamp_duty": "stamp_duty",
+    "e_fees": "e_fees",
+    "tds": "tds",
+    "total_govt_duty": "total_payable",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class QuoteResult:
+    """
+    One _calc() result without a per-instance dict.
+
+    Supports res["stamp_duty"] as well as res.stamp_duty, so code
+    written against the dict (render_summary_block, save_history_to_db)
+    works unchanged. to_dict() gives back the exact _calc() dict.
+    """
+
+    timestamp: str
+    property_type: str
+    colony_name: str | None
+    land_area_yards: float
+    land_area_m: float
+    category: str
+    owner: str
+    include_const: str
+    parking: str
+    total_storey: int
+    user_storey: int
+    constructed_area: float
+    year_built: int
+    auto_consideration: float
+    custom_consideration: float
+    final_consideration: float
+    stamp_rate: float
+    stamp_duty: float
+    mutation: int
+    e_fees: float
+    tds: float
+    total_payable: float
+    land_value_user: float
+    construction_value: float
+    parking_cost: float
+
+    @classmethod
+    def from_dict(cls, res: dict) -> "QuoteResult":
+        return cls(*(res[k] for k in RESULT_FIELDS))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self):
+        return RESULT_FIELDS
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in RESULT_FIELDS}
+
+    def history_row(self) -> dict:
+        return {col: getattr(self, f) for col, f in HISTORY_COLUMNS.items()}
+
+
+class ResultBatch:
+    """
+    Columnar results: one array per field instead of one dict per row.
+
+    Wraps calc_batch() / parallel_valuation() output as-is. Rows come
+    back as QuoteResult with plain Python values, and to_frame() gives
+    the DataFrame with the same columns as pd.DataFrame(list_of_dicts).
+    """
+
+    __slots__ = ("columns", "size")
+
+    def __init__(self, columns: dict):
+        missing = [k for k in RESULT_FIELDS if k not in columns]
+        if missing:
+            raise KeyError(f"Missing result columns: {missing}")
+        sizes = {len(columns[k]) for k in RESULT_FIELDS}
+        if len(sizes) > 1:
+            raise ValueError("All result columns must have the same length.")
+        self.columns = {k: np.asarray(columns[k]) for k in RESULT_FIELDS}
+        self.size = sizes.pop()
+
+    @classmethod
+    def from_records(cls, records) -> "ResultBatch":
+        """From _calc() dicts or QuoteResult records."""
+        rows = list(records)
+        return cls({k: _column([r[k] for r in rows]) for k in RESULT_FIELDS})
+
+    @classmethod
+    def from_frame(cls, df) -> "ResultBatch":
+        return cls({k: df[k].to_numpy() for k in RESULT_FIELDS})
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i) -> QuoteResult:
+        return QuoteResult(*(_plain(self.columns[k][i]) for k in RESULT_FIELDS))
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def column(self, key):
+        return self.columns[key]
+
+    def to_dicts(self) -> list:
+        return [r.to_dict() for r in self]
+
+    def to_frame(self):
+        import pandas as pd
+
+        # Object columns stay object, so None is not turned into NaN
+        return pd.DataFrame(
+            {
+                k: pd.Series(v, dtype=object) if v.dtype == object else v
+                for k, v in self.columns.items()
+            },
+            columns=list(RESULT_FIELDS),
+        )
+
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers (object columns: pointers only)."""
+        return sum(a.nbytes for a in self.columns.values())
+
+
+def _column(values):
+    # Typed array when every value has the same plain type; otherwise
+    # object, so e.g. an int custom_consideration is not turned into float
+    kinds = {type(v) for v in values}
+    if len(kinds) == 1 and kinds <= {int, float, str, bool}:
+        return np.array(values)
+    return np.array(values, dtype=object)
+
+
+def _plain(value):
+    # NumPy scalars -> the Python type _calc() would have produced
+    return value.item() if isinstance(value, np.generic) else value
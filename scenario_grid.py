@@ -0,0 +1,69 @@
+# ================================================
+# scenario_grid.py – "What if" sweeps over _calc inputs
+# Cartesian product of parameter axes in one batch_engine pass
+# ================================================
+
+import math
+
+import numpy as np
+
+import batch_engine
+
+# The storey split is one axis of (user_storey, total_storey) pairs,
+# since the two only make sense together.
+STOREY_SPLIT = ("user_storey", "total_storey")
+
+
+def _axis_columns(axes):
+    """
+    Lay every axis along its own dimension: axis d becomes an array of
+    shape (1, ..., len, ..., 1). A tuple key is a zipped axis whose
+    values are tuples, one item per parameter name.
+    """
+    names = list(axes)
+    columns = {}
+    for d, name in enumerate(names):
+        shape = [1] * len(names)
+        shape[d] = -1
+        values = list(axes[name])
+        params = name if isinstance(name, tuple) else (name,)
+        if not isinstance(name, tuple):
+            values = [(v,) for v in values]
+        if not values:
+            raise ValueError(f"Axis {name!r} has no values.")
+        for param, col in zip(params, zip(*values)):
+            if param in columns:
+                raise ValueError(f"Parameter {param!r} appears on two axes.")
+            columns[param] = np.asarray(col).reshape(shape)
+    return columns
+
+
+def sweep(property_type, axes, rates=None, **fixed):
+    """
+    Value every combination of the `axes` values in one call.
+
+        sweep("Residential",
+              {"category": ["F", "G"],
+               "owner": ["female", "joint"],
+               STOREY_SPLIT: [(1, 1), (2, 4)]},
+              land_area_yards=100, include_const="yes",
+              constructed_area=100, year_built=1995)
+
+    `axes` maps a calc_batch() argument (or a tuple of them) to the
+    values to try; `fixed` holds the arguments that stay the same.
+    Returns calc_batch() columns flattened to one row per scenario,
+    first axis varying slowest, so pd.DataFrame(result) is a tidy table.
+
+    Each axis sits on its own array dimension, so a stage is only
+    evaluated over the axes it depends on: land value is computed once
+    per area x category x storey split and reused for every owner, and
+    only the duty step runs over the full grid.
+    """
+    columns = _axis_columns(axes)
+    clash = set(columns) & set(fixed)
+    if clash:
+        raise ValueError(f"Parameters both swept and fixed: {sorted(clash)}")
+
+    out = batch_engine.calc_batch(property_type, **columns, **fixed, rates=rates)
+    size = math.prod(len(v) for v in axes.values())
+    return {k: np.ascontiguousarray(v).reshape(size) for k, v in out.items()}
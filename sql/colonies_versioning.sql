@@ -0,0 +1,35 @@
+-- ================================================
+-- colonies_versioning.sql – Change watermark for the colonies table
+-- Run once in the Supabase SQL editor.
+--
+-- Every insert / update stamps updated_at, and deletes become
+-- tombstones (deleted = true), so app processes can fetch just the
+-- rows changed since their last watermark (see colony_cache.py).
+--
+-- The stamp is clock_timestamp(), the time of the write itself, not
+-- now() (the transaction start): a long transaction would otherwise
+-- commit rows stamped well below watermarks clients have already
+-- seen. Rows still land a little below it when the commit itself is
+-- slow, so ColonyCache re-reads a commit window under its watermark.
+-- ================================================
+
+alter table colonies
+    add column if not exists updated_at timestamptz not null default clock_timestamp(),
+    add column if not exists deleted boolean not null default false;
+
+-- Tables set up by an earlier version of this script
+alter table colonies alter column updated_at set default clock_timestamp();
+
+create index if not exists colonies_updated_at_idx on colonies (updated_at);
+
+create or replace function colonies_touch_updated_at() returns trigger as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists colonies_touch_updated_at on colonies;
+create trigger colonies_touch_updated_at
+    before insert or update on colonies
+    for each row execute function colonies_touch_updated_at();
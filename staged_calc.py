@@ -0,0 +1,64 @@
+# ================================================
+# staged_calc.py – Incremental _calc with per-stage caching
+# Re-runs only the stages whose dependencies changed
+# ================================================
+
+from calc_engine import CALC_STAGES, stage_inputs, assemble_result
+from quote_cache import rates_fingerprint
+
+
+def _fingerprint(args):
+    # Type-aware, so 50 -> 50.0 still re-runs and outputs keep _calc()'s types
+    return tuple((type(v), v) for v in args.values())
+
+
+class StagedCalculator:
+    """
+    Stateful _calc() for one form (e.g. one Streamlit tab).
+
+    Every stage in calc_engine.CALC_STAGES remembers the dependency
+    values it last ran with. On calculate() a stage is re-run only if
+    one of them changed, so changing just the owner re-runs only the
+    duty stage. Upstream outputs are compared by value, so a stage is
+    also skipped when an upstream change did not alter what it reads
+    (e.g. a custom consideration hides land / construction edits from
+    the duty stage).
+
+    `recomputes` counts actual runs per stage name. Cached outputs are
+    dropped whenever the rate tables change.
+    """
+
+    def __init__(self, stages=CALC_STAGES):
+        self.stages = tuple(stages)
+        self.dependencies = {name: stage_inputs(fn) for name, fn in self.stages}
+        self.recomputes = {name: 0 for name, _ in self.stages}
+        self._last_args = {}
+        self._last_out = {}
+        self._rates = rates_fingerprint()
+
+    def calculate(self, **inputs) -> dict:
+        """Same contract as _calc()."""
+        rates = rates_fingerprint()
+        if rates != self._rates:
+            self.invalidate()
+            self._rates = rates
+
+        inputs.setdefault("colony_name", None)
+        values = dict(inputs)
+        for name, fn in self.stages:
+            args = {k: values[k] for k in self.dependencies[name]}
+            key = _fingerprint(args)
+            if name not in self._last_out or key != self._last_args[name]:
+                self._last_out[name] = fn(**args)
+                self._last_args[name] = key
+                self.recomputes[name] += 1
+            values.update(self._last_out[name])
+        return assemble_result(inputs, values)
+
+    def invalidate(self):
+        """Forget cached stage outputs (e.g. after a rate table edit)."""
+        self._last_args.clear()
+        self._last_out.clear()
+
+    def stats(self) -> dict:
+        return dict(self.recomputes)
@@ -0,0 +1,293 @@
+# ================================================
+# storage.py – One storage interface, Supabase or local SQLite behind it
+# Users, OTPs, colonies, history and events for app.py / admin_app.py
+# ================================================
+
+import re
+import threading
+from abc import ABC, abstractmethod
+
+import database
+
+SUPABASE = "supabase"
+SQLITE = "sqlite"
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# SQLite keeps booleans as 0 / 1; given back as bool like Supabase does
+BOOL_COLUMNS = {"is_verified", "used", "deleted"}
+
+
+def _ident(name: str) -> str:
+    if not _IDENT.match(name):
+        raise ValueError(f"bad table / column name: {name!r}")
+    return name
+
+
+def _as_rows(rows):
+    return [rows] if isinstance(rows, dict) else list(rows)
+
+
+def _require_match(op, table, match):
+    # An empty match would hit every row of the table
+    if not match:
+        raise ValueError(f"{op} on {table!r} needs a non-empty match")
+    return match
+
+
+class StorageBackend(ABC):
+    """
+    What the apps need from a database.
+
+    A backend implements four table operations; `match` is a dict of
+    column == value conditions, `since` a (column, value) pair for
+    column >= value:
+
+        select(table, columns="*", match=None, since=None, order=None,
+               desc=False, limit=None) -> [row dicts]
+        insert(table, rows) -> int      # a dict or a list, one round trip
+        update(table, values, match) -> None    # match must not be empty
+        delete(table, match) -> None            # match must not be empty
+
+    The domain methods below are written once on top of them, so both
+    backends behave the same.
+    """
+
+    name = None
+
+    @abstractmethod
+    def select(self, table, columns="*", match=None, since=None, order=None,
+               desc=False, limit=None):
+        ...
+
+    @abstractmethod
+    def insert(self, table, rows):
+        ...
+
+    @abstractmethod
+    def update(self, table, values, match):
+        ...
+
+    @abstractmethod
+    def delete(self, table, match):
+        ...
+
+    def write(self, entry: dict):
+        """Apply one queued {"table", "op", "values", "match"} write."""
+        if entry["op"] == "insert":
+            return self.insert(entry["table"], entry["values"])
+        return self.update(entry["table"], entry["values"], entry["match"])
+
+    def close(self):
+        pass
+
+    # ---------- USERS ----------
+
+    def get_user(self, email=None, username=None):
+        match = {"email": email.lower()} if email else {"username": username.lower()}
+        rows = self.select(
+            "users", "id, email, username, password_hash, is_verified", match=match
+        )
+        return rows[0] if rows else None
+
+    def create_user(self, row: dict):
+        self.insert("users", row)
+        return self.get_user(email=row["email"])
+
+    # ---------- OTPS ----------
+
+    def latest_otp(self, email, otp_code, purpose):
+        rows = self.select(
+            "otps",
+            "id, used, expires_at",
+            match={"email": email.lower(), "otp_code": otp_code, "purpose": purpose},
+            order="id",
+            desc=True,
+            limit=1,
+        )
+        return rows[0] if rows else None
+
+    # ---------- COLONIES ----------
+
+    def colony_rows(self, since=None):
+        """Colonies rows, or only those changed at/after `since` (incl. tombstones)."""
+        return self.select(
+            "colonies",
+            since=None if since is None else ("updated_at", since),
+            order="colony_name",
+        )
+
+    def colony_watermark(self):
+        """Newest colonies.updated_at: the cheap "anything changed?" probe."""
+        rows = self.select("colonies", "updated_at", order="updated_at", desc=True, limit=1)
+        return rows[0]["updated_at"] if rows else None
+
+    def add_colony(self, row: dict, revive=False):
+        """Insert a colony, or bring back the tombstone of a deleted one."""
+        if revive:
+            self.update("colonies", {**row, "deleted": False}, {"colony_name": row["colony_name"]})
+        else:
+            self.insert("colonies", row)
+
+    def delete_colony(self, colony_name):
+        # A tombstone, so running apps see the delete in their next delta
+        self.update("colonies", {"deleted": True}, {"colony_name": colony_name})
+
+    # ---------- HISTORY ----------
+
+    def user_history(self, user_id, columns="*"):
+        return self.select(
+            "history", columns, match={"user_id": user_id}, order="created_at", desc=True
+        )
+
+
+# -------------------------------------------------
+# SUPABASE
+# -------------------------------------------------
+
+class SupabaseBackend(StorageBackend):
+    """PostgREST via supabase-py; the client is created on first use."""
+
+    name = SUPABASE
+
+    def __init__(self, url, key):
+        self._url = url
+        self._key = key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from supabase import create_client
+
+                self._client = create_client(self._url, self._key)
+            return self._client
+
+    def select(self, table, columns="*", match=None, since=None, order=None,
+               desc=False, limit=None):
+        query = self.client.table(table).select(columns)
+        for col, val in (match or {}).items():
+            query = query.eq(col, val)
+        if since is not None:
+            query = query.gte(*since)
+        if order:
+            query = query.order(order, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data or []
+
+    def insert(self, table, rows):
+        rows = _as_rows(rows)
+        if rows:
+            self.client.table(table).insert(rows).execute()
+        return len(rows)
+
+    def update(self, table, values, match):
+        query = self.client.table(table).update(values)
+        for col, val in _require_match("update", table, match).items():
+            query = query.eq(col, val)
+        query.execute()
+
+    def delete(self, table, match):
+        query = self.client.table(table).delete()
+        for col, val in _require_match("delete", table, match).items():
+            query = query.eq(col, val)
+        query.execute()
+
+
+# -------------------------------------------------
+# SQLITE
+# -------------------------------------------------
+
+class SqliteBackend(StorageBackend):
+    """
+    Single-file local database (schema from database.init_db()).
+    Every operation borrows a WAL connection from database.get_pool(),
+    so sessions read concurrently and queue only for writes.
+    """
+
+    name = SQLITE
+
+    def __init__(self, path=None):
+        self.path = path or database.DB_NAME
+        database.init_db(self.path)
+        self._pool = database.get_pool(self.path)
+
+    @staticmethod
+    def _where(match=None, since=None):
+        clauses = [f"{_ident(col)} = ?" for col in (match or {})]
+        params = [int(v) if isinstance(v, bool) else v for v in (match or {}).values()]
+        if since is not None:
+            clauses.append(f"{_ident(since[0])} >= ?")
+            params.append(since[1])
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    @staticmethod
+    def _row(names, row):
+        out = dict(zip(names, row))
+        for col in BOOL_COLUMNS.intersection(out):
+            if out[col] is not None:
+                out[col] = bool(out[col])
+        return out
+
+    def select(self, table, columns="*", match=None, since=None, order=None,
+               desc=False, limit=None):
+        if columns != "*":
+            columns = ", ".join(_ident(col.strip()) for col in columns.split(","))
+        where, params = self._where(match, since)
+        sql = f"SELECT {columns} FROM {_ident(table)}{where}"
+        if order:
+            sql += f" ORDER BY {_ident(order)}{' DESC' if desc else ''}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._pool.connection() as conn:
+            cur = conn.execute(sql, params)
+            names = [d[0] for d in cur.description]
+            return [self._row(names, r) for r in cur.fetchall()]
+
+    def insert(self, table, rows):
+        rows = _as_rows(rows)
+        if not rows:
+            return 0
+        cols = list(rows[0])
+        sql = (
+            f"INSERT INTO {_ident(table)} ({', '.join(map(_ident, cols))}) "
+            f"VALUES ({', '.join('?' * len(cols))})"
+        )
+        # One transaction for the whole batch
+        with self._pool.connection() as conn, conn:
+            conn.executemany(sql, ([row.get(c) for c in cols] for row in rows))
+        return len(rows)
+
+    def update(self, table, values, match):
+        sets = ", ".join(f"{_ident(col)} = ?" for col in values)
+        where, params = self._where(_require_match("update", table, match))
+        with self._pool.connection() as conn, conn:
+            conn.execute(
+                f"UPDATE {_ident(table)} SET {sets}{where}", [*values.values(), *params]
+            )
+
+    def delete(self, table, match):
+        where, params = self._where(_require_match("delete", table, match))
+        with self._pool.connection() as conn, conn:
+            conn.execute(f"DELETE FROM {_ident(table)}{where}", params)
+
+    def close(self):
+        self._pool.close()
+
+
+def open_storage(config) -> StorageBackend:
+    """
+    Backend named by config["STORAGE_BACKEND"] ("supabase", the default,
+    or "sqlite" with optional SQLITE_PATH). `config` is st.secrets or
+    any mapping with the same keys.
+    """
+    kind = str(config.get("STORAGE_BACKEND", SUPABASE)).lower()
+    if kind == SQLITE:
+        return SqliteBackend(config.get("SQLITE_PATH"))
+    if kind == SUPABASE:
+        return SupabaseBackend(config["SUPABASE_URL"], config["SUPABASE_KEY"])
+    raise ValueError(f"unknown STORAGE_BACKEND {kind!r} (use supabase or sqlite)")
@@ -0,0 +1,312 @@
+# ================================================
+# supabase_guard.py – Timeouts, circuit breaker and offline write queue
+# Keeps the calculator usable when Supabase is slow or down
+# ================================================
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+DEFAULT_TIMEOUT = 5.0  # seconds per call
+DEFAULT_FAILURE_THRESHOLD = 3  # consecutive failures that trip the breaker
+DEFAULT_RESET_AFTER = 30.0  # seconds open before one trial call is let through
+DEFAULT_WORKERS = 8
+PENDING_WRITES_FILE = "pending_writes.jsonl"
+MAX_REPLAY_ATTEMPTS = 5  # for writes the backend rejects (not outages)
+DEFAULT_REPLAY_INTERVAL = 10.0  # seconds between background replays
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailable(Exception):
+    """The call was not made (breaker open) or did not finish in time."""
+
+
+class CircuitOpen(BackendUnavailable):
+    """The breaker is open: the call was never made."""
+
+
+class CallTimeout(BackendUnavailable):
+    """No answer in time; the request may still have been applied."""
+
+
+def _httpx_errors(*names):
+    try:
+        import httpx  # what supabase-py talks over
+    except ImportError:
+        return ()
+    return tuple(getattr(httpx, name) for name in names)
+
+
+# The request cannot have reached Supabase: safe to queue and send again
+UNSENT_ERRORS = (CircuitOpen, ConnectionRefusedError) + _httpx_errors("ConnectError")
+
+# Outages in general, including timeouts and dropped connections, where
+# a write may or may not have landed. Anything else (bad column,
+# constraint) would fail the same way on replay.
+TRANSIENT_ERRORS = (BackendUnavailable, OSError) + _httpx_errors("TransportError")
+
+
+def retry_safe(op: str, error: BaseException) -> bool:
+    """
+    Whether a write `op` ("insert" / "update") that failed with `error`
+    can be queued and sent again without risk of applying it twice.
+    An update just sets the same values again; an insert that timed out
+    may already be in the table, so only one that was never sent is.
+    """
+    if isinstance(error, UNSENT_ERRORS):
+        return True
+    return op == "update" and isinstance(error, TRANSIENT_ERRORS)
+
+
+class SupabaseGuard:
+    """
+    Shared wrapper for every Supabase call.
+
+    call(fn) runs fn() on a small thread pool and waits at most
+    `timeout` seconds for it; a call that overruns is abandoned (its
+    thread finishes in the background) and counts as a failure.
+    After `failure_threshold` failures in a row the breaker opens:
+    calls fail fast with BackendUnavailable for `reset_after` seconds,
+    then a single trial call decides whether it closes again.
+    """
+
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_after=DEFAULT_RESET_AFTER,
+        workers=DEFAULT_WORKERS,
+        clock=time.monotonic,
+    ):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="supabase")
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self.counters = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "trips": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_after:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def degraded(self) -> bool:
+        return self.state != CLOSED
+
+    @property
+    def accepting(self) -> bool:
+        """Whether call() would be let through now (closed, or a half-open trial)."""
+        with self._lock:
+            if self._state != OPEN:
+                return True
+            return (
+                self._clock() - self._opened_at >= self.reset_after
+                and not self._trial_running
+            )
+
+    def _admit(self):
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_after or self._trial_running:
+                    self.counters["rejected"] += 1
+                    return False
+                self._trial_running = True
+            self.counters["calls"] += 1
+            return True
+
+    def _record(self, ok):
+        with self._lock:
+            self._trial_running = False
+            if ok:
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self.counters["failures"] += 1
+            self._failures += 1
+            if self._state == OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.counters["trips"] += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def call(self, fn, timeout=None, name="supabase call"):
+        """fn()'s result, or BackendUnavailable / fn's own exception."""
+        if not self._admit():
+            raise CircuitOpen(f"{name}: Supabase unavailable (circuit open)")
+        future = self._pool.submit(fn)
+        try:
+            result = future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.counters["timeouts"] += 1
+            self._record(False)
+            raise CallTimeout(f"{name}: no answer within {timeout or self.timeout:g}s")
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "consecutive_failures": self._failures}
+
+
+# -------------------------------------------------
+# OFFLINE WRITE QUEUE
+# -------------------------------------------------
+
+class WriteQueue:
+    """
+    Inserts/updates that could not reach Supabase, appended to a local
+    JSONL file so they survive a restart. replay(apply) re-sends them
+    oldest first and stops as soon as Supabase is unavailable again;
+    start_replay() does that from a background thread. Only writes that
+    are safe to repeat later belong here (history, events, last_login);
+    auth writes must fail loudly instead.
+    """
+
+    def __init__(self, path=PENDING_WRITES_FILE):
+        self.path = path
+        self._lock = threading.Lock()  # guards the file
+        self._replaying = threading.Lock()  # one replay at a time
+        self._stop = threading.Event()
+        self._thread = None
+
+    def push(self, table: str, op: str, values, match=None):
+        """Queue `op` ("insert" / "update") of `values`; update needs `match`."""
+        entry = {"table": table, "op": op, "values": values, "match": match or {}}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(self._line(entry))
+
+    @staticmethod
+    def _line(entry):
+        return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+    def _read(self, start=0):
+        """(entries from byte offset `start` on, offset of the end)."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                data = f.read()
+        except FileNotFoundError:
+            return [], start
+        entries = []
+        for line in data.decode("utf-8").splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # torn last line from a crash mid-write
+        return entries, start + len(data)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._read()[0])
+
+    def replay(self, apply, limit=None) -> int:
+        """
+        apply(entry) each queued write in order; returns how many went
+        through. Stops at the first outage (TRANSIENT_ERRORS). The
+        entry it stopped at stays queued if retry_safe(); an insert
+        whose outcome is unknown (e.g. timed out) goes to
+        `<path>.failed` instead of risking a duplicate row. A write the
+        backend itself rejects is retried on later replays, then moved
+        to `<path>.failed` after MAX_REPLAY_ATTEMPTS so it cannot block
+        the queue.
+
+        The file lock is held only to take the snapshot and to write the
+        result back, never during apply(); writes pushed in the meantime
+        are kept after the ones still pending. Returns 0 at once if
+        another thread is already replaying.
+        """
+        if not self._replaying.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                entries, end = self._read()
+            if not entries:
+                return 0
+            done = rejected = 0
+            rest, dead = [], []
+            for i, entry in enumerate(entries):
+                if limit is not None and done >= limit:
+                    rest += entries[i:]
+                    break
+                try:
+                    apply(entry)
+                except TRANSIENT_ERRORS as e:
+                    print("WRITE REPLAY STOPPED:", e)
+                    if retry_safe(entry["op"], e):
+                        rest += entries[i:]
+                    else:
+                        entry["outcome"] = f"unknown: {e}"
+                        dead.append(entry)
+                        rejected += 1
+                        rest += entries[i + 1:]
+                    break
+                except Exception as e:
+                    print("WRITE REPLAY ERROR:", e)
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                    rejected += 1
+                    (dead if entry["attempts"] >= MAX_REPLAY_ATTEMPTS else rest).append(entry)
+                    continue
+                done += 1
+            if not done and not rejected:
+                return 0  # nothing changed; leave the file as it is
+            with self._lock:
+                rest += self._read(end)[0]
+                if dead:
+                    with open(f"{self.path}.failed", "a", encoding="utf-8") as f:
+                        f.writelines(self._line(e) for e in dead)
+                if rest:
+                    tmp = f"{self.path}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.writelines(self._line(e) for e in rest)
+                    os.replace(tmp, self.path)
+                else:
+                    os.remove(self.path)
+            return done
+        finally:
+            self._replaying.release()
+
+    def start_replay(self, apply, ready=lambda: True,
+                     interval=DEFAULT_REPLAY_INTERVAL, limit=None):
+        """
+        replay(apply, limit) every `interval` seconds on a daemon thread,
+        whenever something is queued and ready() is true (e.g. the
+        breaker is closed). Calling it again while running does nothing.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    if os.path.exists(self.path) and ready():
+                        self.replay(apply, limit)
+                except Exception as e:
+                    print("WRITE REPLAY ERROR:", e)
+
+        self._thread = threading.Thread(target=run, name="write-replay", daemon=True)
+        self._thread.start()
+
+    def stop_replay(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
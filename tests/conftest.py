@@ -0,0 +1,11 @@
+# ================================================
+# tests/conftest.py – Make the flat top-level modules importable
+#
+#   python -m pytest tests
+# ================================================
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
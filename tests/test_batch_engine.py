@@ -0,0 +1,81 @@
+# ================================================
+# tests/test_batch_engine.py – calc_batch() is bit-identical to _calc()
+# ================================================
+
+import numpy as np
+import pytest
+
+import calc_engine
+from batch_engine import CATEGORY_KEYS, OWNER_KEYS, calc_batch
+from calc_engine import EffectiveRates, _calc
+
+N = 5_000
+
+COLONIES = [None, "Not Overridden", "Const Only", "Both"]
+OVERRIDES = [
+    {"colony_name": "Const Only", "category": "C", "res_const_rate": 30000},
+    {"colony_name": "Both", "category": "E", "res_land_rate": 200000,
+     "com_land_rate": 410000, "com_const_rate": 25000},
+]
+
+NUMERIC = (
+    "land_area_m", "auto_consideration", "final_consideration", "stamp_rate",
+    "stamp_duty", "mutation", "e_fees", "tds", "total_payable",
+    "land_value_user", "construction_value", "parking_cost",
+)
+
+
+@pytest.fixture(autouse=True)
+def colony_rates():
+    previous = calc_engine.colony_rates()
+    calc_engine.set_colony_rates(EffectiveRates(OVERRIDES))
+    yield
+    calc_engine.set_colony_rates(previous)
+
+
+def random_parcels(seed):
+    rng = np.random.default_rng(seed)
+    total = rng.integers(1, 6, N)
+    custom = rng.integers(1, 10**8, N).astype(np.float64)
+    return dict(
+        land_area_yards=np.round(rng.uniform(20, 2000, N), 2),
+        category=rng.choice(CATEGORY_KEYS, N),
+        owner=rng.choice(OWNER_KEYS, N),
+        include_const=rng.choice(["yes", "no"], N),
+        parking=rng.choice(["yes", "no"], N),
+        total_storey=total,
+        user_storey=rng.integers(1, total + 1),
+        constructed_area=np.round(rng.uniform(0, 3000, N), 2),
+        year_built=rng.integers(1940, 2025, N),
+        custom_cons=np.where(rng.random(N) < 0.2, custom, 0.0),
+        colony_name=np.array(
+            [COLONIES[i] for i in rng.integers(0, len(COLONIES), N)], dtype=object
+        ),
+    )
+
+
+@pytest.mark.parametrize("property_type", ["Residential", "Commercial"])
+def test_calc_batch_matches_calc_bit_for_bit(property_type):
+    columns = random_parcels(seed=len(property_type))
+    batch = calc_batch(property_type, **columns)
+
+    for i in range(N):
+        row = {k: v[i].item() if hasattr(v[i], "item") else v[i] for k, v in columns.items()}
+        expected = _calc(property_type, **row)
+        for key in NUMERIC:
+            got = batch[key][i].item()
+            assert got == expected[key], (i, key, row, got, expected[key])
+        assert batch["category"][i] == expected["category"]
+        assert batch["colony_name"][i] == expected["colony_name"]
+
+
+def test_scalar_arguments_broadcast_like_a_single_row():
+    row = dict(
+        land_area_yards=150.0, category="B", owner="joint", include_const="yes",
+        parking="no", total_storey=3, user_storey=2, constructed_area=140.0,
+        year_built=1975, custom_cons=0.0, colony_name="Const Only",
+    )
+    batch = calc_batch("Residential", **{**row, "land_area_yards": [150.0, 150.0]})
+    expected = _calc("Residential", **row)
+    for key in NUMERIC:
+        assert batch[key].tolist() == [expected[key]] * 2
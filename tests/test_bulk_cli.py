@@ -0,0 +1,62 @@
+# ================================================
+# tests/test_bulk_cli.py – Streaming driver and the colony column
+# ================================================
+
+import io
+import json
+
+import bulk_cli
+import colonies
+
+
+def run(rows, value_row):
+    out, rej = io.StringIO(), io.StringIO()
+    writer = bulk_cli.ResultWriter(out, "jsonl", ["category"])
+    records = ((n, row, None) for n, row in enumerate(rows, start=1))
+    counts = bulk_cli.stream_valuations(records, value_row, writer, rej)
+    return counts, [json.loads(line) for line in rej.getvalue().splitlines()]
+
+
+def by_category(row):
+    return {"category": bulk_cli.category_field(row)}
+
+
+def test_colony_index_found_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    colonies.load_colony_index.cache_clear()
+    try:
+        assert bulk_cli.category_field({"colony": "Lajpat Nagar-I"}) == "c"
+    finally:
+        colonies.load_colony_index.cache_clear()
+
+
+def test_missing_colony_list_rejects_rows_instead_of_aborting(tmp_path, monkeypatch):
+    monkeypatch.setattr(colonies, "COLONIES_CSV", str(tmp_path / "missing.csv"))
+    monkeypatch.setattr(
+        bulk_cli,
+        "load_colony_index",
+        lambda: colonies.load_colony_index(colonies.COLONIES_CSV, colonies.ALIASES_CSV),
+    )
+    counts, rejects = run(
+        [{"colony": "Lajpat Nagar-I"}, {"category": "A"}], by_category
+    )
+    assert counts == (1, 1)
+    assert rejects[0]["record"] == 1
+    assert rejects[0]["error"].startswith("ValueError: colony list unavailable")
+
+
+def test_seed_aliases_resolve():
+    assert bulk_cli.category_field({"colony": "GK-II"}) == "b"
+    assert bulk_cli.category_field({"colony": "south ex"}) == "b"
+
+
+def test_main_reports_ambiguous_colonies(tmp_path, monkeypatch, capsys):
+    index = colonies.ColonyIndex([("Karawal Nagar", "H"), ("Karawal Nagar", "F")])
+    monkeypatch.setattr(bulk_cli, "load_colony_index", lambda: index)
+    src = tmp_path / "in.csv"
+    src.write_text("category\na\n", encoding="utf-8")
+    argv = [str(src), "-o", str(tmp_path / "out.csv")]
+    assert bulk_cli.main(argv, by_category, ["category"], "test") == 0
+    err = capsys.readouterr().err
+    assert "1 ambiguous colony names" in err
+    assert "'karawal nagar': Karawal Nagar (H); Karawal Nagar (F)" in err
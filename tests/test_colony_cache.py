@@ -0,0 +1,180 @@
+# ================================================
+# tests/test_colony_cache.py – Watermark refresh and fallback seeding
+# ================================================
+
+import threading
+
+from colony_cache import ColonyCache, catch_up, open_colony_cache
+from colony_snapshot import build_snapshot
+
+
+class FakeTable:
+    """colonies rows with updated_at, served like the Supabase queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetch_rows(self, since=None):
+        return [r for r in self.rows if since is None or r["updated_at"] >= since]
+
+    def fetch_watermark(self):
+        return max((r["updated_at"] for r in self.rows), default=None)
+
+
+def row(name, cat, stamp, deleted=False):
+    return {"colony_name": name, "category": cat, "updated_at": stamp, "deleted": deleted}
+
+
+def make_cache(table):
+    return ColonyCache(table.fetch_rows, table.fetch_watermark, check_interval=0)
+
+
+def test_first_refresh_is_a_full_load():
+    table = FakeTable([row("A1", "A", "t1"), row("B1", "B", "t2")])
+    cache = make_cache(table)
+    assert cache.refresh()
+    assert cache.category_map() == {"A1": "A", "B1": "B"}
+    assert cache.watermark == "t2" and cache.full_loads == 1
+
+
+def test_delta_applies_changes_and_tombstones():
+    table = FakeTable([row("A1", "A", "t1"), row("B1", "B", "t2")])
+    cache = make_cache(table)
+    cache.refresh()
+    table.rows = [row("A1", "C", "t3"), row("B1", "B", "t4", deleted=True)]
+    assert cache.refresh()
+    assert cache.category_map() == {"A1": "C"}
+    assert cache.delta_loads == 1
+
+
+def test_unchanged_table_is_not_reloaded():
+    table = FakeTable([row("A1", "A", "t1")])
+    cache = make_cache(table)
+    cache.refresh()
+    version = cache.version
+    assert not cache.refresh()
+    assert cache.version == version and cache.full_loads == 1
+
+
+def test_seed_without_watermark_is_replaced_by_full_load():
+    # Offline fallback: seeded from colonies.csv (no watermark), then the
+    # database comes back holding only A1
+    table = FakeTable([row("A1", "A", "t1")])
+    cache = make_cache(table)
+    cache.seed([("A1", "A"), ("CSVONLY", "B")], None)
+    version = cache.version
+
+    assert cache.refresh(force=True)
+    assert cache.category_map() == {"A1": "A"}
+    assert cache.watermark == "t1" and cache.version == version + 1
+
+    # Later checks are deltas again
+    assert not cache.refresh(force=True)
+    assert cache.full_loads == 1 and cache.checks == 1
+
+
+def test_seed_without_watermark_matching_table_keeps_version():
+    table = FakeTable([row("A1", "A", "t1")])
+    cache = make_cache(table)
+    cache.seed([("A1", "A")], None)
+    version = cache.version
+    assert not cache.refresh(force=True)
+    assert cache.version == version and cache.watermark == "t1"
+
+
+def test_late_commit_below_the_watermark_is_picked_up():
+    # B1 is stamped at :05 but commits after A2 (:10) has been seen
+    now = [0.0]
+    table = FakeTable([row("A1", "A", "2026-01-01T00:00:00.000+00:00")])
+    cache = ColonyCache(
+        table.fetch_rows, table.fetch_watermark,
+        check_interval=0, clock=lambda: now[0], commit_window=60,
+    )
+    cache.refresh()
+    table.rows.append(row("A2", "A", "2026-01-01T00:00:10.000+00:00"))
+    assert cache.refresh()
+    table.rows.append(row("B1", "B", "2026-01-01T00:00:05.000+00:00"))
+
+    # Probe shows nothing newer: no delta until the window has passed
+    now[0] = 30.0
+    assert not cache.refresh()
+    assert "B1" not in cache.category_map()
+    now[0] = 61.0
+    assert cache.refresh()
+    assert cache.category_map()["B1"] == "B"
+
+    # Settled: back to probe-only checks
+    loads = cache.delta_loads
+    now[0] = 200.0
+    assert not cache.refresh()
+    assert cache.delta_loads == loads
+
+
+def test_delta_reads_back_over_the_commit_window():
+    since = []
+    table = FakeTable([row("A1", "A", "2026-01-01T00:01:00.000+00:00")])
+
+    def fetch_rows(s=None):
+        since.append(s)
+        return table.fetch_rows(s)
+
+    cache = ColonyCache(fetch_rows, table.fetch_watermark, check_interval=0, commit_window=60)
+    cache.refresh()
+    table.rows.append(row("A2", "A", "2026-01-01T00:02:00.000+00:00"))
+    cache.refresh()
+    assert since == [None, "2026-01-01T00:00:00.000+00:00"]
+
+
+def test_seeded_cache_renders_while_the_refresh_runs():
+    table = FakeTable([row("A1", "A", "t1"), row("B1", "B", "t1")])
+    release = threading.Event()
+
+    def slow_fetch(since=None):
+        release.wait(5)
+        return table.fetch_rows(since)
+
+    cache = ColonyCache(slow_fetch, table.fetch_watermark, check_interval=0)
+    cache.seed([("A1", "A")], None)
+    changed = []
+    refresh = catch_up(cache, on_change=changed.append)
+
+    # Reads don't wait on the full reload
+    assert refresh is not None and refresh.is_alive()
+    assert cache.rows() == [("A1", "A")]
+    assert catch_up(cache) is None  # one refresh at a time
+
+    release.set()
+    refresh.join(5)
+    assert cache.category_map() == {"A1": "A", "B1": "B"}
+    assert changed == [cache]
+
+
+def test_empty_cache_loads_before_returning():
+    table = FakeTable([row("A1", "A", "t1")])
+    cache = make_cache(table)
+    assert catch_up(cache) is None
+    assert cache.rows() == [("A1", "A")]
+
+
+def test_background_refresh_errors_go_to_on_error():
+    def offline(*_):
+        raise ConnectionRefusedError("offline")
+
+    cache = ColonyCache(offline, offline, check_interval=0)
+    cache.seed([("A1", "A")], "t1")
+    errors = []
+    catch_up(cache, on_error=errors.append).join(5)
+    assert isinstance(errors[0], ConnectionRefusedError)
+    assert cache.rows() == [("A1", "A")]
+
+
+def test_open_colony_cache_seeds_from_the_snapshot(tmp_path):
+    path = str(tmp_path / "colonies.snap")
+    build_snapshot([row("A1", "A", "t1"), row("B1", "B", "t2")], path)
+    table = FakeTable([row("A1", "A", "t1"), row("B1", "B", "t2")])
+    cache = open_colony_cache(table.fetch_rows, table.fetch_watermark, path)
+    assert cache.loaded and cache.watermark == "t2"
+    assert cache.rows() == [("A1", "A"), ("B1", "B")]
+
+    missing = str(tmp_path / "missing.snap")
+    assert not open_colony_cache(table.fetch_rows, table.fetch_watermark, missing).loaded
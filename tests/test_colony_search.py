@@ -0,0 +1,19 @@
+# ================================================
+# tests/test_colony_search.py – Search keys share colonies' normalizer
+# ================================================
+
+from colonies import canonical_key, read_colonies_csv
+from colony_search import PrefixIndex, TrigramIndex, prefix_key, search_key
+
+
+def test_keys_are_steps_of_canonical_key():
+    name = "1092 Inder Encl. Ph-II"
+    assert prefix_key(name) == "inder encl ph ii"
+    assert search_key(name) == "inder enclave phase ii"
+    assert canonical_key(name) == "inder enclave phase 2"
+
+
+def test_master_list_lookups():
+    rows = read_colonies_csv()
+    assert PrefixIndex(rows).complete("A.B. Ex") == [("AB Extn Colony", "F")]
+    assert TrigramIndex(rows).search("Lajpat Ngr")[0][0].endswith("Lajpat Nagar-I —")
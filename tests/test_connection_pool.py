@@ -0,0 +1,161 @@
+# ================================================
+# tests/test_connection_pool.py – Shared SQLite connections across threads
+# ================================================
+
+import queue
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=4)
+    with pool.connection() as conn, conn:
+        conn.execute("CREATE TABLE t (n INTEGER);")
+        conn.execute("INSERT INTO t VALUES (0);")
+    yield pool
+    pool.close()
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0]
+
+
+def test_readers_run_concurrently_beside_an_open_write(pool):
+    readers = 3
+    barrier = threading.Barrier(readers + 1, timeout=5)
+    seen, errors = [], []
+
+    def read():
+        try:
+            with pool.connection(timeout=5) as conn:
+                barrier.wait()  # all readers hold a connection at once
+                seen.append(count(conn))
+                barrier.wait()
+        except Exception as e:
+            errors.append(e)
+
+    with pool.connection() as writer:
+        writer.execute("BEGIN IMMEDIATE;")
+        writer.execute("INSERT INTO t VALUES (1);")
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        barrier.wait()  # WAL: the open write blocks no reader
+        for t in threads:
+            t.join(5)
+        writer.commit()
+
+    assert not errors
+    assert seen == [1] * readers  # the uncommitted row isn't visible
+    assert pool._opened == readers + 1
+
+
+def test_writers_are_serialized_and_all_commit(pool):
+    writers, per_writer = 4, 25
+    errors = []
+
+    def write(w):
+        try:
+            for i in range(per_writer):
+                with pool.connection(timeout=5) as conn, conn:
+                    conn.execute("BEGIN IMMEDIATE;")
+                    conn.execute("INSERT INTO t VALUES (?);", (w * per_writer + i + 1,))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    assert not errors  # busy_timeout waits for the lock instead of "database is locked"
+    with pool.connection() as conn:
+        assert count(conn) == writers * per_writer + 1
+
+
+def test_second_writer_waits_for_the_first_to_commit(pool):
+    holding, order = threading.Event(), []
+
+    def second():
+        holding.wait(5)
+        with pool.connection(timeout=5) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE;")  # blocks until the first commits
+            order.append("second")
+            conn.execute("INSERT INTO t VALUES (2);")
+
+    t = threading.Thread(target=second)
+    t.start()
+    with pool.connection() as conn, conn:
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.execute("INSERT INTO t VALUES (1);")
+        holding.set()
+        time.sleep(0.2)
+        order.append("first")
+    t.join(10)
+
+    assert order == ["first", "second"]
+    with pool.connection() as conn:
+        assert count(conn) == 3
+
+
+def test_borrower_waits_when_every_connection_is_out(pool):
+    with pool.connection(), pool.connection(), pool.connection(), pool.connection():
+        assert pool._opened == pool.size
+        with pytest.raises(queue.Empty):
+            with pool.connection(timeout=0.05):
+                pass
+
+    got = []
+
+    def borrow():
+        with pool.connection(timeout=5) as conn:
+            got.append(conn)
+
+    with pool.connection(), pool.connection(), pool.connection(), pool.connection():
+        t = threading.Thread(target=borrow)
+        t.start()
+        t.join(0.1)
+        assert t.is_alive()  # still waiting
+    t.join(5)
+    assert got and pool._opened == pool.size
+
+
+def test_uncommitted_work_is_rolled_back_on_return(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO t VALUES (1);")
+        assert conn.in_transaction
+    with pool.connection() as again:
+        assert again is conn and not again.in_transaction
+        assert count(again) == 1
+
+
+def test_close_closes_idle_connections_and_pool_reopens(pool):
+    with pool.connection() as a, pool.connection() as b:
+        pass
+    assert pool._opened == 2
+
+    pool.close()
+    assert pool._opened == 0
+    for conn in (a, b):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1;")
+
+    with pool.connection() as conn:
+        assert conn is not a and conn is not b
+        assert count(conn) == 1
+    assert pool._opened == 1
+
+
+def test_close_leaves_borrowed_connections_alone(pool):
+    with pool.connection() as conn:
+        pool.close()
+        assert count(conn) == 1
+    assert pool._opened == 1
@@ -0,0 +1,123 @@
+# ================================================
+# tests/test_database.py – Colony CSV sync on the local SQLite schema
+# ================================================
+
+import csv
+import sqlite3
+import time
+
+import pytest
+
+import database
+from colony_cache import ColonyCache
+from storage import SqliteBackend
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["colony_name", "category"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def live(conn):
+    return conn.execute(
+        "SELECT colony_name, category FROM colonies WHERE deleted = 0 ORDER BY id;"
+    ).fetchall()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    database.ensure_colonies_schema(conn)
+    yield conn
+    conn.close()
+
+
+ROWS = [("Aali", "H"), ("Babar Pur", "G"), ("Chanakya Puri", "A"), ("Dwarka", "D")]
+
+
+def test_reimport_unchanged_writes_nothing(conn, tmp_path):
+    path = write_csv(tmp_path / "c.csv", ROWS)
+    database.import_colonies_from_csv(conn, path)
+    before = conn.execute("SELECT * FROM colonies ORDER BY id;").fetchall()
+    summary = database.import_colonies_from_csv(conn, path)
+    assert summary == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 4}
+    assert conn.execute("SELECT * FROM colonies ORDER BY id;").fetchall() == before
+
+
+def test_removed_rows_become_tombstones_and_revive(conn, tmp_path):
+    database.import_colonies_from_csv(conn, write_csv(tmp_path / "a.csv", ROWS))
+    ids = dict(conn.execute("SELECT colony_name, id FROM colonies;"))
+
+    summary = database.import_colonies_from_csv(conn, write_csv(tmp_path / "b.csv", ROWS[:2]))
+    assert summary["removed"] == 2
+    assert live(conn) == ROWS[:2]
+    tombstones = conn.execute("SELECT colony_name FROM colonies WHERE deleted = 1;").fetchall()
+    assert tombstones == [("Chanakya Puri",), ("Dwarka",)]
+
+    # A name that comes back reuses its row
+    summary = database.import_colonies_from_csv(
+        conn, write_csv(tmp_path / "c.csv", [*ROWS[:2], ("Dwarka", "E")])
+    )
+    assert (summary["inserted"], summary["updated"], summary["removed"]) == (0, 1, 0)
+    assert live(conn) == [*ROWS[:2], ("Dwarka", "E")]
+    assert conn.execute("SELECT id FROM colonies WHERE colony_name = 'Dwarka';").fetchone()[0] == ids["Dwarka"]
+
+
+def test_import_removals_reach_colony_cache(tmp_path):
+    db = SqliteBackend(str(tmp_path / "data.db"))
+    try:
+        with database.get_pool(db.path).connection() as conn:
+            database.import_colonies_from_csv(conn, write_csv(tmp_path / "a.csv", ROWS))
+        cache = ColonyCache(db.colony_rows, db.colony_watermark, check_interval=0)
+        cache.refresh()
+        time.sleep(0.01)  # updated_at has millisecond resolution
+
+        with database.get_pool(db.path).connection() as conn:
+            database.import_colonies_from_csv(conn, write_csv(tmp_path / "b.csv", ROWS[1:]))
+        assert cache.refresh()
+        assert "Aali" not in cache.category_map()
+        assert cache.delta_loads == 1
+    finally:
+        db.close()
+
+
+def test_search_skips_deleted_colonies(tmp_path):
+    db = SqliteBackend(str(tmp_path / "data.db"))
+    try:
+        with database.get_pool(db.path).connection() as conn:
+            database.import_colonies_from_csv(conn, write_csv(tmp_path / "a.csv", ROWS))
+            assert database.search_colonies("aali", 5, conn)[0][:2] == ("Aali", "H")
+            db.delete_colony("Aali")
+            assert database.search_colonies("aali", 5, conn) == []
+            db.add_colony({"colony_name": "Aali", "category": "H"}, revive=True)
+            assert database.search_colonies("aali", 5, conn)[0][:2] == ("Aali", "H")
+    finally:
+        db.close()
+
+
+def test_import_inside_caller_transaction_uses_savepoint(conn, tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "a.csv", ROWS)
+    conn.execute("CREATE TABLE notes (text TEXT);")
+    conn.commit()
+
+    conn.execute("INSERT INTO notes VALUES ('before');")
+    database.import_colonies_from_csv(conn, path)
+    assert conn.in_transaction  # not committed on the caller's behalf
+    conn.rollback()
+    assert live(conn) == []
+    assert conn.execute("SELECT * FROM notes;").fetchall() == []
+
+    # A failed import undoes only its own writes
+    conn.execute("INSERT INTO notes VALUES ('kept');")
+    monkeypatch.setattr(
+        database, "diff_colonies", lambda current, rows: ([("Aali", "H"), (None, "G")], [], [])
+    )
+    with pytest.raises(sqlite3.IntegrityError):
+        database.import_colonies_from_csv(conn, path)
+    assert conn.in_transaction
+    conn.commit()
+    assert live(conn) == []
+    assert conn.execute("SELECT * FROM notes;").fetchall() == [("kept",)]
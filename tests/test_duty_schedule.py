@@ -0,0 +1,73 @@
+# ================================================
+# tests/test_duty_schedule.py – Closed-form inverse of the duty schedule
+# ================================================
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from duty_schedule import (
+    EXTRA_DUTY_THRESHOLD,
+    MUTATION_FEE,
+    MUTATION_FEE_ABOVE_50L,
+    TDS_THRESHOLD,
+    compile_schedule,
+)
+
+SCHEDULES = [
+    compile_schedule(rate, mutation)
+    for rate in (0.04, 0.05, 0.06)
+    for mutation in (MUTATION_FEE, MUTATION_FEE_ABOVE_50L)
+]
+
+
+def budgets(schedule):
+    """Budgets on, just around and inside each segment, and in the jumps."""
+    out = []
+    for v in (0.0, 1.0, EXTRA_DUTY_THRESHOLD, TDS_THRESHOLD):
+        total = schedule.total(float(v))
+        above = schedule.total(math.nextafter(float(v), math.inf))
+        out += [total, total + 0.01, total - 0.01, (total + above) / 2, above]
+    rng = random.Random(5)
+    out += [round(rng.uniform(MUTATION_FEE, 2e6), 2) for _ in range(2000)]
+    return [b for b in out if b >= schedule.mutations[0]]
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=repr)
+def test_max_consideration_is_the_largest_that_fits(schedule):
+    for budget in budgets(schedule):
+        v = schedule.max_consideration(budget)
+        assert schedule.total(v) <= budget < schedule.total(v + 1), budget
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=repr)
+def test_budget_in_a_jump_returns_the_breakpoint(schedule):
+    for v in (EXTRA_DUTY_THRESHOLD, TDS_THRESHOLD):
+        below = schedule.total(float(v))
+        above = schedule.total(math.nextafter(float(v), math.inf))
+        assert schedule.max_consideration((below + above) / 2) == v
+
+
+def test_budget_under_the_mutation_fee_buys_nothing():
+    schedule = compile_schedule(0.06)
+    assert schedule.max_consideration(MUTATION_FEE - 1) == 0.0
+
+
+def test_tighten_steps_below_a_closed_form_that_overshoots():
+    # (budget - mutation) / slope rounds up here: total() of it is over
+    schedule = compile_schedule(0.04)
+    budget = 789145.9
+    raw = (budget - schedule.mutations[2]) / schedule.slopes[2]
+    assert schedule.total(raw) > budget
+
+    v = schedule.max_consideration(budget)
+    assert v < raw and schedule.total(v) <= budget
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=repr)
+def test_array_inverse_matches_scalar(schedule):
+    scalar = budgets(schedule)
+    array = schedule.max_consideration(np.array(scalar))
+    assert array.tolist() == [schedule.max_consideration(b) for b in scalar]
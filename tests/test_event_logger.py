@@ -0,0 +1,118 @@
+# ================================================
+# tests/test_event_logger.py – Batching, shutdown flush and shedding
+# ================================================
+
+import threading
+import time
+
+import pytest
+
+from event_logger import EventLogger
+
+
+class Sink:
+    """insert_batch() stand-in that records batches; can be held shut."""
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, rows):
+        self.entered.set()
+        self.gate.wait(5)
+        self.batches.append(list(rows))
+
+
+def wait_until(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def sink():
+    s = Sink()
+    yield s
+    s.gate.set()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(sink):
+    logger = EventLogger(sink, batch_size=3, flush_interval=60)
+    for i in range(7):
+        logger.log({"n": i})
+    # The 7th waits for its interval
+    assert wait_until(lambda: logger.stats()["pending"] == 1)
+    assert [len(b) for b in sink.batches] == [3, 3]
+    logger.close()
+
+
+def test_partial_batch_is_written_after_the_flush_interval(sink):
+    logger = EventLogger(sink, batch_size=100, flush_interval=0.05)
+    start = time.monotonic()
+    logger.log({"n": 1})
+    logger.log({"n": 2})
+    assert wait_until(lambda: sink.batches)
+    assert time.monotonic() - start >= 0.05
+    assert sink.batches == [[{"n": 1}, {"n": 2}]]
+    logger.close()
+
+
+def test_flush_writes_a_partial_batch_now(sink):
+    logger = EventLogger(sink, batch_size=100, flush_interval=60)
+    logger.log({"n": 1})
+    assert logger.flush(timeout=5)
+    assert sink.batches == [[{"n": 1}]]
+    logger.close()
+
+
+def test_close_writes_pending_events_and_stops(sink):
+    logger = EventLogger(sink, batch_size=100, flush_interval=60)
+    for i in range(5):
+        logger.log({"n": i})
+    logger.close()
+    assert sink.batches == [[{"n": i} for i in range(5)]]
+    assert not logger._thread.is_alive()
+
+    assert not logger.log({"n": 5})  # closed: dropped, not queued
+    assert logger.stats()["dropped"] == 1
+    logger.close()  # idempotent
+
+
+def test_low_priority_events_are_shed_under_backpressure(sink):
+    logger = EventLogger(sink, maxsize=10, batch_size=1, flush_interval=60, shed_at=0.5)
+    sink.gate.clear()
+    logger.log({"n": "first"})
+    assert sink.entered.wait(5)  # worker is stuck writing it; the queue backs up
+
+    for i in range(5):
+        assert logger.log({"n": i})
+    assert not logger.log({"n": "debug"}, low_priority=True)
+    for i in range(5, 10):
+        assert logger.log({"n": i})  # important events use the headroom
+    assert not logger.log({"n": "overflow"})
+
+    stats = logger.stats()
+    assert (stats["shed"], stats["dropped"], stats["queued"]) == (1, 1, 11)
+
+    sink.gate.set()
+    assert logger.flush(timeout=5)
+    written = [row["n"] for batch in sink.batches for row in batch]
+    assert written == ["first", *range(10)]
+    logger.close()
+
+
+def test_insert_failure_is_counted_not_raised():
+    def broken(rows):
+        raise ConnectionError("down")
+
+    logger = EventLogger(broken, batch_size=2, flush_interval=60)
+    logger.log({"n": 1})
+    logger.log({"n": 2})
+    assert logger.flush(timeout=5)
+    assert logger.stats()["failed"] == 2 and logger.stats()["written"] == 0
+    logger.close()
@@ -0,0 +1,35 @@
+# ================================================
+# tests/test_parallel_engine.py – Sharded valuation matches calc_batch
+# ================================================
+
+import numpy as np
+import pytest
+
+import batch_engine
+from parallel_engine import parallel_valuation, synthetic_columns
+
+
+@pytest.mark.parametrize("kind", ["Residential", "Commercial"])
+def test_empty_portfolio_gives_empty_columns(kind):
+    merged, report = parallel_valuation(kind, synthetic_columns(0), workers=1)
+    expected = batch_engine.calc_batch(kind, **synthetic_columns(0))
+    assert set(merged) == set(expected)
+    assert all(len(v) == 0 for v in merged.values())
+    assert report["rows"] == 0 and report["workers"] == {}
+
+
+def test_empty_dda_portfolio():
+    merged, _ = parallel_valuation(
+        "dda", {"area_yards": [], "usage": [], "more_than_4": [], "owner": []}, workers=1
+    )
+    assert set(merged) == set(batch_engine.dda_batch([], [], [], []))
+    assert all(len(v) == 0 for v in merged.values())
+
+
+def test_shards_match_single_process_call():
+    columns = synthetic_columns(1_000, seed=3)
+    merged, report = parallel_valuation("Residential", columns, workers=1, chunk_size=300)
+    expected = batch_engine.calc_batch("Residential", **columns)
+    assert report["rows"] == 1_000
+    for key in ("final_consideration", "stamp_duty", "total_payable", "category"):
+        assert np.array_equal(merged[key], expected[key])
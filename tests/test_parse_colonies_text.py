@@ -0,0 +1,71 @@
+# ================================================
+# tests/test_parse_colonies_text.py – Multi-file merge and the parse cache
+# ================================================
+
+import csv
+
+import colonies
+import parse_colonies_text as pct
+
+
+def write(path, *lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def run(tmp_path, *sources):
+    out = tmp_path / "colonies.csv"
+    report = tmp_path / "report.tsv"
+    summary = pct.main(
+        list(sources), str(out), str(tmp_path / "cache"), str(report), workers=1
+    )
+    with open(out, encoding="utf-8") as f:
+        rows = [tuple(r) for r in csv.reader(f)][1:]
+    with open(report, encoding="utf-8") as f:
+        problems = [line.split("\t")[2] for line in f.read().splitlines()[1:]]
+    return summary, rows, problems
+
+
+def test_cross_file_conflict_keeps_only_the_first_row(tmp_path):
+    a = write(tmp_path / "a.txt", "Aali  H", "Lajpat Nagar-I  C")
+    b = write(tmp_path / "b.txt", "Lajpat Ngr I  D", "Dwarka  D")
+    summary, rows, problems = run(tmp_path, a, b)
+    assert rows == [("Aali", "H"), ("Lajpat Nagar-I", "C"), ("Dwarka", "D")]
+    assert summary["conflicts"] == 1
+    assert problems == [f"category conflict with Lajpat Nagar-I (C) in {a}"]
+
+
+def test_same_file_conflict_keeps_both_rows(tmp_path):
+    a = write(tmp_path / "a.txt", "Lajpat Nagar-I  C", "Lajpat Ngr I  D")
+    summary, rows, _ = run(tmp_path, a)
+    assert rows == [("Lajpat Nagar-I", "C"), ("Lajpat Ngr I", "D")]
+    assert summary["conflicts"] == 1
+
+
+def test_normalizer_edit_invalidates_the_cache(tmp_path, monkeypatch):
+    a = write(tmp_path / "a.txt", "Aali  H", "Aali Vhr  H")
+    assert run(tmp_path, a)[0]["cached_blocks"] == 0
+    assert run(tmp_path, a)[0]["cached_blocks"] == 1
+
+    before = pct.normalizer_digest()
+    monkeypatch.setitem(colonies.ABBREVIATIONS, "vhr", "vihaar")
+    assert pct.normalizer_digest() != before
+    monkeypatch.setattr(pct, "CACHE_VERSION", f"{pct.PARSER_VERSION}-{pct.normalizer_digest()}")
+    summary, rows, _ = run(tmp_path, a)
+    assert summary["cached_blocks"] == 0 and summary["parsed_blocks"] == 1
+
+
+def test_serial_numbered_rows_stay_distinct(tmp_path):
+    # Same name under two serials: two colonies in the source list
+    a = write(tmp_path / "a.txt", "1194 Mandli —  H", "1195 Mandli —  H", "1195 Mandli —  H")
+    summary, rows, _ = run(tmp_path, a)
+    assert rows == [("1194 Mandli —", "H"), ("1195 Mandli —", "H")]
+    assert summary["ambiguous_keys"] == 0
+
+
+def test_ambiguous_keys_are_reported(tmp_path, capsys):
+    a = write(tmp_path / "a.txt", "1283 Mohan Park —  G", "1284 Mohan Park —  F")
+    summary, rows, _ = run(tmp_path, a)
+    assert len(rows) == 2
+    assert summary["ambiguous_keys"] == 1
+    assert "'mohan park': 1283 Mohan Park — (G); 1284 Mohan Park — (F)" in capsys.readouterr().out
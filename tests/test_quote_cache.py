@@ -0,0 +1,109 @@
+# ================================================
+# tests/test_quote_cache.py – LRU quote cache: hits, eviction, invalidation
+# ================================================
+
+import pytest
+
+import calc_engine
+from calc_engine import EffectiveRates, _calc
+from quote_cache import QuoteCache
+
+BASE = dict(
+    property_type="Residential",
+    land_area_yards=200.0,
+    category="C",
+    owner="male",
+    include_const="no",
+    parking="no",
+    total_storey=4,
+    user_storey=1,
+    constructed_area=0.0,
+    year_built=2000,
+    custom_cons=0.0,
+    colony_name=None,
+)
+
+
+def quote(cache, **changes):
+    return cache.calculate(**{**BASE, **changes})
+
+
+def same(a, b):
+    return {**a, "timestamp": None} == {**b, "timestamp": None}
+
+
+@pytest.fixture(autouse=True)
+def restore_rates():
+    previous = calc_engine.colony_rates()
+    yield
+    calc_engine.set_colony_rates(previous)
+
+
+def test_hits_misses_and_hit_rate():
+    cache = QuoteCache()
+    quote(cache)
+    quote(cache)
+    quote(cache, owner="female")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QuoteCache(maxsize=2)
+    quote(cache, category="A")
+    quote(cache, category="B")
+    quote(cache, category="A")  # hit: B is now the oldest
+    quote(cache, category="C")
+    assert cache.stats()["evictions"] == 1
+
+    quote(cache, category="A")
+    assert cache.stats()["hits"] == 2
+    quote(cache, category="B")
+    stats = cache.stats()
+    assert (stats["misses"], stats["evictions"], stats["size"]) == (4, 2, 2)
+
+
+def test_hit_refills_echoed_inputs():
+    # Without construction, parking / year / area don't change the
+    # quote, and a colony without overrides shares its category's entry
+    cache = QuoteCache()
+    quote(cache)
+    changes = dict(parking="yes", year_built=1975, constructed_area=90.0,
+                   colony_name="Not Overridden")
+    res = quote(cache, **changes)
+    assert cache.stats()["hits"] == 1
+    assert same(res, _calc(**{**BASE, **changes}))
+    assert res["colony_name"] == "Not Overridden" and res["year_built"] == 1975
+
+
+def test_hit_returns_a_copy():
+    cache = QuoteCache()
+    quote(cache)["total_payable"] = -1
+    assert quote(cache)["total_payable"] > 0
+
+
+def test_category_table_edit_invalidates(monkeypatch):
+    cache = QuoteCache()
+    before = quote(cache)
+    monkeypatch.setitem(calc_engine.circlerates_res, "C", calc_engine.circlerates_res["C"] * 2)
+    try:
+        after = quote(cache)
+        assert cache.stats()["invalidations"] == 1 and cache.stats()["hits"] == 0
+        assert after["land_value_user"] == 2 * before["land_value_user"]
+        assert same(after, _calc(**BASE))
+    finally:
+        monkeypatch.undo()
+        calc_engine.reload_rate_tables()
+
+
+def test_colony_rate_change_invalidates():
+    cache = QuoteCache()
+    quote(cache, colony_name="Both")
+    calc_engine.set_colony_rates(
+        EffectiveRates([{"colony_name": "Both", "category": "C", "res_land_rate": 200000}])
+    )
+    res = quote(cache, colony_name="Both")
+    assert cache.stats()["invalidations"] == 1
+    assert same(res, _calc(**{**BASE, "colony_name": "Both"}))
+    assert res["land_value_user"] != quote(cache)["land_value_user"]
@@ -0,0 +1,20 @@
+# ================================================
+# tests/test_results.py – QuoteResult as a value (event dedupe key)
+# ================================================
+
+from calc_engine import _calc
+from results import QuoteResult
+
+ARGS = ("Residential", 120.0, "C", "male", "yes", "no", 2, 1, 100.0, 1990, 0.0)
+
+
+def test_quote_result_hashes_by_value():
+    res = QuoteResult.from_dict(_calc(*ARGS))
+    same = QuoteResult.from_dict(res.to_dict())
+    assert same == res and hash(same) == hash(res)
+
+
+def test_different_results_in_the_same_second_hash_apart():
+    a = _calc(*ARGS)
+    b = {**_calc("Residential", 150.0, *ARGS[2:]), "timestamp": a["timestamp"]}
+    assert hash(QuoteResult.from_dict(a)) != hash(QuoteResult.from_dict(b))
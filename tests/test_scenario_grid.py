@@ -0,0 +1,57 @@
+# ================================================
+# tests/test_scenario_grid.py – Sweeps match one _calc() per scenario
+# ================================================
+
+import itertools
+
+import pytest
+
+from calc_engine import _calc
+from scenario_grid import STOREY_SPLIT, sweep
+
+AXES = {
+    "category": ["B", "F"],
+    "owner": ["female", "joint", "male"],
+    STOREY_SPLIT: [(1, 1), (2, 4)],
+    "custom_cons": [0.0, 3_000_000.0, 6_000_000.0],
+}
+FIXED = dict(
+    land_area_yards=120.0,
+    include_const="yes",
+    parking="yes",
+    constructed_area=110.0,
+    year_built=1985,
+)
+
+
+def scenarios():
+    """AXES combinations in sweep() row order (first axis slowest)."""
+    for cat, owner, (user, total), custom in itertools.product(*AXES.values()):
+        yield dict(category=cat, owner=owner, user_storey=user, total_storey=total,
+                   custom_cons=custom, **FIXED)
+
+
+@pytest.mark.parametrize("property_type", ["Residential", "Commercial"])
+def test_sweep_rows_match_calc(property_type):
+    grid = sweep(property_type, AXES, **FIXED)
+    rows = list(scenarios())
+    assert all(len(col) == len(rows) for col in grid.values())
+
+    for i, inputs in enumerate(rows):
+        expected = _calc(property_type, **inputs)
+        for key, value in expected.items():
+            if key == "timestamp":
+                continue
+            got = grid[key][i]
+            got = got.item() if hasattr(got, "item") else got
+            assert got == value, (i, key, inputs)
+
+
+def test_parameter_swept_and_fixed_is_rejected():
+    with pytest.raises(ValueError, match="both swept and fixed"):
+        sweep("Residential", AXES, owner="male", **FIXED)
+
+
+def test_empty_axis_is_rejected():
+    with pytest.raises(ValueError, match="no values"):
+        sweep("Residential", {**AXES, "category": []}, **FIXED)
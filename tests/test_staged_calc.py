@@ -0,0 +1,117 @@
+# ================================================
+# tests/test_staged_calc.py – Which _calc stages re-run on each edit
+# ================================================
+
+import random
+
+import pytest
+
+import calc_engine
+from calc_engine import EffectiveRates, _calc
+from staged_calc import StagedCalculator
+
+BASE = dict(
+    property_type="Residential",
+    land_area_yards=200.0,
+    category="C",
+    owner="male",
+    include_const="yes",
+    parking="yes",
+    total_storey=4,
+    user_storey=1,
+    constructed_area=180.0,
+    year_built=1995,
+    custom_cons=0.0,
+    colony_name=None,
+)
+
+# Residential construction rate overridden, land rate left to the category
+OVERRIDES = [
+    {"colony_name": "Const Only", "category": "C", "res_const_rate": 30000},
+    {"colony_name": "Both", "category": "C", "res_land_rate": 200000, "res_const_rate": 30000},
+]
+
+
+@pytest.fixture
+def calc():
+    previous = calc_engine.colony_rates()
+    calc_engine.set_colony_rates(EffectiveRates(OVERRIDES))
+    calc = StagedCalculator()
+    calc.calculate(**BASE)
+    yield calc
+    calc_engine.set_colony_rates(previous)
+
+
+def rerun(calc, **changes):
+    """Stage names re-run by calculate() with `changes` on top of BASE."""
+    before = calc.stats()
+    result = calc.calculate(**{**BASE, **changes})
+    expected = _calc(**{**BASE, **changes})
+    assert {**result, "timestamp": None} == {**expected, "timestamp": None}
+    return {name for name, n in calc.stats().items() if n != before[name]}
+
+
+def test_first_run_computes_every_stage(calc):
+    assert calc.stats() == {name: 1 for name, _ in calc_engine.CALC_STAGES}
+
+
+def test_same_inputs_rerun_nothing(calc):
+    assert rerun(calc) == set()
+
+
+def test_owner_edit_reruns_only_duty(calc):
+    assert rerun(calc, owner="female") == {"duty"}
+
+
+def test_rate_edit_without_new_values_stops_at_rates(calc):
+    # A colony with no overrides resolves to the same category rates
+    assert rerun(calc, colony_name="Not Overridden") == {"rates"}
+
+
+def test_construction_rate_edit_skips_land(calc):
+    assert rerun(calc, colony_name="Const Only") == {
+        "rates", "construction", "consideration", "duty",
+    }
+
+
+def test_land_rate_edit_reruns_land_and_downstream(calc):
+    assert rerun(calc, colony_name="Both") == set(calc.stats())
+
+
+def test_construction_edit_skips_rates_and_land(calc):
+    assert rerun(calc, year_built=2010) == {"construction", "consideration", "duty"}
+
+
+def test_custom_consideration_hides_upstream_edits_from_duty(calc):
+    assert rerun(calc, custom_cons=9_000_000.0) == {"consideration", "duty"}
+    assert rerun(calc, custom_cons=9_000_000.0, land_area_yards=250.0) == {
+        "land", "construction", "consideration",
+    }
+
+
+def test_rate_table_change_invalidates_every_stage(calc):
+    calc_engine.set_colony_rates(EffectiveRates(OVERRIDES[:1]))
+    assert rerun(calc) == set(calc.stats())
+
+
+def test_flat_calc_matches_stages(calc):
+    # _calc() inlines the stage math; any drift between the two shows here
+    rng = random.Random(7)
+    for _ in range(500):
+        inputs = dict(
+            property_type=rng.choice(["Residential", "Commercial"]),
+            land_area_yards=rng.choice([0.0, 1.0, 75.5, 200.0, 1234.56]),
+            category=rng.choice("ABCDEFGH"),
+            owner=rng.choice(["male", "female", "joint", "unknown"]),
+            include_const=rng.choice(["yes", "no"]),
+            parking=rng.choice(["yes", "no"]),
+            total_storey=rng.randint(1, 6),
+            user_storey=rng.randint(1, 6),
+            constructed_area=rng.uniform(0, 2000),
+            year_built=rng.randint(1950, 2024),
+            custom_cons=rng.choice([0.0, 2_500_000.0, 5_000_000.0, rng.uniform(0, 1e8)]),
+            colony_name=rng.choice([None, "Const Only", "Both", "Not Overridden"]),
+        )
+        result = calc.calculate(**inputs)
+        expected = _calc(**inputs)
+        assert {**result, "timestamp": None} == {**expected, "timestamp": None}, inputs
@@ -0,0 +1,52 @@
+# ================================================
+# tests/test_storage.py – StorageBackend contract on the SQLite backend
+# ================================================
+
+import pytest
+
+from storage import SqliteBackend, StorageBackend, SupabaseBackend
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SqliteBackend(str(tmp_path / "data.db"))
+    yield db
+    db.close()
+
+
+def test_backend_must_implement_table_operations():
+    class Partial(StorageBackend):
+        def select(self, table, columns="*", match=None, since=None, order=None,
+                   desc=False, limit=None):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.parametrize("match", [None, {}])
+def test_update_and_delete_refuse_an_empty_match(db, match):
+    before = db.select("colonies")
+    with pytest.raises(ValueError):
+        db.update("colonies", {"category": "A"}, match)
+    with pytest.raises(ValueError):
+        db.delete("colonies", match)
+    assert db.select("colonies") == before
+
+
+class Query:
+    def update(self, values):
+        return self
+
+    def delete(self):
+        return self
+
+
+def test_supabase_refuses_an_empty_match_before_connecting():
+    backend = SupabaseBackend("http://localhost", "key")
+    backend._client = type("Client", (), {"table": lambda self, name: Query()})()
+    with pytest.raises(ValueError):
+        backend.update("history", {"x": 1}, {})
+    with pytest.raises(ValueError):
+        backend.delete("history", None)
+